@@ -1,18 +1,25 @@
 import streamlit as st
 import pandas as pd
 import os
+import assets
 
 def display_profile_photo(photo_path, width=150, shape="circle"):
     """Helper function to display profile photos with consistent styling"""
     if os.path.exists(photo_path):
         if shape == "square":
             st.markdown(f'<style>.square-photo {{ border: 3px solid #00008B; }} </style>', unsafe_allow_html=True)
+        # Serve the cached 2x thumbnail (crisp on high-DPI screens) instead of the full-size photo.
+        # There is no 1x variant: st.image has no srcset, and inlining both sizes would send both.
+        try:
+            photo_path = assets.thumbnail(photo_path, width=width, scale=2)
+        except OSError:
+            pass
         st.image(photo_path, width=width, use_container_width=False)
     else:
         st.markdown("<h1 style='text-align: center;'>👤</h1>", unsafe_allow_html=True)
         st.caption(f"Photo not found: {photo_path}")
 
-def render(df, df_raw, selected_year):
+def render(ds, selected_year):
     st.markdown("## 📚 About This Dashboard")
     
     # -----------------------------
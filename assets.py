@@ -0,0 +1,104 @@
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+# -----------------------------
+# Static asset pipeline
+# -----------------------------
+# Thumbnails are written next to the app under .cache/assets and keyed on the
+# hash of the source image, so replacing a photo produces a new file instead
+# of serving a stale one.
+ASSET_CACHE_DIR = os.path.join(".cache", "assets")
+
+THUMBNAIL_EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+
+def file_hash(path, length=16):
+    """Return a short sha256 digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()[:length]
+
+
+@lru_cache(maxsize=256)
+def _stat_hash(path, mtime_ns, size):
+    return file_hash(path)
+
+
+def cached_file_hash(path):
+    """file_hash(path), recomputed only when the file's mtime or size changes"""
+    stat = os.stat(path)
+    return _stat_hash(path, stat.st_mtime_ns, stat.st_size)
+
+
+# -----------------------------
+# CSS
+# -----------------------------
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+@lru_cache(maxsize=None)
+def load_css(path="styles.css"):
+    """Read and minify a stylesheet once per process, returning (css, content_hash)"""
+    with open(path) as f:
+        css = minify_css(f.read())
+    return css, hashlib.sha256(css.encode()).hexdigest()[:12]
+
+
+def css_tag(path="styles.css"):
+    """Return a <style> tag for the minified stylesheet, stamped with its content hash"""
+    css, content_hash = load_css(path)
+    return f"<style data-css-hash='{content_hash}'>{css}</style>"
+
+
+# -----------------------------
+# Thumbnails
+# -----------------------------
+def _thumbnail_format(fmt):
+    from PIL import features
+
+    if fmt == "WEBP" and not features.check("webp"):
+        return "JPEG"
+    return fmt
+
+
+def thumbnail(photo_path, width=150, scale=1, fmt="WEBP", quality=82):
+    """Return the path of a square, re-encoded thumbnail of photo_path.
+
+    The thumbnail is cropped to width x width (matching the object-fit: cover
+    styling on the About Us tab) and rendered at `scale` times that size for
+    high-DPI screens (the About Us tab serves only scale=2). Generated files are
+    cached on disk and reused for as long as the source image is unchanged.
+    """
+    fmt = _thumbnail_format(fmt.upper())
+    size = int(width * scale)
+    stem = os.path.splitext(os.path.basename(photo_path))[0]
+    out_path = os.path.join(
+        ASSET_CACHE_DIR,
+        f"{stem}-{cached_file_hash(photo_path)}-{size}.{THUMBNAIL_EXTENSIONS[fmt]}"
+    )
+    if os.path.exists(out_path):
+        return out_path
+
+    from PIL import Image, ImageOps
+
+    os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+    with Image.open(photo_path) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        img = ImageOps.fit(img, (size, size), method=Image.LANCZOS)
+        tmp_path = f"{out_path}.{os.getpid()}.tmp"
+        img.save(tmp_path, format=fmt, quality=quality, optimize=True)
+    # Rename into place so concurrent sessions never read a half-written file
+    os.replace(tmp_path, out_path)
+    return out_path
+
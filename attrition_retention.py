@@ -2,8 +2,14 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import chart_data
+import drill_through
+from metrics import GENERATION_ORDER
+from metrics import attrition as attrition_metrics
+from metrics import sampling, survival
+from metrics import timeline as timeline_metrics
 
-def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleaned Data 01.09.26.xlsx"):
+def render(ds, selected_year, approximate=False):
     # -----------------------------
     # Executive Summary at the very top
     # -----------------------------
@@ -32,85 +38,38 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
     st.markdown("## 🔄 Attrition and Retention Metrics")
 
     # -----------------------------
-    # Ensure Retention column exists
+    # Row 0: Summary Metrics (Net Change uses Summary tab col H)
     # -----------------------------
-    def to_resigned_flag(x):
-        s = str(x).strip().upper()
-        return 0 if s == "ACTIVE" else 1
-
-    if "ResignedFlag" not in df_raw.columns:
-        df_raw["ResignedFlag"] = df_raw["Resignee Checking"].apply(to_resigned_flag)
-    if "Retention" not in df_raw.columns:
-        df_raw["Retention"] = 1 - df_raw["ResignedFlag"]
-
-    # Normalize values
-    df_raw["Gender"] = df_raw["Gender"].str.strip().str.capitalize()
-    df_raw["Resignee Checking"] = df_raw["Resignee Checking"].str.strip().str.upper()
-
-    # -----------------------------
-    # Create Year column from Calendar Year
-    # -----------------------------
-    if "Year" not in df_raw.columns and "Calendar Year" in df_raw.columns:
-        df_raw["Year"] = pd.to_datetime(df_raw["Calendar Year"]).dt.year
-
-    # -----------------------------
-    # Row 0: Summary Metrics (Net Change fixed to use Summary tab col H)
-    # -----------------------------
-    summary_year = df_raw[df_raw["Year"] == selected_year]
-
-    total_employees = len(summary_year)
-    resigned = summary_year["ResignedFlag"].sum()
-    retained = summary_year["Retention"].sum()
-
-    retention_rate = (retained / total_employees) * 100 if total_employees > 0 else 0
-    attrition_rate = (resigned / total_employees) * 100 if total_employees > 0 else 0
-
-    # Load official Net Change from Summary tab (Column H)
-    net_change_to_show = 0  # default
-    try:
-        summary_df = pd.read_excel(summary_file, sheet_name="Summary")
-        summary_df.columns = summary_df.columns.str.strip()
-        
-        if "Year" in summary_df.columns and "Net Change" in summary_df.columns:
-            # Convert Year to integer, handling both datetime and numeric formats
-            if pd.api.types.is_datetime64_any_dtype(summary_df["Year"]):
-                summary_df["Year"] = summary_df["Year"].dt.year
-            else:
-                summary_df["Year"] = pd.to_numeric(summary_df["Year"], errors="coerce")
-            
-            summary_df["Year"] = summary_df["Year"].astype(int)
-            summary_df["Net Change"] = pd.to_numeric(summary_df["Net Change"], errors="coerce").fillna(0).astype(int)
-            
-            # Create lookup dictionary
-            year_to_net = summary_df.set_index("Year")["Net Change"].to_dict()
-            
-            if selected_year in year_to_net:
-                net_change_to_show = year_to_net[selected_year]
-    except Exception as e:
-        st.warning(f"Could not load Net Change from Summary sheet: {str(e)}")
-        net_change_to_show = 0
+    # Sample estimates until the exact results are ready (approximate mode)
+    results = sampling.results(attrition_metrics, ds, selected_year, approximate)
+    kpis = results.kpis
+    total_employees = kpis["total_employees"]
+    resigned = kpis["resigned"]
+    retention_rate = kpis["retention_rate"]
+    attrition_rate = kpis["attrition_rate"]
+    net_change_to_show = kpis["net_change"]
 
     colA, colB, colC, colD, colE = st.columns(5)
     
     with colA:
         with st.container(border=True):
             st.markdown("<div class='metric-label'>Total Employees</div>", unsafe_allow_html=True)
-            st.markdown(f"<div class='metric-value'>{total_employees}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{total_employees}</div>{chart_data.interval_note(results, 'total_employees')}", unsafe_allow_html=True)
     
     with colB:
         with st.container(border=True):
             st.markdown("<div class='metric-label'>Resigned</div>", unsafe_allow_html=True)
-            st.markdown(f"<div class='metric-value'>{resigned}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{resigned}</div>{chart_data.interval_note(results, 'resigned')}", unsafe_allow_html=True)
     
     with colC:
         with st.container(border=True):
             st.markdown("<div class='metric-label'>Retention Rate</div>", unsafe_allow_html=True)
-            st.markdown(f"<div class='metric-value'>{retention_rate:.1f}%</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{retention_rate:.1f}%</div>{chart_data.interval_note(results, 'retention_rate', '.1f', '%')}", unsafe_allow_html=True)
     
     with colD:
         with st.container(border=True):
             st.markdown("<div class='metric-label'>Attrition Rate</div>", unsafe_allow_html=True)
-            st.markdown(f"<div class='metric-value'>{attrition_rate:.1f}%</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{attrition_rate:.1f}%</div>{chart_data.interval_note(results, 'attrition_rate', '.1f', '%')}", unsafe_allow_html=True)
     
     with colE:
         with st.container(border=True):
@@ -122,9 +81,9 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
     # -----------------------------
     with st.container(border=True):
         st.markdown("#### Resigned per Year")
-        resigned_per_year = df_raw.groupby("Year")["ResignedFlag"].sum().reset_index(name="Resigned")
+        resigned_per_year = results.resigned_per_year
         fig_resigned = px.bar(resigned_per_year, x="Year", y="Resigned", text="Resigned",
-                              color_discrete_sequence=["#00008B"])
+                              color_discrete_sequence=["#00008B"], **chart_data.error_bars(resigned_per_year, "Resigned"))
         fig_resigned.update_layout(
             height=220, margin=dict(l=20, r=20, t=20, b=20),
             yaxis=dict(title="Resigned Employees", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
@@ -134,7 +93,7 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
             uniformtext_minsize=10, uniformtext_mode="hide",
             showlegend=False
         )
-        st.plotly_chart(fig_resigned, use_container_width=True, key="resigned_per_year")
+        drill_through.chart(fig_resigned, "resigned_per_year", "attrition", "Leavers", x="Year", where={"Resignee Checking": "LEAVER"})
 
     # -----------------------------
     # Row 2: Retention by Gender + Retention by Generation
@@ -144,9 +103,8 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
     with col1:
         with st.container(border=True):
             st.markdown("#### Retention by Gender")
-            retention_gender = df_raw.groupby(["Year", "Gender"])["Retention"].sum().reset_index()
-            retention_rate_df = df_raw.groupby("Year")["Retention"].mean().reset_index()
-            retention_rate_df["RetentionRatePct"] = retention_rate_df["Retention"] * 100
+            retention_gender = results.retention_by_gender
+            retention_rate_df = results.retention_rate
             
             # Standardized gender colors (blue palette - unique shades)
             gender_colors = {"Female": "#6495ED", "Male": "#00008B"}
@@ -155,8 +113,12 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
             for gender in retention_gender["Gender"].unique():
                 subset = retention_gender[retention_gender["Gender"] == gender]
                 color = gender_colors.get(gender, "#00008B")
+                interval = None
+                if "Retention Low" in subset.columns:
+                    interval = dict(type="data", array=subset["Retention High"] - subset["Retention"],
+                                    arrayminus=subset["Retention"] - subset["Retention Low"])
                 fig.add_bar(x=subset["Year"], y=subset["Retention"], name=gender,
-                            marker_color=color, yaxis="y1")
+                            marker_color=color, yaxis="y1", error_y=interval)
             fig.add_trace(go.Scatter(x=retention_rate_df["Year"], y=retention_rate_df["RetentionRatePct"],
                                      mode="lines+markers", name="Retention Rate (%)",
                                      line=dict(color="orange", width=3), yaxis="y2"))
@@ -170,24 +132,13 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
                 legend=dict(font=dict(color="var(--text-color)")),
                 barmode="group", height=220, margin=dict(l=60, r=60, t=20, b=20)
             )
-            st.plotly_chart(fig, use_container_width=True, key="retention_by_gender")
+            chart_data.plotly_chart(fig, use_container_width=True, key="retention_by_gender")
 
     with col2:
         with st.container(border=True):
             st.markdown("#### Retention by Generation")
-            active_df = df_raw[df_raw["Resignee Checking"] == "ACTIVE"]
-            
-            # Normalize Generation values
-            df_raw["Generation"] = df_raw["Generation"].str.strip().str.title()
-            
-            total_by_year_gen = df_raw[df_raw["Year"].between(2020, 2025)].groupby(["Year", "Generation"]).size().reset_index(name="Total")
-            active_by_year_gen = active_df[active_df["Year"].between(2020, 2025)].groupby(["Year", "Generation"]).size().reset_index(name="Active")
-            retention_df = pd.merge(total_by_year_gen, active_by_year_gen, on=["Year", "Generation"], how="left")
-            retention_df["RetentionRate"] = (retention_df["Active"] / retention_df["Total"]) * 100
-            
-            # Define generation order (alphabetical)
-            generation_order = ["Baby Boomer", "Gen X", "Gen Z", "Millennial"]
-            
+            retention_df = results.retention_by_generation
+
             # Standardized generation colors - unique blue shades
             generation_colors = {
                 "Gen Z": "#87CEEB",           # Sky Blue
@@ -196,14 +147,12 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
                 "Baby Boomer": "#00008B",     # Dark Blue
                 "Boomer": "#00008B"           # Dark Blue (fallback)
             }
-            
-            # Convert Generation to categorical with defined order
-            retention_df["Generation"] = pd.Categorical(retention_df["Generation"], categories=generation_order, ordered=True)
-            
+
             fig_retention = px.bar(retention_df, x="Year", y="RetentionRate", color="Generation", barmode="group",
                                    text=retention_df["RetentionRate"].round(1).astype(str) + "%",
                                    color_discrete_map=generation_colors,
-                                   category_orders={"Generation": generation_order})
+                                   category_orders={"Generation": GENERATION_ORDER},
+                                   **chart_data.error_bars(retention_df, "RetentionRate"))
             fig_retention.update_layout(
                 height=220, margin=dict(l=20, r=20, t=20, b=20),
                 yaxis=dict(title="Retention Rate (%)", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
@@ -212,7 +161,7 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
                 legend=dict(font=dict(color="var(--text-color)")),
                 uniformtext_minsize=10, uniformtext_mode="hide"
             )
-            st.plotly_chart(fig_retention, use_container_width=True, key="retention_by_generation")
+            chart_data.plotly_chart(fig_retention, use_container_width=True, key="retention_by_generation")
 
     # -----------------------------
     # Row 3: Attrition Analysis
@@ -224,20 +173,10 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
 
         with col1:
             st.markdown(f"##### Attrition by Month ({selected_year})")
-            attrition_selected = df_raw[(df_raw["Year"] == selected_year) & (df_raw["ResignedFlag"] == 1)].copy()
-            attrition_selected["Month"] = pd.to_datetime(attrition_selected["Resignation Date"]).dt.month_name()
-            monthly_attrition = (
-                attrition_selected.groupby("Month")
-                .size()
-                .reindex([
-                    "January", "February", "March", "April", "May", "June",
-                    "July", "August", "September", "October", "November", "December"
-                ])
-                .reset_index(name="AttritionCount")
-            )
+            monthly_attrition = results.monthly_attrition
             fig_monthly = px.bar(
                 monthly_attrition, x="Month", y="AttritionCount", text="AttritionCount",
-                color_discrete_sequence=["#00008B"]
+                color_discrete_sequence=["#00008B"], **chart_data.error_bars(monthly_attrition, "AttritionCount")
             )
             fig_monthly.update_layout(
                 height=300, margin=dict(l=20, r=20, t=20, b=20),
@@ -248,22 +187,18 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
                 uniformtext_minsize=10, uniformtext_mode="hide",
                 showlegend=False
             )
-            st.plotly_chart(fig_monthly, use_container_width=True, key="attrition_by_month")
+            drill_through.chart(fig_monthly, "attrition_by_month", "attrition", "Leavers",
+                                x="Resignation Month", where={"Year": selected_year, "Resignee Checking": "LEAVER"})
 
         with col2:
-            st.markdown("##### Attrition by Voluntary vs Involuntary (2020 – 2025)")
-            if df_attrition is not None:
-                if "Year" not in df_attrition.columns and "Calendar Year" in df_attrition.columns:
-                    df_attrition["Year"] = pd.to_datetime(df_attrition["Calendar Year"]).dt.year
-                attrition_df = df_attrition[
-                    (df_attrition["Year"].between(2020, 2025)) &
-                    (df_attrition["Status"].isin(["Voluntary", "Involuntary"]))
-                ]
-                attrition_counts = attrition_df.groupby(["Year", "Status"]).size().reset_index(name="Count")
+            st.markdown(f"##### Attrition by Voluntary vs Involuntary ({ds.years[0]} – {ds.years[-1]})")
+            attrition_counts = results.attrition_by_type
+            if attrition_counts is not None:
                 # Standardized colors: Voluntary=Associate/Female, Involuntary=Manager&Up/Male
                 fig_attrition = px.bar(
                     attrition_counts, x="Year", y="Count", color="Status", barmode="group", text="Count",
-                    color_discrete_map={"Voluntary": "#6495ED", "Involuntary": "#00008B"}
+                    color_discrete_map={"Voluntary": "#6495ED", "Involuntary": "#00008B"},
+                    **chart_data.error_bars(attrition_counts, "Count")
                 )
                 fig_attrition.update_layout(
                     height=300, margin=dict(l=20, r=20, t=20, b=20),
@@ -273,22 +208,52 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
                     legend=dict(font=dict(color="var(--text-color)")),
                     uniformtext_minsize=10, uniformtext_mode="hide"
                 )
-                st.plotly_chart(fig_attrition, use_container_width=True, key="attrition_by_type")
+                drill_through.chart(fig_attrition, "attrition_by_type", "attrition", "Leavers", x="Year", color="Exit Type")
             else:
                 st.info("No Voluntary/Involuntary attrition dataset provided yet.")
 
+        # Voluntary vs involuntary exits joined to the Data sheet's demographics
+        if ds.attrition is not None:
+            title_col, by_col = st.columns([3, 1])
+            with by_col:
+                exit_by = st.selectbox("Break down by", attrition_metrics.EXIT_BREAKDOWNS, key="attrition_exit_breakdown")
+            with title_col:
+                st.markdown(f"##### Voluntary vs Involuntary by {exit_by} ({selected_year})")
+            exits_df = attrition_metrics.exits_by(ds, exit_by, selected_year)
+            if not exits_df.empty:
+                fig_exits = px.bar(
+                    exits_df, x=exit_by, y="Count", color="Status", barmode="stack",
+                    text=exits_df["Share (%)"].round(0).astype(int).astype(str) + "%",
+                    color_discrete_map={"Voluntary": "#6495ED", "Involuntary": "#00008B"},
+                    category_orders={"Generation": GENERATION_ORDER, "Status": attrition_metrics.EXIT_STATUSES},
+                    hover_data={"Share (%)": ":.1f"}
+                )
+                fig_exits.update_layout(
+                    height=300, margin=dict(l=20, r=20, t=20, b=20),
+                    yaxis=dict(title="Exits", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                    xaxis=dict(title=exit_by, type="category", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                    font=dict(color="var(--text-color)"),
+                    legend=dict(font=dict(color="var(--text-color)")),
+                    uniformtext_minsize=10, uniformtext_mode="hide"
+                )
+                drill_through.chart(fig_exits, "attrition_exits_by_demographic", "attrition", "Leavers",
+                                    x=exit_by, color="Exit Type", where={"Year": selected_year})
+            else:
+                st.info("No voluntary or involuntary exits recorded for the selected year.")
+            unmatched = attrition_metrics.unmatched_exits(ds, selected_year)
+            if unmatched:
+                st.warning(f"{unmatched:,} exits in the attrition file could not be matched to a leaver in the "
+                           f"Data sheet and are left out of this breakdown.")
+
+    drill_through.panel(ds, "attrition")
+
     # -----------------------------
     # Row 4: Net Talent Gain/Loss (already uses Summary tab Net Change)
     # -----------------------------
     with st.container(border=True):
         st.markdown("#### Net Talent Gain/Loss")
 
-        summary_df_row4 = pd.read_excel(summary_file, sheet_name="Summary")
-        net_df = summary_df_row4[["Year", "Joins", "Resignations", "Net Change"]].copy()
-        net_df.rename(columns={"Net Change": "NetChange"}, inplace=True)
-        net_df["Status"] = net_df["NetChange"].apply(lambda x: "Increase" if x > 0 else "Decrease")
-        net_df["Status"] = pd.Categorical(net_df["Status"], categories=["Increase", "Decrease"], ordered=True)
-        net_df["Year"] = net_df["Year"].astype(str)
+        net_df = results.net_change
 
         color_map = {"Increase": "#2E8B57", "Decrease": "#B22222"}
         fig_net = px.bar(
@@ -305,4 +270,92 @@ def render(df, df_raw, selected_year, df_attrition=None, summary_file="HR Cleane
             legend=dict(font=dict(color="var(--text-color)")),
             uniformtext_minsize=10, uniformtext_mode="hide"
         )
-        st.plotly_chart(fig_net, use_container_width=True, key="net_talent_change")
+        chart_data.plotly_chart(fig_net, use_container_width=True, key="net_talent_change")
+
+    # -----------------------------
+    # Row 5: Any date range (answered from monthly prefix sums)
+    # -----------------------------
+    with st.container(border=True):
+        st.markdown("#### Custom Date Range")
+        timeline = timeline_metrics.timeline(ds)
+        month_labels = [f"{month:%b %Y}" for month in timeline.months]
+        segment_options = ["All"] + [
+            f"{column}: {value}" for column in timeline.segments.columns
+            for value in sorted(timeline.segments[column].unique())
+        ]
+
+        range_col, segment_col = st.columns([3, 1])
+        with range_col:
+            start_label, end_label = st.select_slider(
+                "Months", options=month_labels, value=(month_labels[0], month_labels[-1]), key="attrition_range"
+            )
+        with segment_col:
+            segment = st.selectbox("Segment", segment_options, key="attrition_range_segment")
+
+        start = timeline.months[month_labels.index(start_label)]
+        end = timeline.months[month_labels.index(end_label)]
+        where = None if segment == "All" else dict([segment.split(": ", 1)])
+        totals = timeline.totals(start, end, where)
+
+        range_metrics = [
+            ("Joins", f"{totals['Joins']:,}"),
+            ("Resignations", f"{totals['Resignations']:,}"),
+            ("Voluntary / Involuntary", f"{totals['Voluntary']:,} / {totals['Involuntary']:,}"),
+            ("Promotions & Transfers", f"{totals['Promotions & Transfers']:,}"),
+            ("Average Headcount", f"{totals['Average Headcount']:,.0f}"),
+            ("Attrition Rate", f"{totals['Attrition Rate (%)']:.1f}%"),
+        ]
+        for col, (label, value) in zip(st.columns(len(range_metrics)), range_metrics):
+            col.markdown(f"<div class='metric-label'>{label}</div><div class='metric-value'>{value}</div>", unsafe_allow_html=True)
+        if timeline.unmatched_exits:
+            st.warning(f"{timeline.unmatched_exits:,} exits in the attrition file could not be matched to a leaver "
+                       f"in the Data sheet, so Voluntary / Involuntary leave them out.")
+
+        monthly_range = timeline.monthly(start, end, where)
+        fig_range = px.bar(
+            monthly_range, x="Month", y=["Voluntary", "Involuntary"], barmode="stack",
+            color_discrete_map={"Voluntary": "#6495ED", "Involuntary": "#00008B"}
+        )
+        fig_range.update_layout(
+            height=260, margin=dict(l=20, r=20, t=20, b=20),
+            yaxis=dict(title="Resignations", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+            xaxis=dict(title="Month", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+            font=dict(color="var(--text-color)"),
+            legend=dict(title="", font=dict(color="var(--text-color)"))
+        )
+        st.caption("Joins and promotions are dated to the year only and are counted in January.")
+        chart_data.plotly_chart(fig_range, use_container_width=True, key="attrition_date_range")
+
+    # -----------------------------
+    # Row 6: Tenure Survival (Kaplan–Meier)
+    # -----------------------------
+    with st.container(border=True):
+        st.markdown("#### Tenure Survival (Kaplan–Meier)")
+        strata_by = st.selectbox("Compare by", list(survival.STRATA), key="survival_strata")
+        survival_df = survival.curves(ds, strata_by)
+
+        col1, col2 = st.columns([3, 1])
+
+        with col1:
+            fig_survival = px.line(
+                survival_df, x="Years", y="Survival", color="Stratum", line_shape="hv",
+                hover_data={"At Risk": True, "Events": True, "Censored": True},
+                color_discrete_sequence=["#00008B", "#6495ED", "#1E90FF", "#87CEEB", "#4169E1", "#000080", "#B0C4DE"]
+            )
+            fig_survival.update_layout(
+                height=320, margin=dict(l=20, r=20, t=20, b=20),
+                yaxis=dict(title="Share Still Employed", range=[0, 1.02], tickformat=".0%",
+                           tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                xaxis=dict(title="Years Since Joining", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                font=dict(color="var(--text-color)"),
+                legend=dict(font=dict(color="var(--text-color)"))
+            )
+            chart_data.plotly_chart(fig_survival, use_container_width=True, key="tenure_survival")
+
+        with col2:
+            st.markdown("##### Median Time to Resignation")
+            median_df = survival.medians(ds, strata_by).copy()
+            median_df["Median Years"] = median_df["Median Years"].map(
+                lambda x: "Not reached" if pd.isna(x) else f"{x:.1f}"
+            )
+            st.dataframe(median_df, hide_index=True, use_container_width=True)
@@ -0,0 +1,70 @@
+"""Micro-benchmark of the metrics layer, outside Streamlit.
+
+Times each domain's results(ds, year) cold (in-memory cache evicted before
+every repeat) and warm (answered from the cache), per year.
+
+Usage:
+    python bench_metrics.py
+    python bench_metrics.py --years 2024 2025 --repeat 10 --domains attrition career
+"""
+import argparse
+import statistics
+import time
+
+import cache
+import shared_store
+from metrics import attrition, career, survey, workforce
+
+DOMAINS = {
+    "workforce": workforce,
+    "attrition": attrition,
+    "career": career,
+    "survey": survey,
+}
+
+
+def time_ms(fn, repeat, before=None):
+    """Median wall time of fn() in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench(ds, domains, years, repeat=5):
+    """One row per (domain, year) with cold and warm milliseconds"""
+    rows = []
+    for name in domains:
+        module = DOMAINS[name]
+        for year in years:
+            def compute():
+                module.results(ds, year)
+
+            # Persisted results (the survey models) stay on disk, so "cold"
+            # measures a fresh process after prewarm, not a first-ever fit
+            cold = time_ms(compute, repeat, before=lambda: cache.evict(ds.version))
+            warm = time_ms(compute, repeat)
+            rows.append({"domain": name, "year": year, "cold_ms": round(cold, 2), "warm_ms": round(warm, 4)})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the pure metric computations per domain and year.")
+    parser.add_argument("--years", type=int, nargs="+", help="years to time (default: all years in the data)")
+    parser.add_argument("--domains", nargs="+", choices=list(DOMAINS), default=list(DOMAINS))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    ds = shared_store.open_datasets(parallel=True)
+    years = args.years or ds.years
+    print(f"{'domain':<10} {'year':>5} {'cold ms':>9} {'warm ms':>9}")
+    for row in bench(ds, args.domains, years, args.repeat):
+        print(f"{row['domain']:<10} {row['year']:>5} {row['cold_ms']:>9} {row['warm_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
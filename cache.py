@@ -0,0 +1,217 @@
+import collections
+import functools
+import hashlib
+import os
+import pickle
+import threading
+
+# -----------------------------
+# Per-data-version result cache
+# -----------------------------
+# Results are keyed on the data version of the first argument (a Datasets or
+# a DataFrame stamped by data_loader), so nothing has to hash whole frames on
+# every call and a new data version simply misses. Cached values are shared
+# between sessions: treat them as read-only.
+RESULTS_DIR = os.path.join(".cache", "results")
+
+# How many data versions to keep in memory (the live one and the one before)
+MAX_VERSIONS = 2
+
+_memory = {}
+_versions = []
+_lock = threading.RLock()
+# Keys being computed by compute_in_background or prefetch -> Event set when done
+_inflight = {}
+# Key the current thread is computing in the background, if any
+_local = threading.local()
+
+
+def version_of(data):
+    """Data version of a Datasets object or a version-stamped DataFrame"""
+    version = getattr(data, "version", None)
+    if version:
+        return version
+    return getattr(data, "attrs", {}).get("data_version")
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _remember(version):
+    if version in _versions:
+        return
+    _versions.append(version)
+    while len(_versions) > MAX_VERSIONS:
+        evict(_versions.pop(0))
+
+
+def evict(version):
+    """Drop every in-memory result computed for a data version"""
+    with _lock:
+        for key in [key for key in _memory if key[1] == version]:
+            del _memory[key]
+
+
+def cached(fn=None, *, persist=False):
+    """Memoize fn(data, *args) per data version.
+
+    With persist=True results are also pickled under .cache/results/<version>/,
+    so a separate warm-up process (or a server restart) can reuse them.
+    """
+    if fn is None:
+        return functools.partial(cached, persist=persist)
+
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(data, *args, **kwargs):
+        version = version_of(data)
+        if not version:
+            return fn(data, *args, **kwargs)
+        key = (name, version, _freeze(args), _freeze(kwargs))
+        try:
+            return _memory[key]
+        except KeyError:
+            pass
+        # Already being computed in the background: wait for it rather than do it twice
+        done = _inflight.get(key)
+        if done is not None and getattr(_local, "key", None) != key:
+            done.wait()
+            try:
+                return _memory[key]
+            except KeyError:
+                pass
+
+        path = None
+        if persist:
+            arg_hash = hashlib.sha1(repr(key[2:]).encode()).hexdigest()[:12]
+            path = os.path.join(RESULTS_DIR, version, f"{name}-{arg_hash}.pkl")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+                path = None
+            else:
+                value = fn(data, *args, **kwargs)
+        else:
+            value = fn(data, *args, **kwargs)
+
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+        with _lock:
+            _remember(version)
+            _memory[key] = value
+        return value
+
+    wrapper.cache_name = name
+    return wrapper
+
+
+def prime(fn, data, value, *args, **kwargs):
+    """Store an already computed fn(data, *args, **kwargs), e.g. one read from the shared store"""
+    version = version_of(data)
+    with _lock:
+        _remember(version)
+        _memory[(fn.cache_name, version, _freeze(args), _freeze(kwargs))] = value
+
+
+def is_cached(fn, data, *args, **kwargs):
+    """True if fn(data, *args, **kwargs) would be answered from memory"""
+    key = (fn.cache_name, version_of(data), _freeze(args), _freeze(kwargs))
+    return key in _memory
+
+
+def _claim(fn, data, args, kwargs):
+    """The cache key of fn(data, *args, **kwargs), or None if it is cached or already running"""
+    key = (fn.cache_name, version_of(data), _freeze(args), _freeze(kwargs))
+    with _lock:
+        if key in _memory or key in _inflight:
+            return None
+        _inflight[key] = threading.Event()
+    return key
+
+
+def _run(key, fn, data, args, kwargs):
+    _local.key = key
+    try:
+        fn(data, *args, **kwargs)
+    finally:
+        _local.key = None
+        with _lock:
+            _inflight.pop(key).set()
+
+
+def compute_in_background(fn, data, *args, **kwargs):
+    """Compute fn(data, *args, **kwargs) on a daemon thread unless it is cached or already running"""
+    key = _claim(fn, data, args, kwargs)
+    if key is None:
+        return False
+    threading.Thread(target=_run, args=(key, fn, data, args, kwargs), name=f"compute-{fn.cache_name}",
+                     daemon=True).start()
+    return True
+
+
+# -----------------------------
+# Speculative prefetch
+# -----------------------------
+# One low-priority worker computes results a visitor is likely to ask for next
+# (e.g. the years either side of the one on screen). Requests are kept newest
+# first and only the latest few, so a visitor clicking through years never
+# leaves the worker busy with pages nobody is looking at any more.
+PREFETCH_QUEUE = 4
+# Added to the worker thread's niceness (Linux schedules threads separately)
+PREFETCH_NICENESS = 10
+
+_prefetch_jobs = collections.deque(maxlen=PREFETCH_QUEUE)
+_prefetch_ready = threading.Condition(_lock)
+_prefetch_worker = None
+
+
+def _prefetch_loop():
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICENESS)
+    except (AttributeError, OSError):
+        pass
+    while True:
+        with _prefetch_ready:
+            while not _prefetch_jobs:
+                _prefetch_ready.wait()
+            fn, data, args, kwargs = _prefetch_jobs.popleft()
+        key = _claim(fn, data, args, kwargs)
+        if key is not None:
+            try:
+                _run(key, fn, data, args, kwargs)
+            except Exception:
+                # Speculative: the visitor's own request recomputes and reports it
+                pass
+
+
+def prefetch(fn, data, *args, **kwargs):
+    """Queue fn(data, *args, **kwargs) for the low-priority prefetch worker unless it is cached or running"""
+    global _prefetch_worker
+    if is_cached(fn, data, *args, **kwargs):
+        return False
+    with _prefetch_ready:
+        _prefetch_jobs.appendleft((fn, data, args, kwargs))
+        if _prefetch_worker is None:
+            _prefetch_worker = threading.Thread(target=_prefetch_loop, name="prefetch", daemon=True)
+            _prefetch_worker.start()
+        _prefetch_ready.notify()
+    return True
+
+
+def stats():
+    """Number of cached results per data version"""
+    counts = {}
+    for key in list(_memory):
+        counts[key[1]] = counts.get(key[1], 0) + 1
+    return counts
@@ -1,9 +1,13 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import chart_data
+import drill_through
+from metrics import sampling
+from metrics import career as career_metrics
+from metrics import transitions as transition_metrics
 
 
-def render(df, df_raw, selected_year):
+def render(ds, selected_year, approximate=False):
     # -----------------------------
     # Executive Summary at the very top
     # -----------------------------
@@ -31,44 +35,13 @@ def render(df, df_raw, selected_year):
     # -----------------------------
     st.markdown("## 🎯 Career Progression Metrics")
 
-    # Ensure numeric conversion for Promotion & Transfer
-    def to_num(x): 
-        s = str(x).strip().upper() 
-        if s in {"1", "YES", "TRUE"}: 
-            return 1 
-        if s in {"0", "NO", "FALSE"}: 
-            return 0 
-        try: 
-            return float(s) 
-        except: 
-            return pd.NA 
-
-    # Normalize columns
-    df_raw["Promotion & Transfer"] = df_raw["Promotion & Transfer"].apply(to_num)
-    df_raw["Calendar Year"] = pd.to_datetime(df_raw["Calendar Year"], errors="coerce")
-    df_raw["Year"] = df_raw["Calendar Year"].dt.year
-    df_raw["Resignee Checking"] = df_raw["Resignee Checking"].astype(str).str.strip().str.upper()
-
-    # Filter by selected year and active employees
-    career_year = df_raw[
-        (df_raw["Year"] == int(selected_year)) &
-        (df_raw["Resignee Checking"] == "ACTIVE")
-    ]
-
-    if not career_year.empty: 
-        # Count only Promotion & Transfer == 1
-        total_promotions_transfers = int(
-            career_year["Promotion & Transfer"].fillna(0).eq(1).sum()
-        )
-        avg_tenure = pd.to_numeric(career_year["Tenure"], errors="coerce").mean()
-
-        # Promotion Rate KPI (% of active employees promoted/transferred)
-        active_count = len(career_year)
-        promotion_rate = (total_promotions_transfers / active_count * 100) if active_count > 0 else 0
-    else: 
-        total_promotions_transfers = 0 
-        avg_tenure = 0 
-        promotion_rate = 0
+    # Sample estimates until the exact results are ready (approximate mode)
+    results = sampling.results(career_metrics, ds, selected_year, approximate)
+    kpis = results.kpis
+    total_promotions_transfers = kpis["promotions_transfers"]
+    avg_tenure = kpis["average_tenure"]
+    # Promotion Rate KPI (% of active employees promoted/transferred)
+    promotion_rate = kpis["promotion_rate"]
 
     # Top metrics row
     col1, col2, col3 = st.columns(3)
@@ -76,27 +49,24 @@ def render(df, df_raw, selected_year):
     with col1:
         with st.container(border=True):
             st.markdown("<div class='metric-label'>Promotions & Transfers</div>", unsafe_allow_html=True)
-            st.markdown(f"<div class='metric-value'>{total_promotions_transfers}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{total_promotions_transfers}</div>{chart_data.interval_note(results, 'promotions_transfers')}", unsafe_allow_html=True)
     
     with col2:
         with st.container(border=True):
             st.markdown("<div class='metric-label'>Average Tenure</div>", unsafe_allow_html=True)
-            st.markdown(f"<div class='metric-value'>{avg_tenure:.1f} yrs</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{avg_tenure:.1f} yrs</div>{chart_data.interval_note(results, 'average_tenure', '.1f', ' yrs')}", unsafe_allow_html=True)
     
     with col3:
         with st.container(border=True):
             st.markdown("<div class='metric-label'>Promotion Rate</div>", unsafe_allow_html=True)
-            st.markdown(f"<div class='metric-value'>{promotion_rate:.1f}%</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{promotion_rate:.1f}%</div>{chart_data.interval_note(results, 'promotion_rate', '.1f', '%')}", unsafe_allow_html=True)
 
     # Promotion & Transfer Tracking
     with st.container(border=True):
         st.markdown("#### Promotion & Transfer Tracking") 
 
         # Summary by year (active employees only)
-        promo_summary = (
-            df_raw[df_raw["Resignee Checking"] == "ACTIVE"]
-            .groupby("Year", as_index=False)["Promotion & Transfer"].sum()
-        )
+        promo_summary = results.promotions_per_year
 
         # Two charts side by side
         col1, col2 = st.columns(2)
@@ -107,8 +77,9 @@ def render(df, df_raw, selected_year):
             fig1 = px.line(
                 promo_summary,
                 x="Year",
-                y="Promotion & Transfer",
-                markers=True
+                y="Promotions & Transfers",
+                markers=True,
+                **chart_data.error_bars(promo_summary, "Promotions & Transfers")
             )
             fig1.update_traces(line=dict(width=3, color="#00008B"), marker=dict(size=8, color="#00008B"))
             fig1.update_layout(
@@ -117,22 +88,21 @@ def render(df, df_raw, selected_year):
                 xaxis=dict(title="Year", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
                 font=dict(color="var(--text-color)")
             )
-            st.plotly_chart(fig1, use_container_width=True)
+            drill_through.chart(fig1, "promotions_per_year", "career", "Promoted or transferred employees",
+                                x="Year", where={"Resignee Checking": "ACTIVE", "Promotion & Transfer": 1})
 
         with col2:
             # Stacked bar chart for position/level distribution
             st.markdown("##### By Position/Level")
-            pos_summary = (
-                df_raw[df_raw["Resignee Checking"] == "ACTIVE"]
-                .groupby(["Year", "Position/Level"], as_index=False)["Promotion & Transfer"].sum()
-            )
+            pos_summary = results.promotions_by_level
             # Standardized colors: Associate=Female, Manager & Up=Male
             fig2 = px.bar(
                 pos_summary,
                 x="Year",
-                y="Promotion & Transfer",
+                y="Promotions & Transfers",
                 color="Position/Level",
-                color_discrete_map={"Associate": "#6495ED", "Manager & Up": "#00008B"}
+                color_discrete_map={"Associate": "#6495ED", "Manager & Up": "#00008B"},
+                **chart_data.error_bars(pos_summary, "Promotions & Transfers")
             )
             fig2.update_layout(
                 height=250, margin=dict(l=20, r=20, t=20, b=20),
@@ -141,22 +111,23 @@ def render(df, df_raw, selected_year):
                 font=dict(color="var(--text-color)"),
                 legend=dict(font=dict(color="var(--text-color)"))
             )
-            st.plotly_chart(fig2, use_container_width=True)
+            drill_through.chart(fig2, "promotions_by_level", "career", "Promoted or transferred employees",
+                                x="Year", color="Position/Level", where={"Resignee Checking": "ACTIVE", "Promotion & Transfer": 1})
 
     # Tenure Distribution of Promoted Employees
     with st.container(border=True):
         st.markdown(f"#### Tenure Distribution of Promoted Employees ({selected_year})")
-        promoted_employees = career_year[career_year["Promotion & Transfer"] == 1]
+        tenure_bins = results.tenure_bins
 
-        if not promoted_employees.empty:
-            total_promoted = len(promoted_employees)
-            fig3 = px.histogram(
-                promoted_employees,
+        if not tenure_bins.empty:
+            fig3 = px.bar(
+                tenure_bins,
                 x="Tenure",
-                nbins=10,
-                histnorm=None,
-                color_discrete_sequence=["#00008B"]
+                y="Count",
+                color_discrete_sequence=["#00008B"],
+                **chart_data.error_bars(tenure_bins, "Count")
             )
+            fig3.update_layout(bargap=0)
             # Add count + percentage labels
             fig3.update_traces(
                 texttemplate="%{y}",
@@ -169,6 +140,87 @@ def render(df, df_raw, selected_year):
                 font=dict(color="var(--text-color)"),
                 showlegend=False
             )
-            st.plotly_chart(fig3, use_container_width=True)
+            drill_through.chart(fig3, "promoted_tenure_distribution", "career", "Promoted or transferred employees",
+                                x="Tenure", where={"Year": selected_year, "Resignee Checking": "ACTIVE", "Promotion & Transfer": 1})
         else:
             st.info("No promoted employees found for the selected year.")
+
+    drill_through.panel(ds, "career")
+
+    # -----------------------------
+    # Career Paths: year-over-year transitions between levels and resignation
+    # -----------------------------
+    with st.container(border=True):
+        st.markdown("#### Career Paths (Year-over-Year Transitions)")
+        transitions = transition_metrics.transitions(ds)
+
+        if not transitions.years:
+            st.info("At least two years of data are needed to follow employees from one year to the next.")
+            return
+
+        start_options = [state for state in transitions.states if state != transition_metrics.RESIGNED]
+        base_col, start_col, horizon_col = st.columns([2, 1, 1])
+        with base_col:
+            if len(transitions.years) > 1:
+                first, last = st.select_slider(
+                    "Based on moves from", options=transitions.years,
+                    value=(transitions.years[0], transitions.years[-1]), key="career_transition_years"
+                )
+            else:
+                first = last = transitions.years[0]
+        with start_col:
+            start = st.selectbox("Starting as", start_options, key="career_transition_start")
+        with horizon_col:
+            horizon = st.slider("Years ahead", 1, 10, 5, key="career_transition_horizon")
+
+        other_levels = [state for state in start_options if state != start]
+        path_metrics = [
+            (f"Reach {state} within {horizon} yrs", transitions.within(start, state, horizon, first, last))
+            for state in other_levels
+        ] + [
+            (f"Resign within {horizon} yrs", transitions.within(start, transition_metrics.RESIGNED, horizon, first, last)),
+        ]
+        for col, (label, value) in zip(st.columns(len(path_metrics)), path_metrics):
+            col.markdown(f"<div class='metric-label'>{label}</div><div class='metric-value'>{value:.1f}%</div>", unsafe_allow_html=True)
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("##### One-Year Transition Matrix (%)")
+            matrix = transitions.matrix(first, last)
+            fig4 = px.imshow(
+                matrix.round(1),
+                text_auto=True,
+                color_continuous_scale=["#F0F8FF", "#00008B"],
+                zmin=0, zmax=100, aspect="auto"
+            )
+            fig4.update_layout(
+                height=250, margin=dict(l=20, r=20, t=20, b=20),
+                yaxis=dict(title="From", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                xaxis=dict(title="To", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                font=dict(color="var(--text-color)"),
+                coloraxis_showscale=False
+            )
+            chart_data.plotly_chart(fig4, use_container_width=True, name="career_transition_matrix")
+
+        with col2:
+            st.markdown(f"##### Where {start}s Are After N Years (%)")
+            projection = transitions.project(start, horizon, first, last)
+            fig5 = px.line(
+                projection,
+                x="Years Ahead",
+                y=transitions.states,
+                markers=True,
+                color_discrete_map={"Associate": "#6495ED", "Manager & Up": "#00008B", transition_metrics.RESIGNED: "#FF7F7F"}
+            )
+            fig5.update_layout(
+                height=250, margin=dict(l=20, r=20, t=20, b=20),
+                yaxis=dict(title="Share (%)", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                xaxis=dict(title="Years Ahead", dtick=1, tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                font=dict(color="var(--text-color)"),
+                legend=dict(title="", font=dict(color="var(--text-color)"))
+            )
+            chart_data.plotly_chart(fig5, use_container_width=True, name="career_transition_projection")
+
+        st.caption(f"Projected from {transitions.moves(first, last):,} employee-year moves by raising the one-year matrix to the N-th power. "
+                   "Resigned is permanent; employees still active in the last year of data are not counted.")
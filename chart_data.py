@@ -0,0 +1,77 @@
+import logging
+
+import pandas as pd
+import streamlit as st
+
+# -----------------------------
+# Chart data layer
+# -----------------------------
+# Charts are fed pre-aggregated series instead of raw rows, so the figure
+# payload sent over the websocket stays small no matter how large the
+# underlying extract grows.
+logger = logging.getLogger(__name__)
+
+# Scatter plots with more points than this are drawn with WebGL (scattergl)
+WEBGL_THRESHOLD = 1000
+
+# Serialized figure size (bytes) of the last render of each chart, recorded in debug mode only
+PAYLOAD_BYTES = {}
+
+
+def scatter(df, x, y, **kwargs):
+    """px.scatter that switches to WebGL traces above WEBGL_THRESHOLD points"""
+    import plotly.express as px
+
+    render_mode = "webgl" if len(df) > WEBGL_THRESHOLD else "svg"
+    return px.scatter(df, x=x, y=y, render_mode=render_mode, **kwargs)
+
+
+def payload_bytes(fig):
+    """Size in bytes of the figure spec Streamlit sends to the browser"""
+    return len(fig.to_json().encode("utf-8"))
+
+
+def debug_enabled():
+    """True when the page was opened with ?debug=1"""
+    return st.query_params.get("debug") == "1"
+
+
+def plotly_chart(fig, use_container_width=True, key=None, name=None, **kwargs):
+    """Drop-in for st.plotly_chart that records the payload size of each chart in debug mode"""
+    if debug_enabled():
+        name = name or key or "unnamed"
+        PAYLOAD_BYTES[name] = payload_bytes(fig)
+        logger.debug("chart %s payload %d bytes", name, PAYLOAD_BYTES[name])
+    return st.plotly_chart(fig, use_container_width=use_container_width, key=key, **kwargs)
+
+
+def payload_report():
+    """Payload bytes per chart from the most recent renders, largest first"""
+    return (
+        pd.DataFrame(list(PAYLOAD_BYTES.items()), columns=["Chart", "Bytes"])
+        .sort_values("Bytes", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+# -----------------------------
+# Approximate results (metrics.sampling): 95% intervals on cards and charts
+# -----------------------------
+def error_bars(frame, y):
+    """px keyword arguments drawing `y`'s interval as error bars, if the series carries one"""
+    low, high = f"{y} Low", f"{y} High"
+    if low not in frame.columns:
+        return {}
+    return {
+        "error_y": frame[high] - frame[y],
+        "error_y_minus": frame[y] - frame[low],
+        "hover_data": {low: True, high: True},
+    }
+
+
+def interval_note(results, kpi, fmt=",.0f", suffix=""):
+    """Small '95% CI low – high' line under an estimated KPI card; empty for exact results"""
+    if kpi not in results.intervals:
+        return ""
+    low, high = results.intervals[kpi]
+    return f"<div class='metric-label' title='Estimated from a stratified sample'>≈ 95% CI {low:{fmt}}{suffix} – {high:{fmt}}{suffix}</div>"
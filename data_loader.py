@@ -0,0 +1,229 @@
+import argparse
+import glob
+import hashlib
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import schema
+from assets import file_hash
+
+# -----------------------------
+# Source workbooks
+# -----------------------------
+OUTPUT_FILE = "HR_Analysis_Output.xlsx"
+RAW_FILE = "HR Cleaned Data 01.09.26.xlsx"
+# HR drops a new dated extract each time; the newest one is used
+RAW_PATTERN = "HR Cleaned Data *.xlsx"
+ATTRITION_FILE = "Attrition-Vol and Invol.xlsx"
+ENGAGEMENT_FILE = "Emp Engagement.xlsx"
+PARTICIPATION_FILE = "Participation.xlsx"
+
+
+# Prepared datasets are pickled here per data version so restarts and
+# warm-up runs skip Excel parsing
+DATA_CACHE_DIR = os.path.join(".cache", "data")
+# Bump when loading or validation changes, so stale pickles are not reused
+CACHE_REVISION = 2
+
+# Columns of the Data sheet that KPIs can be sliced by
+SLICE_COLUMNS = ["Position/Level", "Gender", "Generation"]
+
+
+@dataclass
+class Datasets:
+    """All prepared source data the dashboard needs, tagged with a data version"""
+    output: dict
+    raw: pd.DataFrame
+    attrition: pd.DataFrame
+    summary: pd.DataFrame
+    engagement: pd.DataFrame
+    participation: pd.DataFrame
+    version: str = ""
+    source_files: list = field(default_factory=list)
+
+    @property
+    def years(self):
+        return sorted(int(y) for y in self.raw["Year"].dropna().unique())
+
+    def frames(self):
+        """Yield (name, DataFrame) for every frame, including each output sheet"""
+        for name, sheet in self.output.items():
+            yield f"output/{name}", sheet
+        for name in ("raw", "attrition", "summary", "engagement", "participation"):
+            yield name, getattr(self, name)
+
+
+def raw_file():
+    """Most recently modified workbook matching RAW_PATTERN"""
+    matches = glob.glob(RAW_PATTERN)
+    return max(matches, key=os.path.getmtime) if matches else RAW_FILE
+
+
+def source_files():
+    return [OUTPUT_FILE, raw_file(), ATTRITION_FILE, ENGAGEMENT_FILE, PARTICIPATION_FILE]
+
+
+def data_version(paths=None):
+    """Hash of the source workbooks' contents; changes whenever any of them changes"""
+    paths = paths or source_files()
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            digest.update(f"{os.path.basename(path)}:{file_hash(path)}".encode())
+    return digest.hexdigest()[:16]
+
+
+# -----------------------------
+# Derived columns (types are already guaranteed by schema.py)
+# -----------------------------
+def add_year(frame, source="Calendar Year"):
+    frame["Year"] = frame[source].dt.year
+    return frame
+
+
+def prepare_raw(df_raw):
+    add_year(df_raw)
+    df_raw["ResignedFlag"] = (df_raw["Resignee Checking"] != "ACTIVE").astype(int)
+    df_raw["Retention"] = 1 - df_raw["ResignedFlag"]
+    return df_raw
+
+
+def stamp_version(ds):
+    for _, frame in ds.frames():
+        frame.attrs["data_version"] = ds.version
+    return ds
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+# Each task parses one sheet, validates it against its schema and runs its
+# prepare step, so independent sheets (including every sheet of
+# HR_Analysis_Output.xlsx) can be parsed in parallel.
+def load_tasks(raw_path=None):
+    """Return (key, path, sheet, schema, prepare) for every sheet the dashboard reads, the Data sheet (the largest) first"""
+    raw_path = raw_path or raw_file()
+    tasks = [
+        ("raw", raw_path, "Data", schema.RAW, prepare_raw),
+        ("attrition", ATTRITION_FILE, 0, schema.ATTRITION, add_year),
+        ("summary", raw_path, "Summary", schema.SUMMARY, None),
+        ("engagement", ENGAGEMENT_FILE, "Sheet1", schema.ENGAGEMENT, add_year),
+        ("participation", PARTICIPATION_FILE, "Sheet1", schema.PARTICIPATION, add_year),
+    ]
+    with pd.ExcelFile(OUTPUT_FILE) as workbook:
+        tasks += [
+            (f"output/{name}", OUTPUT_FILE, name, schema.OUTPUT.get(name), None)
+            for name in workbook.sheet_names
+        ]
+    return tasks
+
+
+def _read_task(task):
+    """Returns (key, frame, problems); problems are reported together once every sheet is read"""
+    key, path, sheet, sheet_schema, prepare = task
+    frame = pd.read_excel(path, sheet_name=sheet)
+    problems = []
+    if sheet_schema is not None:
+        frame, problems = schema.check(frame, sheet_schema)
+    if prepare and not problems:
+        frame = prepare(frame)
+    return key, frame, problems
+
+
+def read_sheets(tasks):
+    """{task key: frame} for tasks read one after another, raising SchemaError with every problem found"""
+    results = list(map(_read_task, tasks))
+    problems = [problem for _, _, sheet_problems in results for problem in sheet_problems]
+    if problems:
+        raise schema.SchemaError(problems)
+    return {key: frame for key, frame, _ in results}
+
+
+def assemble(frames, version, files):
+    """Build a Datasets from {task key: frame}"""
+    ds = Datasets(
+        output={key.split("/", 1)[1]: frame for key, frame in frames.items() if key.startswith("output/")},
+        raw=frames["raw"],
+        attrition=frames["attrition"],
+        summary=frames["summary"],
+        engagement=frames["engagement"],
+        participation=frames["participation"],
+        version=version,
+        source_files=list(files),
+    )
+    return stamp_version(ds)
+
+
+def cache_path(version):
+    return os.path.join(DATA_CACHE_DIR, f"{version}-r{CACHE_REVISION}.pkl")
+
+
+def load_datasets(parallel=False, workers=None, use_cache=True):
+    """Read, validate and prepare every source workbook.
+
+    With parallel=True sheets are parsed concurrently in a process pool of
+    freshly spawned interpreters; only the command-line tools turn it on,
+    never the (multi-threaded) dashboard server.
+
+    With use_cache the prepared datasets are read from (or written to) the
+    on-disk pickle for the current data version.
+    """
+    files = source_files()
+    version = data_version(files)
+    path = cache_path(version)
+    if use_cache and os.path.exists(path):
+        with open(path, "rb") as f:
+            return stamp_version(pickle.load(f))
+
+    tasks = load_tasks(files[1])
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if parallel and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_read_task, tasks))
+    else:
+        results = list(map(_read_task, tasks))
+    problems = [problem for _, _, sheet_problems in results for problem in sheet_problems]
+    if problems:
+        raise schema.SchemaError(problems)
+    ds = assemble({key: frame for key, frame, _ in results}, version, files)
+
+    if use_cache:
+        os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(ds, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        # Only the current version is worth keeping on disk
+        for name in os.listdir(DATA_CACHE_DIR):
+            if name.endswith(".pkl") and name != os.path.basename(path):
+                os.remove(os.path.join(DATA_CACHE_DIR, name))
+    return ds
+
+
+def compare_load_times(workers=None):
+    """Time the serial and process-pool load paths; returns (serial_s, parallel_s)"""
+    start = time.perf_counter()
+    load_datasets(parallel=False, use_cache=False)
+    serial = time.perf_counter() - start
+    start = time.perf_counter()
+    load_datasets(parallel=True, workers=workers, use_cache=False)
+    parallel = time.perf_counter() - start
+    return serial, parallel
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare serial and parallel workbook loading.")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    workers = min(args.workers or os.cpu_count() or 1, len(load_tasks()))
+    print(f"Loading {len(source_files())} workbooks ({len(load_tasks())} sheets)")
+    serial, parallel = compare_load_times(args.workers)
+    print(f"serial:   {serial:.2f}s")
+    print(f"parallel: {parallel:.2f}s ({workers} workers)")
+    print(f"speedup:  {serial / parallel:.2f}x")
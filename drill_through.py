@@ -0,0 +1,96 @@
+import functools
+import streamlit as st
+import chart_data
+from metrics import drill as drill_metrics
+
+# -----------------------------
+# Click-to-drill charts and the paged table of the rows behind them
+# -----------------------------
+# A click on a bar stores its segment ({dimension: value}) for the tab; the
+# tab's drill-through panel then asks metrics.drill for one sorted page at a
+# time, so only that page is ever sent to the browser.
+
+
+def chart(fig, key, tab, title, x=None, color=None, where=None):
+    """chart_data.plotly_chart where clicking a bar lists the employees behind it
+
+    x and color name the drill dimensions of the x axis and of the color
+    legend; where holds the filters every bar shares (e.g. the selected year).
+    """
+    traces = [trace.name for trace in fig.data]
+    select = functools.partial(_select, key, tab, title, traces, x, color, where or {})
+    return chart_data.plotly_chart(fig, use_container_width=True, key=key, on_select=select, selection_mode="points")
+
+
+def _select(key, tab, title, traces, x, color, where):
+    points = st.session_state[key]["selection"]["points"]
+    if not points:
+        return
+    point = points[0]
+    segment = dict(where)
+    if x:
+        segment[x] = point["x"]
+    if color:
+        segment[color] = point.get("legendgroup") or traces[point["curve_number"]]
+    st.session_state[f"drill_{tab}"] = {"title": title, "segment": segment}
+    _first_page(tab)
+
+
+def _first_page(tab):
+    # After-cursors of the pages visited so far; the last one is on screen
+    st.session_state[f"drill_{tab}_pages"] = [None]
+
+
+def _clear(tab):
+    st.session_state.pop(f"drill_{tab}", None)
+
+
+def panel(ds, tab):
+    """The rows behind the tab's last clicked bar, one sorted page at a time"""
+    with st.container(border=True):
+        st.markdown("#### Drill-through")
+        state = st.session_state.get(f"drill_{tab}")
+        if not state:
+            st.caption("Click a bar in the charts above to list the employees behind it.")
+            return
+
+        segment = drill_metrics.row_index(ds).normalize(state["segment"])
+        title_col, clear_col = st.columns([5, 1])
+        with title_col:
+            filters = " · ".join(f"{dimension}: {value}" for dimension, value in segment.items())
+            st.markdown(f"##### {state['title']}")
+            st.caption(filters)
+        with clear_col:
+            st.button("Clear", key=f"drill_{tab}_clear", on_click=_clear, args=(tab,), use_container_width=True)
+
+        sort_col, order_col = st.columns([3, 1])
+        with sort_col:
+            sort = st.selectbox("Sort by", drill_metrics.SORT_COLUMNS, key=f"drill_{tab}_sort",
+                                on_change=_first_page, args=(tab,))
+        with order_col:
+            descending = st.toggle("Descending", key=f"drill_{tab}_descending", on_change=_first_page, args=(tab,))
+
+        pages = st.session_state.setdefault(f"drill_{tab}_pages", [None])
+        page = drill_metrics.page(ds, segment, sort, descending, after=pages[-1])
+        st.dataframe(
+            page.rows, hide_index=True, use_container_width=True,
+            column_config={
+                "Year": st.column_config.NumberColumn(format="%d"),
+                "Year Joined": st.column_config.DateColumn(format="YYYY"),
+                "Resignation Date": st.column_config.DateColumn(format="MMM D, YYYY"),
+            }
+        )
+
+        first = (len(pages) - 1) * drill_metrics.PAGE_SIZE
+        previous_col, range_col, next_col = st.columns([1, 3, 1])
+        with previous_col:
+            st.button("← Previous", key=f"drill_{tab}_previous", disabled=len(pages) == 1,
+                      on_click=pages.pop, use_container_width=True)
+        with range_col:
+            if page.total:
+                st.caption(f"Rows {first + 1:,}–{first + len(page.rows):,} of {page.total:,}")
+            else:
+                st.caption("No employees in this segment.")
+        with next_col:
+            st.button("Next →", key=f"drill_{tab}_next", disabled=not page.has_more,
+                      on_click=pages.append, args=(page.cursor,), use_container_width=True)
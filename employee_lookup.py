@@ -0,0 +1,87 @@
+import streamlit as st
+import plotly.express as px
+import chart_data
+from metrics import search as search_metrics
+from schema import SCORE_COLUMNS
+
+
+def render(ds):
+    st.markdown("## 🔎 Employee Lookup")
+    index = search_metrics.name_index(ds)
+
+    query = st.text_input(
+        "Search by name", key="employee_search", placeholder="e.g. Buenaventura, ian buen, ventura",
+        help="Matches the start of any part of the name first, then any part of it; case and accents are ignored"
+    )
+    if not query.strip():
+        st.caption(f"{len(index.names):,} employees in the Data sheet. Type part of a name and press Enter.")
+        return
+
+    matches = index.search(query, limit=20)
+    if not matches:
+        st.info(f'No employee name matches "{query}".')
+        return
+
+    def label(person):
+        history = index.history(ds, person)
+        first, last = history["Year"].iloc[0], history["Year"].iloc[-1]
+        years = f"{first}" if first == last else f"{first}–{last}"
+        return f"{index.names[person]} — {history['Position/Level'].iloc[-1]}, {years}"
+
+    person = st.selectbox(f"{len(matches)} match{'es' if len(matches) > 1 else ''}", matches,
+                          format_func=label, key="employee_search_result")
+    history = index.history(ds, person)
+    latest = history.iloc[-1]
+    resigned = latest["Resignee Checking"] == "LEAVER"
+
+    # -----------------------------
+    # Summary cards
+    # -----------------------------
+    cards = [
+        ("Position/Level", latest["Position/Level"]),
+        ("Status", f"Resigned {latest['Resignation Date']:%b %Y}" if resigned else "Active"),
+        ("Tenure", f"{latest['Tenure']} yrs"),
+        ("Promotions & Transfers", f"{int(history['Promotion & Transfer'].sum())}"),
+        ("Survey Average", f"{latest['Survey Average']:.1f} / 5"),
+    ]
+    for col, (name, value) in zip(st.columns(len(cards)), cards):
+        with col:
+            with st.container(border=True):
+                st.markdown(f"<div class='metric-label'>{name}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div class='metric-value'>{value}</div>", unsafe_allow_html=True)
+
+    # -----------------------------
+    # Year-by-year history
+    # -----------------------------
+    with st.container(border=True):
+        st.markdown(f"#### {index.names[person]}: Year by Year")
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown("##### Survey Average")
+            fig = px.line(history, x="Year", y="Survey Average", markers=True)
+            fig.update_traces(line=dict(width=3, color="#00008B"), marker=dict(size=8, color="#00008B"))
+            fig.update_layout(
+                height=250, margin=dict(l=20, r=20, t=20, b=20),
+                yaxis=dict(title="Score (1–5)", range=[1, 5], tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                xaxis=dict(title="Year", dtick=1, tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                font=dict(color="var(--text-color)")
+            )
+            chart_data.plotly_chart(fig, use_container_width=True, name="employee_survey_history")
+
+        with col2:
+            st.markdown("##### Level, Tenure and Promotions")
+            st.dataframe(
+                history.drop(columns=SCORE_COLUMNS).assign(**{
+                    "Promotion & Transfer": history["Promotion & Transfer"].map({1: "Yes", 0: ""}),
+                    "Resignation Date": history["Resignation Date"].dt.strftime("%b %d, %Y"),
+                }),
+                hide_index=True, use_container_width=True,
+                column_config={"Year": st.column_config.NumberColumn(format="%d"),
+                               "Survey Average": st.column_config.NumberColumn(format="%.1f")}
+            )
+
+        st.markdown("##### Survey Scores by Dimension")
+        st.dataframe(history[["Year"] + SCORE_COLUMNS], hide_index=True, use_container_width=True,
+                     column_config={"Year": st.column_config.NumberColumn(format="%d")})
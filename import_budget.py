@@ -0,0 +1,103 @@
+"""Cold-start import-time benchmark for web_app.py, checked against import_budget.json.
+
+The budget is a ratio to a bare `import streamlit` measured in the same run, so
+it holds on fast and slow machines alike.
+
+Usage:
+    python import_budget.py            # measure; exit 1 if over budget or a deferred module loaded
+    python import_budget.py --update   # re-baseline the budget from the current measurement
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+
+APP = "web_app.py"
+BUDGET_FILE = "import_budget.json"
+# What the app's import time is measured against
+BASELINE = ["streamlit"]
+# Headroom applied to the ratio when re-baselining with --update
+HEADROOM = 1.5
+
+
+def startup_modules(path=APP):
+    """Modules web_app.py imports at module level, i.e. on every cold start"""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return modules
+
+
+def measure(modules):
+    """Run `python -X importtime` in a fresh interpreter; return (total_ms, imported names)"""
+    code = "import " + ", ".join(modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True
+    )
+    total_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        imported.add(name.strip())
+    return total_us / 1000, imported
+
+
+def check(budget, runs=3):
+    modules = startup_modules()
+    # Best of several interleaved runs to keep filesystem-cache and machine noise out of the result
+    samples, baselines = [], []
+    for _ in range(runs):
+        samples.append(measure(modules))
+        baselines.append(measure(BASELINE)[0])
+    total_ms, baseline_ms = min(ms for ms, _ in samples), min(baselines)
+    imported = samples[0][1]
+
+    failures = []
+    if total_ms > budget["max_ratio"] * baseline_ms:
+        failures.append(f"cold-start imports took {total_ms:.0f} ms, {total_ms / baseline_ms:.2f}x "
+                        f"`import streamlit` ({baseline_ms:.0f} ms); budget is {budget['max_ratio']}x")
+    for name in budget["deferred"]:
+        if any(m == name or m.startswith(name + ".") for m in imported):
+            failures.append(f"{name} is imported at startup but must be deferred to the tab that uses it")
+    return total_ms, baseline_ms, modules, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check web_app.py cold-start import time against the budget.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--update", action="store_true", help="rewrite the budget from this measurement")
+    args = parser.parse_args(argv)
+
+    with open(BUDGET_FILE) as f:
+        budget = json.load(f)
+    total_ms, baseline_ms, modules, failures = check(budget, args.runs)
+    ratio = total_ms / baseline_ms
+    print(f"startup imports: {', '.join(modules)}")
+    print(f"cold-start import time: {total_ms:.0f} ms, {ratio:.2f}x `import streamlit` ({baseline_ms:.0f} ms); "
+          f"budget {budget['max_ratio']}x")
+
+    if args.update:
+        budget["max_ratio"] = round(ratio * HEADROOM, 2)
+        with open(BUDGET_FILE, "w") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"budget updated to {budget['max_ratio']}x")
+        return 0
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""Read-only JSON API for the dashboard's KPIs and chart series.
+
+Usage:
+    python kpi_api.py --port 8503
+
+    GET /years
+    GET /kpis?year=2024[&slice=Gender:Female]       (slices apply to attrition and career)
+    GET /series/<name>[?slice=Position/Level:Associate&by=Generation]
+    GET /range?start=2021-03&end=2023-06[&slice=Gender:Female]
+
+Every response carries an ETag derived from the data version and the request,
+so clients polling with If-None-Match get an empty 304 until the data changes.
+"""
+import argparse
+import hashlib
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import data_loader
+import shared_store
+import watcher
+from metrics import apply_slice, attrition, career, survey, survival, timeline, workforce
+
+logger = logging.getLogger(__name__)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_slice(values):
+    """["Gender:Female", ...] -> {"Gender": "Female"}; only data_loader.SLICE_COLUMNS are allowed"""
+    where = {}
+    for value in values:
+        column, sep, member = value.partition(":")
+        if not sep or column not in data_loader.SLICE_COLUMNS:
+            raise BadRequest(f"slice must be <column>:<value> with column in {data_loader.SLICE_COLUMNS}")
+        where[column] = member
+    return where or None
+
+
+# -----------------------------
+# Series (one row per point, as the tabs chart them)
+# -----------------------------
+def headcount_series(ds, where, params):
+    facts = apply_slice(career.promotion_facts(ds), where)
+    return facts.groupby(["Year", "Position/Level"], as_index=False)["Active"].sum()
+
+
+def promotions_series(ds, where, params):
+    facts = apply_slice(career.promotion_facts(ds), where)
+    return facts.groupby("Year", as_index=False)[["Promotions & Transfers", "Active"]].sum()
+
+
+def retention_series(ds, where, params):
+    raw = apply_slice(ds.raw, where)
+    out = raw.groupby("Year").agg(Employees=("Retention", "size"), Resigned=("ResignedFlag", "sum"),
+                                  RetentionRate=("Retention", "mean"))
+    out["RetentionRate"] *= 100
+    return out.reset_index()
+
+
+def net_change_series(ds, where, params):
+    if where:
+        raise BadRequest("net_change is only published company-wide")
+    return ds.summary[["Year", "Joins", "Resignations", "Net Change"]]
+
+
+def engagement_series(ds, where, params):
+    if where:
+        raise BadRequest("engagement is only published company-wide")
+    return [{"Year": year, "EngagementScore": survey.kpis(ds, year)["engagement_score"]} for year in ds.years]
+
+
+def survival_series(ds, where, params):
+    if where:
+        raise BadRequest("survival curves are stratified with ?by=, not sliced")
+    by = params.get("by", ["All"])[0]
+    if by not in survival.STRATA:
+        raise BadRequest(f"by must be one of {list(survival.STRATA)}")
+    return survival.curves(ds, by)
+
+
+SERIES = {
+    "headcount": headcount_series,
+    "promotions": promotions_series,
+    "retention": retention_series,
+    "net_change": net_change_series,
+    "engagement": engagement_series,
+    "survival": survival_series,
+}
+
+
+def kpis_payload(ds, params):
+    try:
+        year = int(params["year"][0])
+    except (KeyError, ValueError):
+        raise BadRequest("year is required, e.g. /kpis?year=2024")
+    if year not in ds.years:
+        raise BadRequest(f"year must be one of {ds.years}")
+    where = parse_slice(params.get("slice", []))
+    payload = {
+        "year": year,
+        "slice": where,
+        "attrition": attrition.kpis(ds, year, where),
+        "career": career.kpis(ds, year, where),
+    }
+    if not where:
+        payload["workforce"] = workforce.kpis(ds, year)
+        payload["survey"] = survey.kpis(ds, year)
+    return payload
+
+
+def range_payload(ds, params):
+    try:
+        start, end = params["start"][0], params["end"][0]
+    except KeyError:
+        raise BadRequest("start and end are required, e.g. /range?start=2021-03&end=2023-06")
+    where = parse_slice(params.get("slice", []))
+    months = timeline.timeline(ds)
+    try:
+        totals = months.totals(start, end, where)
+    except ValueError as exc:
+        raise BadRequest(str(exc))
+    return {"start": start, "end": end, "slice": where, "totals": totals, "unmatched_exits": months.unmatched_exits}
+
+
+def years_payload(ds, params):
+    return {"years": ds.years, "slices": data_loader.SLICE_COLUMNS}
+
+
+def series_payload(name):
+    def payload(ds, params):
+        rows = SERIES[name](ds, parse_slice(params.get("slice", [])), params)
+        if hasattr(rows, "to_dict"):
+            rows = rows.to_dict(orient="records")
+        return {"series": name, "rows": rows}
+    return payload
+
+
+ENDPOINTS = {
+    "/years": years_payload,
+    "/kpis": kpis_payload,
+    "/range": range_payload,
+}
+
+
+def resolve(path):
+    """The payload function (ds, params) -> JSON-able body for a GET path, or None for an unknown path"""
+    if path in ENDPOINTS:
+        return ENDPOINTS[path]
+    name = path[len("/series/"):] if path.startswith("/series/") else None
+    return series_payload(name) if name in SERIES else None
+
+
+def _json_default(value):
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+# -----------------------------
+# HTTP
+# -----------------------------
+class KpiHandler(BaseHTTPRequestHandler):
+    store = None
+
+    def do_GET(self):
+        ds = self.store.current()
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        payload = resolve(url.path)
+        if payload is None:
+            self.send_json(404, {"error": f"unknown endpoint {url.path}"})
+            return
+
+        # Same data version + same request = same body, so the ETag is known before computing anything
+        request_key = f"{url.path}?{sorted(params.items())}"
+        etag = '"{}-{}"'.format(ds.version, hashlib.sha1(request_key.encode()).hexdigest()[:12])
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        try:
+            body = payload(ds, params)
+        except BadRequest as exc:
+            self.send_json(400, {"error": str(exc)})
+            return
+        except Exception:
+            logger.exception("GET %s failed", self.path)
+            self.send_json(500, {"error": "internal error"})
+            return
+        self.send_json(200, {"data_version": ds.version, **body}, etag)
+
+    def send_json(self, status, body, etag=None):
+        data = json.dumps(body, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if etag:
+            self.send_header("ETag", etag)
+            # Clients may keep the body but must revalidate before reusing it
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host="127.0.0.1", store=None):
+    KpiHandler.store = store or watcher.start(shared_store.open_datasets(), warm=False)
+    server = ThreadingHTTPServer((host, port), KpiHandler)
+    print(f"KPI API on http://{host}:{port} (data version {KpiHandler.store.current().version})")
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve dashboard KPIs and chart series as JSON.")
+    parser.add_argument("--port", type=int, default=8503)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args(argv)
+    serve(args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Headless KPI report: the dashboard's numbers for every year and slice, without Streamlit.
+
+Usage:
+    python kpi_report.py                         # all years, JSON + CSV into reports/
+    python kpi_report.py --years 2024 2025 --formats json parquet --workers 4
+    python kpi_report.py --streaming --chunk-rows 50000  # Data sheet streamed in chunks, not held in memory
+    python kpi_report.py --streaming --verify            # ...and check it matches the in-memory numbers
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import data_loader
+from metrics import attrition, career, streaming, survey, workforce
+
+FORMATS = ("json", "csv", "parquet")
+
+# Set in each worker process by _init_worker so the datasets are pickled once per worker
+_datasets = None
+
+
+def _init_worker(ds):
+    global _datasets
+    _datasets = ds
+
+
+def slices(ds):
+    """("All", None) followed by one (column, value) per value of each slice column"""
+    yield "All", "All", None
+    for column in data_loader.SLICE_COLUMNS:
+        values = ds.slice_values(column) if isinstance(ds, streaming.Aggregates) else ds.raw[column].dropna().unique()
+        for value in sorted(values):
+            yield column, value, {column: value}
+
+
+def kpi_functions(ds):
+    """The workforce, survey, attrition and career kpis functions for a Datasets or streaming Aggregates"""
+    if isinstance(ds, streaming.Aggregates):
+        return streaming.workforce_kpis, streaming.survey_kpis, streaming.attrition_kpis, streaming.career_kpis
+    return workforce.kpis, survey.kpis, attrition.kpis, career.kpis
+
+
+def year_rows(ds, year):
+    """Long-format KPI rows (domain, year, slice, value, metric, value) for one year"""
+    rows = []
+
+    def add(domain, slice_column, slice_value, kpis):
+        for metric, value in kpis.items():
+            if value is None:
+                continue
+            rows.append({
+                "Domain": domain,
+                "Year": year,
+                "Slice": slice_column,
+                "Slice Value": slice_value,
+                "Metric": metric,
+                "Value": value.item() if hasattr(value, "item") else value,
+            })
+
+    workforce_kpis, survey_kpis, attrition_kpis, career_kpis = kpi_functions(ds)
+    add("workforce", "All", "All", workforce_kpis(ds, year))
+    add("survey", "All", "All", survey_kpis(ds, year))
+    for slice_column, slice_value, where in slices(ds):
+        add("attrition", slice_column, slice_value, attrition_kpis(ds, year, where))
+        add("career", slice_column, slice_value, career_kpis(ds, year, where))
+    return rows
+
+
+def _year_rows_task(year):
+    return year_rows(_datasets, year)
+
+
+def build_report(ds, years=None, workers=None):
+    years = years or ds.years
+    if workers == 1:
+        results = [year_rows(ds, year) for year in years]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(ds,)) as pool:
+            results = list(pool.map(_year_rows_task, years))
+    return pd.DataFrame([row for rows in results for row in rows])
+
+
+def write_report(report, output_dir, formats, version):
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"kpis.{fmt}")
+        if fmt == "json":
+            with open(path, "w") as f:
+                json.dump({"data_version": version, "kpis": report.to_dict(orient="records")}, f, indent=2, default=str)
+        elif fmt == "csv":
+            report.to_csv(path, index=False)
+        elif fmt == "parquet":
+            # Mixed text/number values are stored as text in Parquet
+            report.astype({"Value": str, "Slice Value": str}).to_parquet(path, index=False)
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute dashboard KPIs for all years and slices.")
+    parser.add_argument("--years", type=int, nargs="+", help="years to report (default: all years in the data)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["json", "csv"])
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count, 1 = serial)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="aggregate the Data sheet and attrition file chunk by chunk instead of loading them whole")
+    parser.add_argument("--chunk-rows", type=int, default=streaming.CHUNK_ROWS, help="rows per chunk with --streaming")
+    parser.add_argument("--verify", action="store_true",
+                        help="with --streaming, also load the data in memory and check every KPI and tab series match")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    ds = streaming.aggregate(args.chunk_rows) if args.streaming else data_loader.load_datasets(parallel=True)
+    loaded = time.perf_counter()
+    report = build_report(ds, args.years, args.workers)
+    paths = write_report(report, args.output_dir, args.formats, ds.version)
+    done = time.perf_counter()
+
+    print(f"Data version {ds.version}: {len(report)} KPI values for years {sorted(int(y) for y in report['Year'].unique())}")
+    print(f"Load {loaded - start:.2f}s, compute {done - loaded:.2f}s")
+    for path in paths:
+        print(f"  wrote {path}")
+
+    if args.streaming and args.verify:
+        in_memory = data_loader.load_datasets(parallel=True)
+        differences = streaming.differences(in_memory, ds, args.years)
+        expected = build_report(in_memory, args.years, args.workers)
+        if not report.equals(expected):
+            differences.append("KPI report differs from the in-memory report")
+        for difference in differences:
+            print(f"  MISMATCH {difference}")
+        print(f"Streaming results {'differ' if differences else 'match the in-memory path'} "
+              f"({ds.rows:,} Data sheet rows in chunks of {args.chunk_rows:,})")
+        if differences:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
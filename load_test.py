@@ -0,0 +1,279 @@
+"""Concurrent-session load test for web_app.py.
+
+Starts the app on a local port (or targets --url), opens N websocket sessions
+that speak Streamlit's own protocol (BackMsg / ForwardMsg protobufs on
+/_stcore/stream), and has each one switch tabs and years and search the
+Employee Lookup with random think times. Reports rerun latency percentiles plus server CPU and RSS for every
+session count, i.e. a capacity curve.
+
+Usage:
+    python load_test.py --sessions 1 2 4 8 16 --duration 60
+    python load_test.py --url http://localhost:8501 --sessions 10 --think 2 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+try:
+    import websockets
+except ImportError:  # shipped with Streamlit's starlette server, but not with older releases
+    websockets = None
+
+TAB_KEYS = ["tab_0", "tab_1", "tab_2", "tab_3", "tab_4"]
+# Employee Lookup search box and the partial names sessions type into it
+SEARCH_KEY = "employee_search"
+SEARCH_QUERIES = ["ian", "buen", "ventura", "ian buen", "ma", "santos", "reyes", "an"]
+# ForwardMsg.script_finished values that end a rerun (not FINISHED_EARLY_FOR_RERUN)
+FINISHED = {0, 3}
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+# -----------------------------
+# Server process
+# -----------------------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port, script="web_app.py"):
+    command = [
+        sys.executable, "-m", "streamlit", "run", script,
+        "--server.headless", "true", "--server.port", str(port),
+        "--browser.gatherUsageStats", "false",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError("Streamlit did not become healthy within 120s")
+
+
+def process_tree(pid):
+    pids = [pid]
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                pids += [int(child) for child in f.read().split()]
+        except OSError:
+            pass
+    return pids
+
+
+def cpu_seconds(pid):
+    """utime + stime of a process and its children, from /proc"""
+    total = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12])
+        except OSError:
+            pass
+    return total / CLOCK_TICKS
+
+
+def rss_mb(pid):
+    total = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+# -----------------------------
+# Simulated browser session
+# -----------------------------
+class Session:
+    def __init__(self, url, think, rng):
+        self.url = url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.think = think
+        self.rng = rng
+        self.widgets = {}      # user key -> widget id
+        self.radio = None      # (widget id, option labels) of the current tab's year radio
+        self.years = {}        # radio widget id -> selected option label
+        self.search = None     # widget id of the Employee Lookup search box, when on that tab
+        self.queries = {}      # search box widget id -> typed text
+        self.latencies = []
+        self.errors = 0
+
+    def rerun(self, trigger=None):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        states = msg.rerun_script.widget_states.widgets
+        # A browser resends every widget's value on each rerun
+        for widget_id, label in self.years.items():
+            state = states.add()
+            state.id = widget_id
+            # Radios send the formatted option label as their value
+            state.string_value = label
+        for widget_id, text in self.queries.items():
+            state = states.add()
+            state.id = widget_id
+            state.string_value = text
+        if trigger:
+            state = states.add()
+            state.id = trigger
+            state.trigger_value = True
+        return msg.SerializeToString()
+
+    async def run_once(self, ws, payload):
+        start = time.perf_counter()
+        await ws.send(payload)
+        self.radio = None
+        self.search = None
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await ws.recv())
+            kind = message.WhichOneof("type")
+            if kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                self.track(message.delta.new_element)
+            elif kind == "script_finished" and message.script_finished in FINISHED:
+                break
+        self.latencies.append(time.perf_counter() - start)
+
+    def track(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors += 1
+            return
+        widget_id = getattr(getattr(element, kind), "id", "")
+        if not widget_id:
+            return
+        key = widget_id.rsplit("-", 1)[-1]
+        self.widgets[key] = widget_id
+        if kind == "radio":
+            self.radio = (widget_id, list(element.radio.options))
+        elif kind == "text_input" and key == SEARCH_KEY:
+            self.search = widget_id
+
+    def next_action(self):
+        """Half the time switch tab, otherwise pick another year or type a search on the current tab"""
+        if self.search and self.rng.random() < 0.5:
+            self.queries[self.search] = self.rng.choice(SEARCH_QUERIES)
+            return self.rerun()
+        if self.radio and self.rng.random() < 0.5:
+            widget_id, options = self.radio
+            self.years[widget_id] = self.rng.choice(options)
+            return self.rerun()
+        return self.rerun(self.widgets.get(self.rng.choice(TAB_KEYS)))
+
+    async def run(self, until):
+        async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None) as ws:
+            await self.run_once(ws, self.rerun())
+            while time.time() < until:
+                await asyncio.sleep(self.rng.uniform(*self.think))
+                if time.time() >= until:
+                    break
+                await self.run_once(ws, self.next_action())
+
+
+# -----------------------------
+# Load levels
+# -----------------------------
+async def run_level(url, sessions, duration, think, seed):
+    until = time.time() + duration
+    clients = [Session(url, think, random.Random(seed + i)) for i in range(sessions)]
+    await asyncio.gather(*(client.run(until) for client in clients))
+    return clients
+
+
+def measure(url, pid, sessions, duration, think, seed=0):
+    cpu_before, wall_before = (cpu_seconds(pid) if pid else 0), time.perf_counter()
+    rss_samples = []
+
+    async def sample_rss():
+        while True:
+            rss_samples.append(rss_mb(pid))
+            await asyncio.sleep(0.5)
+
+    async def level():
+        sampler = asyncio.create_task(sample_rss()) if pid else None
+        try:
+            return await run_level(url, sessions, duration, think, seed)
+        finally:
+            if sampler:
+                sampler.cancel()
+
+    clients = asyncio.run(level())
+    wall = time.perf_counter() - wall_before
+    latencies = np.array([lat for client in clients for lat in client.latencies]) * 1000
+    row = {
+        "sessions": sessions,
+        "reruns": int(latencies.size),
+        "reruns_per_s": round(latencies.size / wall, 2),
+        "errors": sum(client.errors for client in clients),
+    }
+    for q in (50, 95, 99):
+        row[f"p{q}_ms"] = round(float(np.percentile(latencies, q)), 1) if latencies.size else None
+    if pid:
+        row["cpu_pct"] = round((cpu_seconds(pid) - cpu_before) / wall * 100, 1)
+        row["rss_mb_peak"] = round(max(rss_samples, default=rss_mb(pid)), 1)
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure rerun latency of web_app.py under concurrent sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=60, help="seconds per session count")
+    parser.add_argument("--think", type=float, nargs=2, default=[1.0, 5.0], metavar=("MIN", "MAX"),
+                        help="think time between interactions, seconds")
+    parser.add_argument("--url", help="test a running server instead of starting one (CPU/RSS are then skipped)")
+    parser.add_argument("--output", default=os.path.join("reports", "load_test.json"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if websockets is None:
+        parser.error("the websockets package is required (pip install websockets)")
+
+    process = None
+    url, pid = args.url, None
+    if not url:
+        port = free_port()
+        process = start_app(port)
+        url, pid = f"http://127.0.0.1:{port}", process.pid
+
+    rows = []
+    try:
+        print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'CPU %':>6} {'RSS MB':>7} {'errors':>6}")
+        for sessions in args.sessions:
+            row = measure(url, pid, sessions, args.duration, args.think, args.seed)
+            rows.append(row)
+            print(f"{row['sessions']:>8} {row['reruns']:>7} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} "
+                  f"{row.get('cpu_pct', '-'):>6} {row.get('rss_mb_peak', '-'):>7} {row['errors']:>6}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"url": url, "duration_s": args.duration, "think_s": args.think, "levels": rows}, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import numpy as np
+
+# -----------------------------
+# Pure metric computations shared by the dashboard tabs and the batch report.
+# Nothing in this package imports streamlit.
+# -----------------------------
+
+# Generations in the order every chart lists them (alphabetical)
+GENERATION_ORDER = ["Baby Boomer", "Gen X", "Gen Z", "Millennial"]
+
+
+def apply_slice(frame, where=None):
+    """Filter a frame to the rows matching every {column: value} in `where`"""
+    if not where:
+        return frame
+    mask = np.ones(len(frame), dtype=bool)
+    for column, value in where.items():
+        mask &= frame[column].eq(value).to_numpy()
+    return frame[mask]
+
+
+def pct(part, whole):
+    return (part / whole) * 100 if whole > 0 else 0
@@ -0,0 +1,274 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from cache import cached
+from metrics import GENERATION_ORDER, apply_slice, pct, sampling
+
+# -----------------------------
+# Attrition & retention KPIs (from the Data and Summary sheets)
+# -----------------------------
+
+
+def net_change(ds, year):
+    """Official Net Change for a year from the Summary sheet (column H)"""
+    year_to_net = ds.summary.set_index("Year")["Net Change"].to_dict()
+    return int(year_to_net.get(year, 0))
+
+
+@cached
+def kpis(ds, year, where=None):
+    raw = apply_slice(ds.raw, where)
+    summary_year = raw[raw["Year"] == year]
+
+    return rate_kpis(ds, year, where, len(summary_year), int(summary_year["ResignedFlag"].sum()),
+                     int(summary_year["Retention"].sum()))
+
+
+def rate_kpis(ds, year, where, total_employees, resigned, retained):
+    """kpis() from the year's (or slice's) employee, resigned and retained counts"""
+    return {
+        "total_employees": total_employees,
+        "resigned": resigned,
+        "retention_rate": pct(retained, total_employees),
+        "attrition_rate": pct(resigned, total_employees),
+        # Net Change is only published company-wide, not per slice
+        "net_change": net_change(ds, year) if not where else None,
+    }
+
+
+# -----------------------------
+# Everything the Attrition & Retention tab draws for one year
+# -----------------------------
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+
+
+@dataclass(frozen=True)
+class AttritionResults:
+    year: int
+    kpis: dict
+    resigned_per_year: pd.DataFrame        # Year, Resigned
+    retention_by_gender: pd.DataFrame      # Year, Gender, Retention (retained count)
+    retention_rate: pd.DataFrame           # Year, Retention, RetentionRatePct
+    retention_by_generation: pd.DataFrame  # Year, Generation (ordered), Total, Active, RetentionRate
+    monthly_attrition: pd.DataFrame        # Month, AttritionCount (all twelve months)
+    attrition_by_type: pd.DataFrame        # Year, Status, Count; None without the attrition file
+    net_change: pd.DataFrame               # Year (str), Joins, Resignations, NetChange, Status
+    # kpi -> (low, high) 95% interval; empty for exact results
+    intervals: dict = field(default_factory=dict)
+
+
+@cached
+def trends(ds):
+    """Year-over-year series that do not depend on the selected year"""
+    raw = ds.raw
+    resigned_per_year = raw.groupby("Year")["ResignedFlag"].sum().reset_index(name="Resigned")
+    retention_by_gender = raw.groupby(["Year", "Gender"])["Retention"].sum().reset_index()
+    retention_rate = raw.groupby("Year")["Retention"].mean().reset_index()
+    retention_rate["RetentionRatePct"] = retention_rate["Retention"] * 100
+
+    first, last = ds.years[0], ds.years[-1]
+    years = raw["Year"].between(first, last)
+    active = raw["Resignee Checking"] == "ACTIVE"
+    by_generation = retention_by_generation(raw[years].groupby(["Year", "Generation"]).size(),
+                                            raw[years & active].groupby(["Year", "Generation"]).size())
+
+    by_type = None
+    if ds.attrition is not None:
+        attrition = ds.attrition
+        attrition = attrition[
+            attrition["Year"].between(first, last) & attrition["Status"].isin(["Voluntary", "Involuntary"])
+        ]
+        by_type = attrition.groupby(["Year", "Status"]).size().reset_index(name="Count")
+
+    return resigned_per_year, retention_by_gender, retention_rate, by_generation, by_type, net_change_series(ds)
+
+
+def retention_by_generation(total, active):
+    """Retention per (Year, Generation) from employees and active employees counted per (Year, Generation)"""
+    by_generation = pd.merge(total.reset_index(name="Total"), active.reset_index(name="Active"),
+                             on=["Year", "Generation"], how="left")
+    by_generation["RetentionRate"] = (by_generation["Active"] / by_generation["Total"]) * 100
+    by_generation["Generation"] = pd.Categorical(by_generation["Generation"], categories=GENERATION_ORDER, ordered=True)
+    return by_generation
+
+
+def net_change_series(ds):
+    """Joins, resignations and net change per year from the Summary sheet"""
+    net = ds.summary[["Year", "Joins", "Resignations", "Net Change"]].rename(columns={"Net Change": "NetChange"})
+    net["Status"] = pd.Categorical(np.where(net["NetChange"] > 0, "Increase", "Decrease"),
+                                   categories=["Increase", "Decrease"], ordered=True)
+    net["Year"] = net["Year"].astype(str)
+    return net
+
+
+# -----------------------------
+# Voluntary / involuntary exits joined to the Data sheet
+# -----------------------------
+# The attrition file carries no demographics, so each of its rows is matched
+# to its employee-year in the Data sheet on a 64-bit hash of (Year[, Full
+# Name], n), where n numbers the rows sharing that key in file order. The
+# file has no names today and lists every employee-year in the Data sheet's
+# order, so n is the row's position within its year; with names, n only
+# separates employees who share a name in the same year.
+# A match only counts if the Data sheet row is a leaver, and without names
+# only in years where the file has exactly as many rows as the Data sheet
+# (a missing or extra row would shift every position after it). Exits that
+# do not match keep Matched False and are reported, not dropped silently.
+EXIT_STATUSES = ["Voluntary", "Involuntary"]
+EXIT_COLUMNS = ["Position/Level", "Gender", "Generation", "Tenure", "Age", "Resignation Date"]
+EXIT_BREAKDOWNS = ["Position/Level", "Gender", "Generation", "Tenure"]
+
+
+def _join_hash(frame, keys):
+    """uint64 hash of (keys..., occurrence of those key values so far) per row"""
+    occurrence = frame.groupby(keys, sort=False).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(frame[keys].assign(Occurrence=occurrence), index=False).to_numpy()
+
+
+@cached
+def exits(ds):
+    """Voluntary / involuntary exits with the demographics of their Data sheet row; None without the file"""
+    if ds.attrition is None:
+        return None
+    raw, attrition = ds.raw, ds.attrition
+    keys = ["Year"] + (["Full Name"] if "Full Name" in attrition.columns else [])
+
+    # Index of the Data sheet: hashes sorted once, probed by binary search
+    raw_hash = _join_hash(raw, keys)
+    order = np.argsort(raw_hash, kind="stable")
+    sorted_hash = raw_hash[order]
+
+    is_exit = attrition["Status"].isin(EXIT_STATUSES).to_numpy()
+    probe = _join_hash(attrition, keys)[is_exit]
+    position = np.minimum(np.searchsorted(sorted_hash, probe), len(sorted_hash) - 1)
+    rows = order[position]
+    years = attrition["Year"].to_numpy()[is_exit]
+    matched = (
+        (sorted_hash[position] == probe)
+        & (raw["Year"].to_numpy()[rows] == years)
+        & (raw["ResignedFlag"].to_numpy()[rows] == 1)
+    )
+    if "Full Name" not in keys:
+        rows_per_year = raw["Year"].value_counts()
+        aligned = attrition["Year"].value_counts().reindex(rows_per_year.index).eq(rows_per_year)
+        matched &= np.isin(years, aligned.index[aligned])
+
+    enriched = raw.iloc[rows][EXIT_COLUMNS].reset_index(drop=True)
+    enriched = enriched.where(pd.Series(matched)).astype({"Tenure": "Int64", "Age": "Int64"})
+    enriched.insert(0, "Year", years)
+    enriched.insert(1, "Status", attrition["Status"].to_numpy()[is_exit])
+    enriched["Matched"] = matched
+    # Position of the matched row in ds.raw
+    enriched["Row"] = pd.Series(rows, dtype="Int64").where(matched)
+    return enriched
+
+
+@cached
+def unmatched_exits(ds, year=None):
+    """Exits (for one year or all) that could not be matched to a leaver in the Data sheet"""
+    enriched = exits(ds)
+    if enriched is None:
+        return 0
+    if year is not None:
+        enriched = enriched[enriched["Year"] == int(year)]
+    return int((~enriched["Matched"]).sum())
+
+
+@cached
+def exits_by(ds, by, year=None):
+    """Matched exits per (by, Status) with each status' share of the group, for one year or all"""
+    enriched = exits(ds)
+    if enriched is None:
+        return None
+    if year is not None:
+        enriched = enriched[enriched["Year"] == int(year)]
+    counts = enriched.groupby([by, "Status"], observed=True).size().reset_index(name="Count")
+    counts["Share (%)"] = counts["Count"] / counts.groupby(by)["Count"].transform("sum") * 100
+    if by == "Generation":
+        counts["Generation"] = pd.Categorical(counts["Generation"], categories=GENERATION_ORDER, ordered=True)
+    return counts.sort_values([by, "Status"]).reset_index(drop=True)
+
+
+@cached
+def results(ds, year):
+    raw = ds.raw
+    leavers = raw[(raw["Year"] == year) & (raw["ResignedFlag"] == 1)]
+    monthly = (
+        leavers.groupby(leavers["Resignation Date"].dt.month_name().rename("Month"))
+        .size()
+        .reindex(MONTHS)
+        .reset_index(name="AttritionCount")
+    )
+    resigned_per_year, retention_by_gender, retention_rate, by_generation, by_type, net = trends(ds)
+    return AttritionResults(
+        year=year,
+        kpis=kpis(ds, year),
+        resigned_per_year=resigned_per_year,
+        retention_by_gender=retention_by_gender,
+        retention_rate=retention_rate,
+        retention_by_generation=by_generation,
+        monthly_attrition=monthly,
+        attrition_by_type=by_type,
+        net_change=net,
+    )
+
+
+@cached
+def approximate_results(ds, year):
+    """results() estimated from the stratified sample, with 95% intervals on the KPIs and series"""
+    sample = sampling.sample(ds)
+    year_rows = sample[sample["Year"] == year]
+    total_employees, total_ci = sampling.kpi(sampling.totals(sample, year_rows, None, name="Employees"), "Employees")
+    resigned, resigned_ci = sampling.kpi(sampling.totals(sample, year_rows, "ResignedFlag"), "ResignedFlag")
+    retention, retention_ci = sampling.kpi(
+        sampling.ratios(sample, year_rows, "Retention", scale=100), "Ratio")
+    attrition, attrition_ci = sampling.kpi(
+        sampling.ratios(sample, year_rows, "ResignedFlag", scale=100), "Ratio")
+
+    retention_rate = sampling.ratios(sample, sample, "Retention", by=("Year",), name="RetentionRatePct", scale=100)
+    retention_rate.insert(1, "Retention", retention_rate["RetentionRatePct"] / 100)
+
+    by_generation = sampling.totals(sample, sample, None, by=("Year", "Generation"), name="Total")
+    by_generation["Active"] = sampling.totals(sample, sample, "Active", by=("Year", "Generation"))["Active"]
+    rates = sampling.ratios(sample, sample, "Active", by=("Year", "Generation"), name="RetentionRate", scale=100)
+    by_generation = by_generation.merge(rates, on=["Year", "Generation"])
+    by_generation["Generation"] = pd.Categorical(by_generation["Generation"], categories=GENERATION_ORDER, ordered=True)
+
+    leavers = year_rows[year_rows["ResignedFlag"] == 1]
+    monthly = sampling.totals(sample, leavers, None, by=("Resignation Month",), name="AttritionCount")
+    monthly["Month"] = [MONTHS[month - 1] for month in monthly["Resignation Month"]]
+    monthly = monthly.drop(columns="Resignation Month").set_index("Month").reindex(MONTHS).reset_index()
+
+    by_type = None
+    if ds.attrition is not None:
+        exits = sample[sample["Status"].isin(["Voluntary", "Involuntary"])]
+        by_type = sampling.totals(sample, exits, None, by=("Year", "Status"), name="Count")
+
+    return AttritionResults(
+        year=year,
+        kpis={
+            "total_employees": total_employees,
+            "resigned": resigned,
+            "retention_rate": retention,
+            "attrition_rate": attrition,
+            "net_change": net_change(ds, year),
+        },
+        resigned_per_year=sampling.totals(sample, sample, "ResignedFlag", by=("Year",), name="Resigned"),
+        retention_by_gender=sampling.totals(sample, sample, "Retention", by=("Year", "Gender")),
+        retention_rate=retention_rate,
+        retention_by_generation=by_generation,
+        monthly_attrition=monthly,
+        attrition_by_type=by_type,
+        net_change=net_change_series(ds),
+        intervals={
+            "total_employees": total_ci,
+            "resigned": resigned_ci,
+            "retention_rate": retention_ci,
+            "attrition_rate": attrition_ci,
+        },
+    )
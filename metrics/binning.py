@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Server-side binning and aggregation for chart series
+# -----------------------------
+# Pure pandas/numpy (no streamlit), so the metrics modules can build chart
+# series that the tabs only have to draw.
+
+# Scatter plots are grid-aggregated down to roughly this many points
+MAX_SCATTER_POINTS = 2000
+
+
+def bin_edges(values, nbins=10):
+    """Return 'nice' histogram bin edges (step of 1, 2, 2.5 or 5 x 10^k).
+
+    Integer-valued data gets edges at half-integers, so each bar is centered
+    on the integer it counts, like plotly's own histogram binning.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.array([0.0, 1.0])
+    lo, hi = values.min(), values.max()
+    raw_step = max((hi - lo) / max(nbins, 1), 1e-9)
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    is_integer = np.all(np.mod(values, 1) == 0)
+    if is_integer:
+        step = max(1.0, math.ceil(step))
+        start = lo - 0.5
+    else:
+        start = math.floor(lo / step) * step
+    n = int(math.floor((hi - start) / step)) + 1
+    return start + step * np.arange(n + 1)
+
+
+def prebin_histogram(values, weights=None, by=None, nbins=10, x="x", y="Count"):
+    """Bin values server-side and return one row per (group, bin).
+
+    Equivalent to px.histogram(x=values, y=weights, color=by) with histfunc
+    "sum", but computed with a single bincount so only the bin totals are sent
+    to the browser. Returns columns [by,] x (bin center), y, "BinStart",
+    "BinEnd".
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float)
+    keep = ~np.isnan(values)
+    if by is not None:
+        by = pd.Series(by).reset_index(drop=True)
+        codes, groups = pd.factorize(by, sort=True)
+        keep &= codes >= 0
+        codes = codes[keep]
+    values, weights = values[keep], weights[keep]
+
+    edges = bin_edges(values, nbins)
+    nb = len(edges) - 1
+    bins = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, nb - 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    if by is None:
+        counts = np.bincount(bins, weights=weights, minlength=nb)
+        out = pd.DataFrame({x: centers, y: counts})
+    else:
+        counts = np.bincount(codes * nb + bins, weights=weights, minlength=len(groups) * nb)
+        out = pd.DataFrame({
+            by.name or "Group": np.repeat(np.asarray(groups), nb),
+            x: np.tile(centers, len(groups)),
+            y: counts,
+        })
+    out["BinStart"] = np.tile(edges[:-1], len(out) // nb)
+    out["BinEnd"] = np.tile(edges[1:], len(out) // nb)
+    out = out[out[y] > 0].reset_index(drop=True)
+    if np.allclose(out[y] % 1, 0):
+        out[y] = out[y].astype(int)
+    return out
+
+
+def aggregate_scatter(df, x, y, by=None, size=None, max_points=MAX_SCATTER_POINTS, size_name=None):
+    """Grid-aggregate a scatter to at most ~max_points points.
+
+    Points falling in the same grid cell (and group) are replaced by their
+    mean position; `size` is summed into `size_name` (default: `size`, which
+    must then differ from x and y) so marker areas keep their totals.
+    Frames already under the limit are returned unchanged apart from the
+    size_name column.
+    """
+    size_name = size_name or size
+    if size is not None and size_name in (x, y):
+        raise ValueError(f"size_name must differ from x and y, got {size_name!r}")
+    if len(df) <= max_points:
+        return df if size_name == size else df.assign(**{size_name: df[size]})
+    keys = [] if by is None else [by]
+    groups = 1 if by is None else max(df[by].nunique(), 1)
+    cells = max(int(math.sqrt(max_points / groups)), 1)
+    grid = df.assign(
+        _gx=pd.cut(df[x], cells, labels=False),
+        _gy=pd.cut(df[y], cells, labels=False),
+    )
+    if size is not None:
+        grid[size_name] = df[size]
+    agg = {x: "mean", y: "mean"}
+    if size is not None:
+        agg[size_name] = "sum"
+    out = grid.groupby(keys + ["_gx", "_gy"], observed=True, sort=False).agg(agg).reset_index()
+    return out.drop(columns=["_gx", "_gy"])
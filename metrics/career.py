@@ -0,0 +1,158 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from cache import cached
+from data_loader import SLICE_COLUMNS
+from metrics import apply_slice, pct, sampling
+
+# -----------------------------
+# Career progression KPIs (active employees in the Data sheet)
+# -----------------------------
+# Everything the Career tab shows is answered from two small tables built once
+# per data version: a promotion fact table per (Year, Position/Level, Gender,
+# Generation) and tenure-at-promotion histograms per year.
+
+FACT_KEYS = ["Year"] + SLICE_COLUMNS
+
+
+@cached
+def promotion_facts(ds):
+    """Active headcount, promotions & transfers and tenure totals per (Year, level, gender, generation)"""
+    raw = ds.raw
+    active = raw["Resignee Checking"].eq("ACTIVE")
+    promoted = active & raw["Promotion & Transfer"].eq(1)
+    return fact_table(raw.assign(
+        Active=active.astype(int),
+        PromotionsTransfers=promoted.astype(int),
+        ActiveTenure=raw["Tenure"].where(active, 0),
+    ))
+
+
+def fact_table(rows):
+    """promotion_facts() from rows carrying Active, PromotionsTransfers and ActiveTenure columns"""
+    facts = (
+        rows.groupby(FACT_KEYS, as_index=False, observed=True)[["Active", "PromotionsTransfers", "ActiveTenure"]]
+        .sum()
+    )
+    # The Data sheet has one combined Promotion & Transfer flag, so the two
+    # cannot be counted separately
+    facts = facts.rename(columns={
+        "PromotionsTransfers": "Promotions & Transfers",
+        "ActiveTenure": "Active Tenure Sum",
+    })
+    facts["Year"] = facts["Year"].astype(int)
+    return facts
+
+
+@cached
+def tenure_histograms(ds):
+    """Promoted active employees per (Year, Tenure in whole years), from one bincount"""
+    raw = ds.raw
+    promoted = raw[raw["Resignee Checking"].eq("ACTIVE") & raw["Promotion & Transfer"].eq(1)]
+    return histogram_table(ds.years, promoted["Year"].to_numpy(dtype=int), promoted["Tenure"].to_numpy(dtype=int))
+
+
+def histogram_table(years, year, tenure, weights=None):
+    """tenure_histograms() from the Year and Tenure of promoted employees (weights: employees per entry)"""
+    years = np.asarray(years)
+    width = int(tenure.max()) + 1 if tenure.size else 1
+    year_index = np.searchsorted(years, year)
+    counts = np.bincount(year_index * width + tenure, weights=weights, minlength=len(years) * width)
+    if weights is not None:
+        counts = counts.astype(np.int64)
+    hist = pd.DataFrame({
+        "Year": np.repeat(years, width),
+        "Tenure": np.tile(np.arange(width), len(years)),
+        "Count": counts,
+    })
+    return hist[hist["Count"] > 0].reset_index(drop=True)
+
+
+@cached
+def kpis(ds, year, where=None):
+    return facts_kpis(promotion_facts(ds), year, where)
+
+
+def facts_kpis(facts, year, where=None):
+    """kpis() from a promotion_facts() table"""
+    facts = apply_slice(facts, where)
+    facts = facts[facts["Year"] == int(year)]
+    active_count = int(facts["Active"].sum())
+
+    if active_count == 0:
+        return {"promotions_transfers": 0, "average_tenure": 0, "promotion_rate": 0, "active_employees": 0}
+
+    total_promotions_transfers = int(facts["Promotions & Transfers"].sum())
+    return {
+        "promotions_transfers": total_promotions_transfers,
+        "average_tenure": facts["Active Tenure Sum"].sum() / active_count,
+        "promotion_rate": pct(total_promotions_transfers, active_count),
+        "active_employees": active_count,
+    }
+
+
+# -----------------------------
+# Everything the Career tab draws for one year
+# -----------------------------
+@dataclass(frozen=True)
+class CareerResults:
+    year: int
+    kpis: dict
+    promotions_per_year: pd.DataFrame   # Year, Promotions & Transfers
+    promotions_by_level: pd.DataFrame   # Year, Position/Level, Promotions & Transfers
+    tenure_bins: pd.DataFrame           # Year, Tenure, Count for the selected year
+    # kpi -> (low, high) 95% interval; empty for exact results
+    intervals: dict = field(default_factory=dict)
+
+
+@cached
+def results(ds, year):
+    return results_from(year, kpis(ds, year), promotion_facts(ds), tenure_histograms(ds))
+
+
+def results_from(year, kpis, facts, hist):
+    """results() from the year's KPIs, promotion_facts() and tenure_histograms()"""
+    return CareerResults(
+        year=year,
+        kpis=kpis,
+        promotions_per_year=facts.groupby("Year", as_index=False)["Promotions & Transfers"].sum(),
+        promotions_by_level=facts.groupby(["Year", "Position/Level"], as_index=False)["Promotions & Transfers"].sum(),
+        tenure_bins=hist[hist["Year"] == year],
+    )
+
+
+@cached
+def approximate_results(ds, year):
+    """results() estimated from the stratified sample, with 95% intervals on the KPIs and series"""
+    sample = sampling.sample(ds)
+    year_rows = sample[sample["Year"] == int(year)]
+    active, active_ci = sampling.kpi(sampling.totals(sample, year_rows, "Active"), "Active")
+    promoted, promoted_ci = sampling.kpi(sampling.totals(sample, year_rows, "Promoted"), "Promoted")
+    active_rows = year_rows[year_rows["Active"] == 1]
+    tenure, tenure_ci = sampling.kpi(sampling.ratios(sample, active_rows, "Tenure"), "Ratio")
+    rate, rate_ci = sampling.kpi(sampling.ratios(sample, year_rows, "Promoted", "Active", scale=100), "Ratio")
+
+    tenure_bins = sampling.totals(sample, year_rows[year_rows["Promoted"] == 1], None, by=("Tenure",), name="Count")
+    tenure_bins.insert(0, "Year", int(year))
+
+    return CareerResults(
+        year=year,
+        kpis={
+            "promotions_transfers": promoted,
+            "average_tenure": tenure,
+            "promotion_rate": rate,
+            "active_employees": active,
+        },
+        promotions_per_year=sampling.totals(sample, sample, "Promoted", by=("Year",), name="Promotions & Transfers"),
+        promotions_by_level=sampling.totals(sample, sample, "Promoted", by=("Year", "Position/Level"),
+                                            name="Promotions & Transfers"),
+        tenure_bins=tenure_bins,
+        intervals={
+            "promotions_transfers": promoted_ci,
+            "average_tenure": tenure_ci,
+            "promotion_rate": rate_ci,
+            "active_employees": active_ci,
+        },
+    )
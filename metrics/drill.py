@@ -0,0 +1,154 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cache import cached
+from metrics import attrition
+
+# -----------------------------
+# Drill-through: the Data sheet rows behind a chart segment, a page at a time
+# -----------------------------
+# Built once per data version:
+#   - per dimension, the row ids of every value (one array sorted by value,
+#     with offsets), so a segment such as {Year: 2023, Resignation Month:
+#     March} is an intersection of already sorted id lists;
+#   - per sortable column, every row's rank in that column's order (ties by
+#     row id), so a page is the `size` smallest ranks after a cursor.
+# A cursor is the rank of the last row of the previous page (keyset
+# pagination), so page n costs the same as page 1.
+
+DIMENSIONS = ["Year", "Position/Level", "Gender", "Generation", "Tenure", "Resignee Checking",
+              "Promotion & Transfer", "Resignation Month", "Exit Type"]
+SORT_COLUMNS = ["Full Name", "Year", "Age", "Tenure", "Year Joined", "Resignation Date"]
+COLUMNS = ["Full Name", "Year", "Position/Level", "Gender", "Generation", "Age", "Tenure", "Year Joined",
+           "Resignee Checking", "Resignation Date", "Promotion & Transfer"]
+PAGE_SIZE = 25
+
+
+@dataclass(frozen=True)
+class Page:
+    rows: pd.DataFrame   # COLUMNS of the page's Data sheet rows, in order
+    total: int           # rows in the whole segment
+    cursor: int          # pass as `after` for the next page; None for an empty page
+    has_more: bool
+
+
+@dataclass(frozen=True)
+class RowIndex:
+    values: dict    # dimension -> pd.Index of its distinct values
+    offsets: dict   # dimension -> rows of value i are ids[offsets[i]:offsets[i + 1]]
+    ids: dict       # dimension -> row ids grouped by value, ascending within a value
+    ranks: dict     # sort column -> rank of every row
+
+    def normalize(self, segment):
+        """segment with its values as the dimensions store them (chart clicks send text, floats or dates)"""
+        out = {}
+        for dimension, value in segment.items():
+            if pd.api.types.is_integer_dtype(self.values[dimension].dtype):
+                try:
+                    value = int(float(value))
+                except (TypeError, ValueError):
+                    # Calendar Year axes send dates
+                    value = pd.Timestamp(value).year
+            out[dimension] = value.item() if isinstance(value, np.generic) else value
+        return out
+
+    def _postings(self, dimension, value):
+        code = self.values[dimension].get_indexer([value])[0]
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        return self.ids[dimension][self.offsets[dimension][code]:self.offsets[dimension][code + 1]]
+
+    def rows(self, segment):
+        """Sorted row ids matching every {dimension: value} of segment"""
+        postings = sorted((self._postings(d, v) for d, v in self.normalize(segment).items()), key=len)
+        if not postings:
+            return np.arange(len(self.ranks[SORT_COLUMNS[0]]))
+        rows = postings[0]
+        for other in postings[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def page(self, rows, sort="Full Name", descending=False, after=None, size=PAGE_SIZE):
+        """(row ids of one page in sort order, cursor of its last row, whether more follow)"""
+        rank = self.ranks[sort]
+        keys = rank[rows] if not descending else len(rank) - 1 - rank[rows]
+        if after is not None:
+            rows, keys = rows[keys > after], keys[keys > after]
+        has_more = len(rows) > size
+        if has_more:
+            # Only the page's rows are sorted, not the whole remainder
+            top = np.argpartition(keys, size - 1)[:size]
+            rows, keys = rows[top], keys[top]
+        order = np.argsort(keys)
+        return rows[order], (int(keys[order[-1]]) if len(keys) else None), has_more
+
+
+def _group(values):
+    """(distinct values, offsets, row ids grouped by value)"""
+    codes, uniques = pd.factorize(values, sort=True)
+    present = codes >= 0
+    ids = np.flatnonzero(present)
+    ids = ids[np.argsort(codes[present], kind="stable")]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes[present], minlength=len(uniques)))])
+    return pd.Index(uniques), offsets, ids
+
+
+@cached
+def row_index(ds):
+    raw = ds.raw
+    columns = {column: raw[column] for column in DIMENSIONS if column in raw.columns}
+    columns["Resignation Month"] = raw["Resignation Date"].dt.month_name()
+    exit_type = pd.Series(None, index=range(len(raw)), dtype=object)
+    exits = attrition.exits(ds)
+    if exits is not None:
+        matched = exits[exits["Matched"]]
+        exit_type.iloc[matched["Row"].to_numpy(dtype=int)] = matched["Status"].to_numpy()
+    columns["Exit Type"] = exit_type
+
+    values, offsets, ids = {}, {}, {}
+    for dimension, column in columns.items():
+        values[dimension], offsets[dimension], ids[dimension] = _group(column.to_numpy())
+
+    ranks = {}
+    for column in SORT_COLUMNS:
+        codes, uniques = pd.factorize(raw[column], sort=True)
+        # Missing values (e.g. no Resignation Date) sort last, first when descending
+        codes = np.where(codes < 0, len(uniques), codes)
+        rank = np.empty(len(raw), dtype=np.int64)
+        rank[np.argsort(codes, kind="stable")] = np.arange(len(raw))
+        ranks[column] = rank
+    return RowIndex(values=values, offsets=offsets, ids=ids, ranks=ranks)
+
+
+# The last few segments' row ids, so paging through one does not redo the
+# intersection; bounded, as every chart click is a new segment
+SEGMENT_CACHE_SIZE = 32
+_segments = OrderedDict()
+_segments_lock = threading.Lock()
+
+
+def segment_rows(ds, segment):
+    """Row ids of a (normalized) segment, from a small LRU keyed on the data version"""
+    key = (ds.version, tuple(sorted(segment.items())))
+    with _segments_lock:
+        if key in _segments:
+            _segments.move_to_end(key)
+            return _segments[key]
+    rows = row_index(ds).rows(segment)
+    with _segments_lock:
+        _segments[key] = rows
+        while len(_segments) > SEGMENT_CACHE_SIZE:
+            _segments.popitem(last=False)
+    return rows
+
+
+def page(ds, segment, sort="Full Name", descending=False, after=None, size=PAGE_SIZE):
+    """One page of the rows behind a segment, sorted by a SORT_COLUMNS column"""
+    rows = segment_rows(ds, row_index(ds).normalize(segment))
+    ids, cursor, has_more = row_index(ds).page(rows, sort, descending, after, size)
+    return Page(rows=ds.raw.iloc[ids][COLUMNS].reset_index(drop=True), total=len(rows), cursor=cursor,
+                has_more=has_more)
@@ -0,0 +1,58 @@
+import numpy as np
+
+from cache import cached
+from metrics import survey
+
+# -----------------------------
+# Attrition-risk scores for active employees
+# -----------------------------
+# Every active employee-year is scored by a resignation RandomForest (same
+# features and settings as the Survey tab's driver analysis) that never saw
+# that row: the Data sheet is split into RISK_FOLDS stratified folds and each
+# fold is scored by a forest fitted on the others. Scoring rows the forest was
+# trained on (as active, i.e. label 0) would mostly rank how well it memorized
+# them. Scores are computed once per data version and model settings; the
+# top-N table is then a partial sort of that score column.
+
+SCORE_COLUMNS = ["Year", "Full Name", "Position/Level", "Generation", "Gender", "Tenure"]
+RISK_FOLDS = 5
+RISK_SEED = 0
+
+
+@cached(persist=True)
+def out_of_fold_scores(ds, params):
+    """Active rows of the Data sheet with a "Resignation Risk" out-of-fold probability column"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+    encoded = survey.resignation_features(ds)
+    folds = StratifiedKFold(n_splits=RISK_FOLDS, shuffle=True, random_state=RISK_SEED)
+    probabilities = cross_val_predict(
+        RandomForestClassifier(**params), encoded[survey.RESIGNATION_FEATURES], encoded["Resigned"],
+        cv=folds, method="predict_proba",
+    )
+    active = ds.raw["Resignee Checking"].eq("ACTIVE").to_numpy()
+    scores = ds.raw.loc[active, SCORE_COLUMNS].reset_index(drop=True)
+    # Columns follow the sorted classes, so the last one is Resigned == 1
+    scores["Resignation Risk"] = probabilities[active, -1]
+    return scores
+
+
+def risk_scores(ds):
+    """out_of_fold_scores() under the current resignation model settings"""
+    return out_of_fold_scores(ds, survey.model_params(ds, "resignation"))
+
+
+def at_risk(ds, year, n=20, where=None):
+    """The n highest-risk active employees of a year, optionally sliced by {column: value}"""
+    scores = risk_scores(ds)
+    mask = scores["Year"].to_numpy() == int(year)
+    for column, value in (where or {}).items():
+        mask &= scores[column].to_numpy() == value
+    rows = np.flatnonzero(mask)
+    risk = scores["Resignation Risk"].to_numpy()[rows]
+    if len(rows) > n:
+        # O(rows) selection of the top n, then only those n are sorted
+        top = np.argpartition(-risk, n - 1)[:n]
+        rows, risk = rows[top], risk[top]
+    return scores.iloc[rows[np.argsort(-risk, kind="stable")]].reset_index(drop=True)
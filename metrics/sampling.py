@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+import cache
+from cache import cached
+from data_loader import SLICE_COLUMNS
+from metrics import attrition
+
+# -----------------------------
+# Stratified sample for approximate mode
+# -----------------------------
+# One sample of the Data sheet per data version, stratified by (Year,
+# Position/Level) and published with the other cubes at ingest (see
+# shared_store.py). Counts, rates and means are estimated from it with the
+# usual stratified estimators and a 95% normal interval; strata smaller than
+# MIN_PER_STRATUM are taken whole, so their share of the error is zero.
+# Status (Voluntary / Involuntary) comes from the exits joined to the Data
+# sheet (metrics.attrition.exits); rows without a matched exit have None.
+
+STRATA = ["Year", "Position/Level"]
+FRACTION = 0.01
+MIN_PER_STRATUM = 400
+SEED = 0
+# Two-sided 95% normal quantile
+Z = 1.96
+
+
+@cached
+def sample(ds):
+    """Stratified random sample of ds.raw with the columns the approximate results need"""
+    raw = ds.raw
+    groups = raw.groupby(STRATA, sort=True)
+    codes = groups.ngroup().to_numpy()
+    sizes = np.bincount(codes)
+    wanted = np.minimum(sizes, np.maximum(MIN_PER_STRATUM, np.ceil(sizes * FRACTION).astype(int)))
+
+    # Random order, then stable-sorted by stratum: the first `wanted` rows of
+    # each stratum are a simple random sample of it
+    order = np.random.default_rng(SEED).permutation(len(raw))
+    order = order[np.argsort(codes[order], kind="stable")]
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, sizes)
+    keep = np.sort(order[rank < wanted[codes[order]]])
+
+    rows = raw.iloc[keep]
+    status = np.full(len(raw), None, dtype=object)
+    exits = attrition.exits(ds)
+    if exits is not None:
+        matched = exits[exits["Matched"]]
+        status[matched["Row"].to_numpy(dtype=int)] = matched["Status"].to_numpy()
+    return pd.DataFrame({
+        "Stratum": codes[keep],
+        "Stratum Size": sizes[codes[keep]],
+        "Calendar Year": rows["Calendar Year"].to_numpy(),
+        "Year": rows["Year"].to_numpy(),
+        **{column: rows[column].to_numpy() for column in SLICE_COLUMNS},
+        "Active": rows["Resignee Checking"].eq("ACTIVE").astype(int).to_numpy(),
+        "ResignedFlag": rows["ResignedFlag"].to_numpy(),
+        "Retention": rows["Retention"].to_numpy(),
+        "Promoted": (rows["Resignee Checking"].eq("ACTIVE") & rows["Promotion & Transfer"].eq(1)).astype(int).to_numpy(),
+        "Tenure": rows["Tenure"].to_numpy(),
+        "Resignation Month": rows["Resignation Date"].dt.month.fillna(0).astype(int).to_numpy(),
+        "Status": status[keep],
+    })
+
+
+# -----------------------------
+# Estimators
+# -----------------------------
+def _strata(sample):
+    """(sample size, population size) per stratum code"""
+    codes = sample["Stratum"].to_numpy()
+    n = np.bincount(codes)
+    N = np.zeros(len(n), dtype=float)
+    N[codes] = sample["Stratum Size"].to_numpy()
+    return n, N
+
+
+def _total_variance(sample, rows, values, by):
+    """Estimated total and its variance of `values` (one per row of `rows`) per group"""
+    n, N = _strata(sample)
+    frame = pd.DataFrame({"Stratum": rows["Stratum"].to_numpy(), "y": values, "y2": values * values})
+    for column in by:
+        frame[column] = rows[column].to_numpy()
+    sums = frame.groupby(list(by) + ["Stratum"], observed=True)[["y", "y2"]].sum().reset_index()
+    h = sums["Stratum"].to_numpy()
+    mean = sums["y"].to_numpy() / n[h]
+    spread = np.where(n[h] > 1, (sums["y2"].to_numpy() - n[h] * mean ** 2) / np.maximum(n[h] - 1, 1), 0.0)
+    sums["total"] = N[h] * mean
+    sums["variance"] = N[h] ** 2 * (1 - n[h] / N[h]) * np.maximum(spread, 0) / n[h]
+    if not by:
+        return pd.DataFrame({"total": [sums["total"].sum()], "variance": [sums["variance"].sum()]})
+    return sums.groupby(list(by), observed=True)[["total", "variance"]].sum().reset_index()
+
+
+def totals(sample, rows, column, by=(), name=None):
+    """Estimated population count / sum of a column over `rows` (a filter of sample), per group
+
+    Returns the `by` columns plus name, "<name> Low" and "<name> High".
+    """
+    name = name or column
+    values = np.ones(len(rows)) if column is None else rows[column].to_numpy(dtype=float)
+    est = _total_variance(sample, rows, values, by)
+    margin = Z * np.sqrt(est["variance"])
+    out = est[list(by)].copy()
+    out[name] = est["total"].round().astype(int)
+    out[f"{name} Low"] = np.maximum(est["total"] - margin, 0).round().astype(int)
+    out[f"{name} High"] = (est["total"] + margin).round().astype(int)
+    return out
+
+
+def ratios(sample, rows, numerator, denominator=None, by=(), name="Ratio", scale=1):
+    """Estimated ratio of two population totals (a rate or a mean) per group, linearized variance
+
+    denominator None counts rows, so ratios(..., "Tenure") is the mean tenure.
+    """
+    y = rows[numerator].to_numpy(dtype=float)
+    x = np.ones(len(rows)) if denominator is None else rows[denominator].to_numpy(dtype=float)
+    ty = _total_variance(sample, rows, y, by)
+    tx = _total_variance(sample, rows, x, by)
+    ratio = (ty["total"] / tx["total"].where(tx["total"] > 0)).fillna(0).to_numpy()
+    if by:
+        index = pd.MultiIndex.from_frame(ty[list(by)]) if len(by) > 1 else pd.Index(ty[by[0]])
+        keys = pd.MultiIndex.from_frame(rows[list(by)]) if len(by) > 1 else pd.Index(rows[by[0]])
+        unit_ratio = ratio[index.get_indexer(keys)]
+    else:
+        unit_ratio = ratio[0]
+    residual = _total_variance(sample, rows, y - unit_ratio * x, by)
+    margin = Z * np.sqrt(residual["variance"].to_numpy()) / np.where(tx["total"] > 0, tx["total"], np.inf)
+    out = ty[list(by)].copy()
+    out[name] = ratio * scale
+    out[f"{name} Low"] = (ratio - margin) * scale
+    out[f"{name} High"] = (ratio + margin) * scale
+    return out
+
+
+def kpi(frame, name):
+    """(value, (low, high)) of a single-row estimate"""
+    row = frame.iloc[0]
+    return row[name].item(), (row[f"{name} Low"].item(), row[f"{name} High"].item())
+
+
+# -----------------------------
+# Exact-or-approximate results
+# -----------------------------
+def results(domain, ds, year, approximate=False):
+    """domain.results(ds, year), or its sample estimate while the exact one is computed in the background"""
+    if not approximate or cache.is_cached(domain.results, ds, year):
+        return domain.results(ds, year)
+    cache.compute_in_background(domain.results, ds, year)
+    return domain.approximate_results(ds, year)
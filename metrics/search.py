@@ -0,0 +1,183 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cache import cached
+from schema import SCORE_COLUMNS
+
+# -----------------------------
+# Employee lookup by name
+# -----------------------------
+# One index per data version over the people of the Data sheet (Full Name and
+# Year Joined, so namesakes stay apart):
+#   - a sorted array of every name's words (and the whole name), so a prefix
+#     is a range found by two binary searches;
+#   - a trigram index (sorted trigrams, one id array each, stored as offsets
+#     into a single array) for matches in the middle of a word;
+#   - the panel: each person's Data sheet rows, grouped by person and sorted
+#     by year, so a person's history is one slice.
+# Names are compared case-, accent- and punctuation-insensitively.
+
+HISTORY_COLUMNS = ["Year", "Position/Level", "Tenure", "Promotion & Transfer", "Resignee Checking",
+                   "Resignation Date"] + SCORE_COLUMNS
+GRAM = 3
+# Candidates checked per step of a trigram search
+CHUNK = 4096
+# Sorts after every real character, so [prefix, prefix + END) spans all words starting with prefix
+END = "\U0010ffff"
+
+
+# Accents left as separate marks by NFKD, and ASCII punctuation
+COMBINING = "[\u0300-\u036f]"
+PUNCTUATION = r"[!-/:-@\[-`{-~]"
+
+
+def normalize(name):
+    """Lowercase, accent-free, punctuation-free name with single spaces"""
+    name = re.sub(COMBINING, "", unicodedata.normalize("NFKD", str(name)).casefold())
+    return " ".join(re.sub(PUNCTUATION, " ", name).split())
+
+
+def normalize_all(names):
+    """normalize() over a Series of names, vectorized"""
+    return (
+        names.astype(str).str.normalize("NFKD").str.casefold()
+        .str.replace(COMBINING, "", regex=True)
+        .str.replace(PUNCTUATION, " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def gram_codes(keys):
+    """(trigram code, row) for every trigram of an array of strings
+
+    A trigram is packed into one integer as three 21-bit code points.
+    """
+    width = max(int(np.char.str_len(keys).max(initial=0)), GRAM)
+    chars = np.asarray(keys, dtype=f"U{width}").view(np.uint32).reshape(len(keys), width).astype(np.uint64)
+    lengths = np.char.str_len(keys)
+    codes, rows = [], []
+    for j in range(width - GRAM + 1):
+        present = np.flatnonzero(lengths >= j + GRAM)
+        window = chars[present, j:j + GRAM]
+        codes.append((window[:, 0] << np.uint64(42)) | (window[:, 1] << np.uint64(21)) | window[:, 2])
+        rows.append(present)
+    return np.concatenate(codes), np.concatenate(rows)
+
+
+@dataclass(frozen=True)
+class NameIndex:
+    names: np.ndarray        # display name per person id
+    keys: np.ndarray         # normalized name per person id
+    words: np.ndarray        # sorted words of every name, plus every whole name
+    word_ids: np.ndarray     # person id of each entry of words
+    grams: np.ndarray        # sorted distinct trigram codes (see gram_codes)
+    gram_offsets: np.ndarray  # ids of grams[i] are gram_ids[gram_offsets[i]:gram_offsets[i + 1]]
+    gram_ids: np.ndarray
+    rows: np.ndarray         # ds.raw row numbers grouped by person, by year within a person
+    row_offsets: np.ndarray  # rows of person i are rows[row_offsets[i]:row_offsets[i + 1]]
+
+    def _prefixed(self, prefix):
+        """Person ids with a word (or the whole name) starting with prefix, in word order"""
+        lo, hi = np.searchsorted(self.words, [prefix, prefix + END])
+        return self.word_ids[lo:hi]
+
+    def _prefixed_all(self, words, limit):
+        """Person ids with a word starting with each of words ("ian buen"), in the first word's order"""
+        ranges = [self._prefixed(word) for word in words]
+        # One flag per person, cleared for anyone missing a word: no sorting or per-name checks
+        keep = np.zeros(len(self.keys), dtype=bool)
+        keep[ranges[0]] = True
+        for ids in ranges[1:]:
+            hit = np.zeros(len(self.keys), dtype=bool)
+            hit[ids] = True
+            keep &= hit
+        ordered = ranges[0][keep[ranges[0]]]
+        # A name can start several words with words[0]; dedupe only as much of the head as limit needs
+        size = limit
+        while True:
+            head = ordered[:size]
+            _, first = np.unique(head, return_index=True)
+            if len(first) >= limit or size >= len(ordered):
+                return head[np.sort(first)][:limit]
+            size *= 4
+
+    def _containing(self, text):
+        """Person ids whose name contains text, from the rarest of its trigrams"""
+        grams = np.unique(gram_codes(np.array([text]))[0])
+        at = np.searchsorted(self.grams, grams)
+        if (at >= len(self.grams)).any() or (self.grams[at] != grams).any():
+            return
+        sizes = self.gram_offsets[at + 1] - self.gram_offsets[at]
+        rarest = at[np.argmin(sizes)]
+        ids = self.gram_ids[self.gram_offsets[rarest]:self.gram_offsets[rarest + 1]]
+        for start in range(0, len(ids), CHUNK):
+            chunk = ids[start:start + CHUNK]
+            yield from chunk[np.char.find(self.keys[chunk], text) >= 0]
+
+    def search(self, query, limit=10):
+        """Person ids matching a partial name: whole-name and word prefixes first, then any substring"""
+        text = normalize(query)
+        if not text:
+            return []
+        found = dict.fromkeys(self._prefixed(text)[:limit].tolist())
+        words = text.split()
+        if len(found) < limit and len(words) > 1:
+            found.update(dict.fromkeys(self._prefixed_all(words, limit).tolist()))
+        if len(found) < limit and len(text) >= GRAM:
+            for person in self._containing(text):
+                found.setdefault(int(person))
+                if len(found) >= limit:
+                    break
+        return list(found)[:limit]
+
+    def history(self, ds, person):
+        """The person's Data sheet rows, one per year"""
+        rows = self.rows[self.row_offsets[person]:self.row_offsets[person + 1]]
+        history = ds.raw.iloc[rows][HISTORY_COLUMNS].reset_index(drop=True)
+        history["Survey Average"] = history[SCORE_COLUMNS].mean(axis=1)
+        return history
+
+
+@cached
+def name_index(ds):
+    raw = ds.raw
+    person, people = pd.MultiIndex.from_frame(raw[["Full Name", "Year Joined"]]).factorize()
+    names = np.asarray(people.get_level_values(0), dtype=object)
+    keys = normalize_all(pd.Series(names)).to_numpy(dtype=str)
+    ids = np.arange(len(keys))
+
+    # Words and whole names, sorted for range lookups
+    split = pd.Series(keys).str.split(" ").explode()
+    entries = pd.DataFrame({
+        "word": np.concatenate([split.to_numpy(dtype=str), keys]),
+        "id": np.concatenate([split.index.to_numpy(), ids]),
+    }).drop_duplicates().sort_values("word", kind="stable")
+
+    # Trigrams as one id array sorted by trigram, with offsets per distinct trigram
+    codes, rows = gram_codes(keys)
+    order = np.lexsort((rows, codes))
+    codes, rows = codes[order], rows[order]
+    first = np.concatenate([[True], (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])])
+    codes, rows = codes[first], rows[first]
+    grams, counts = np.unique(codes, return_counts=True)
+
+    # Panel: rows grouped by person, in year order within a person
+    panel = np.lexsort((raw["Year"].to_numpy(), person))
+    row_offsets = np.concatenate([[0], np.cumsum(np.bincount(person, minlength=len(names)))])
+
+    return NameIndex(
+        names=names,
+        keys=keys,
+        words=entries["word"].to_numpy(dtype=str),
+        word_ids=entries["id"].to_numpy(dtype=np.int64),
+        grams=grams,
+        gram_offsets=np.concatenate([[0], np.cumsum(counts)]),
+        gram_ids=rows.astype(np.int64),
+        rows=panel,
+        row_offsets=row_offsets,
+    )
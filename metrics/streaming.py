@@ -0,0 +1,306 @@
+from dataclasses import dataclass
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+import data_loader
+import schema
+from metrics import apply_slice, attrition, career, survey, workforce
+
+# -----------------------------
+# Out-of-core aggregation: the dashboard's numbers without the whole Data sheet in memory
+# -----------------------------
+# The two employee-year sources (the Data sheet and the attrition file) are
+# read in row chunks through a generator pipeline:
+#   read_chunks -> normalize (schema check + prepare, as data_loader does)
+#   -> cube_counts / exit_counts (one partial count table per chunk) -> merge
+# Every Data sheet series the Workforce, Attrition & Retention and Career tabs
+# draw is a sum over a handful of columns, so one table of row counts per
+# distinct CUBE_KEYS combination answers all of them. Its size depends on how
+# many years, levels, tenures... there are, not on how many rows, so peak
+# memory is one chunk plus the cube. The other sheets are already aggregated
+# and small, and are read whole.
+#
+# Row-level features (employee lookup, drill-through, transitions, risk and
+# driver models) still need the in-memory Datasets.
+
+CHUNK_ROWS = 50_000
+CUBE_KEYS = ["Year", "Calendar Year", "Position/Level", "Gender", "Generation", "Resignee Checking",
+             "Promotion & Transfer", "Tenure", "Resignation Month"]
+EXIT_KEYS = ["Year", "Status"]
+# Loaded whole: already aggregated (or one row per survey dimension) and small
+STREAMED_SHEETS = {"raw", "attrition"}
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+def _cell(cell):
+    """A cell's value as pd.read_excel sees it"""
+    if cell.value is None:
+        return ""
+    if cell.data_type == "e":
+        return np.nan
+    if cell.data_type == "n" and int(cell.value) == cell.value:
+        return int(cell.value)
+    return cell.value
+
+
+def _frame(header, rows):
+    frame = TextParser([header] + rows, header=0, skip_blank_lines=False).read()
+    # A column blank throughout one chunk parses as float; keep it text-like
+    blank = [name for name in frame.columns if frame[name].isna().all()]
+    return frame.astype(dict.fromkeys(blank, object))
+
+
+def read_chunks(path, sheet=0, chunk_rows=CHUNK_ROWS):
+    """Frames of at most chunk_rows rows of a worksheet (or a .csv file), parsed as pd.read_excel parses them"""
+    if str(path).lower().endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+        return
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        worksheet = workbook[sheet] if isinstance(sheet, str) else workbook.worksheets[sheet]
+        worksheet.reset_dimensions()
+        rows = worksheet.iter_rows()
+        header = [_cell(cell) for cell in next(rows, ())]
+        while header and header[-1] == "":
+            header.pop()
+        rows_read = []
+        for row in rows:
+            values = [_cell(cell) for cell in row[:len(header)]]
+            rows_read.append(values + [""] * (len(header) - len(values)))
+            if len(rows_read) == chunk_rows:
+                yield _frame(header, rows_read)
+                rows_read = []
+        if rows_read:
+            yield _frame(header, rows_read)
+    finally:
+        workbook.close()
+
+
+def normalize(chunks, sheet_schema, prepare=None):
+    """Validate and prepare each chunk as data_loader does the whole sheet"""
+    for frame in chunks:
+        frame, problems = schema.check(frame, sheet_schema)
+        if problems:
+            raise schema.SchemaError(problems)
+        yield prepare(frame) if prepare else frame
+
+
+def cube_counts(frame):
+    """Rows per CUBE_KEYS combination of one prepared Data sheet chunk"""
+    keys = frame[CUBE_KEYS[:-1]].assign(**{"Resignation Month": frame["Resignation Date"].dt.month})
+    return keys.groupby(CUBE_KEYS, dropna=False).size()
+
+
+def exit_counts(frame):
+    """Rows per (Year, Status) of one prepared attrition file chunk"""
+    return frame.groupby(EXIT_KEYS, dropna=False).size()
+
+
+def merge(partials):
+    """Sum of a stream of count Series over the same keys, holding one partial at a time"""
+    total = None
+    for counts in partials:
+        if total is None:
+            total = counts
+        else:
+            total = pd.concat([total, counts]).groupby(level=list(range(counts.index.nlevels)), dropna=False).sum()
+    return total
+
+
+# -----------------------------
+# Merged aggregates
+# -----------------------------
+@dataclass(frozen=True)
+class Aggregates:
+    cube: pd.DataFrame       # CUBE_KEYS, Rows: Data sheet rows per key combination
+    exits: pd.DataFrame      # Year, Status, Count: attrition file rows per (Year, Status)
+    sheets: data_loader.Datasets  # every other sheet, read whole; raw and attrition are None
+    rows: int                # Data sheet rows aggregated
+    version: str = ""
+
+    @property
+    def years(self):
+        return sorted(int(y) for y in self.cube["Year"].dropna().unique())
+
+    def slice_values(self, column):
+        return sorted(self.cube[column].dropna().unique())
+
+
+def aggregate(chunk_rows=CHUNK_ROWS, raw_path=None):
+    """Aggregates of the current source workbooks, streaming the Data sheet and attrition file in chunks"""
+    raw_path = raw_path or data_loader.raw_file()
+    files = [data_loader.OUTPUT_FILE, raw_path, data_loader.ATTRITION_FILE, data_loader.ENGAGEMENT_FILE,
+             data_loader.PARTICIPATION_FILE]
+    tasks = {task[0]: task for task in data_loader.load_tasks(raw_path)}
+
+    def counts(key, partial):
+        _, path, sheet, sheet_schema, prepare = tasks[key]
+        merged = merge(map(partial, normalize(read_chunks(path, sheet, chunk_rows), sheet_schema, prepare)))
+        if merged is None:
+            raise ValueError(f"{path} has no data rows")
+        return merged
+
+    cube = counts("raw", cube_counts).rename("Rows").reset_index()
+    exits = counts("attrition", exit_counts).rename("Count").reset_index()
+    frames = data_loader.read_sheets([task for key, task in tasks.items() if key not in STREAMED_SHEETS])
+    sheets = data_loader.Datasets(
+        output={key.split("/", 1)[1]: frame for key, frame in frames.items() if key.startswith("output/")},
+        raw=None,
+        attrition=None,
+        summary=frames["summary"],
+        engagement=frames["engagement"],
+        participation=frames["participation"],
+    )
+    return Aggregates(cube=cube, exits=exits, sheets=sheets, rows=int(cube["Rows"].sum()),
+                      version=data_loader.data_version(files))
+
+
+# -----------------------------
+# KPIs and tab results from the aggregates (same values as the in-memory metrics)
+# -----------------------------
+def _active(cube):
+    return cube["Resignee Checking"].eq("ACTIVE")
+
+
+def workforce_kpis(agg, year):
+    return workforce.kpis(agg.sheets, year)
+
+
+def survey_kpis(agg, year):
+    return survey.kpis(agg.sheets, year)
+
+
+def attrition_kpis(agg, year, where=None):
+    rows = apply_slice(agg.cube, where)
+    rows = rows[rows["Year"] == year]
+    retained = int(rows["Rows"].where(_active(rows), 0).sum())
+    total = int(rows["Rows"].sum())
+    return attrition.rate_kpis(agg.sheets, year, where, total, total - retained, retained)
+
+
+def promotion_facts(agg):
+    cube = agg.cube
+    active = _active(cube)
+    promoted = active & cube["Promotion & Transfer"].eq(1)
+    return career.fact_table(cube.assign(
+        Active=cube["Rows"].where(active, 0),
+        PromotionsTransfers=cube["Rows"].where(promoted, 0),
+        ActiveTenure=(cube["Tenure"] * cube["Rows"]).where(active, 0),
+    ))
+
+
+def tenure_histograms(agg):
+    cube = agg.cube
+    promoted = cube[_active(cube) & cube["Promotion & Transfer"].eq(1)]
+    return career.histogram_table(agg.years, promoted["Year"].to_numpy(dtype=int),
+                                  promoted["Tenure"].to_numpy(dtype=int), weights=promoted["Rows"].to_numpy())
+
+
+def career_kpis(agg, year, where=None):
+    return career.facts_kpis(promotion_facts(agg), year, where)
+
+
+def workforce_results(agg, year):
+    active = agg.cube[_active(agg.cube)]
+
+    def headcount(by):
+        return workforce.headcount_table(active.groupby(["Calendar Year", by])["Rows"].sum(), by)
+
+    return workforce.WorkforceResults(
+        year=year,
+        kpis=workforce_kpis(agg, year),
+        headcount_by_level=headcount("Position/Level"),
+        headcount_by_generation=headcount("Generation"),
+        **workforce.sheet_series(agg.sheets, year),
+    )
+
+
+def attrition_results(agg, year):
+    cube = agg.cube
+    active = _active(cube)
+    # ResignedFlag and Retention summed over the rows behind each cube entry
+    counts = cube.assign(ResignedFlag=cube["Rows"].where(~active, 0), Retention=cube["Rows"].where(active, 0))
+    by_year = counts.groupby("Year")
+    retention_rate = (by_year["Retention"].sum() / by_year["Rows"].sum()).rename("Retention").reset_index()
+    retention_rate["RetentionRatePct"] = retention_rate["Retention"] * 100
+
+    first, last = agg.years[0], agg.years[-1]
+    years = cube["Year"].between(first, last)
+    by_generation = attrition.retention_by_generation(
+        cube[years].groupby(["Year", "Generation"])["Rows"].sum(),
+        cube[years & active].groupby(["Year", "Generation"])["Rows"].sum(),
+    )
+
+    exits = agg.exits
+    exits = exits[exits["Year"].between(first, last) & exits["Status"].isin(["Voluntary", "Involuntary"])]
+    by_type = exits.groupby(["Year", "Status"])["Count"].sum().reset_index()
+
+    leavers = counts[(counts["Year"] == year) & (counts["ResignedFlag"] > 0)]
+    month = leavers["Resignation Month"].map(dict(enumerate(attrition.MONTHS, 1))).rename("Month")
+    monthly = leavers.groupby(month)["ResignedFlag"].sum().reindex(attrition.MONTHS).reset_index(name="AttritionCount")
+
+    return attrition.AttritionResults(
+        year=year,
+        kpis=attrition_kpis(agg, year),
+        resigned_per_year=by_year["ResignedFlag"].sum().reset_index(name="Resigned"),
+        retention_by_gender=counts.groupby(["Year", "Gender"])["Retention"].sum().reset_index(),
+        retention_rate=retention_rate,
+        retention_by_generation=by_generation,
+        monthly_attrition=monthly,
+        attrition_by_type=by_type,
+        net_change=attrition.net_change_series(agg.sheets),
+    )
+
+
+def career_results(agg, year):
+    facts = promotion_facts(agg)
+    return career.results_from(year, career.facts_kpis(facts, year), facts, tenure_histograms(agg))
+
+
+RESULTS = {
+    "workforce": (workforce.results, workforce_results),
+    "attrition": (attrition.results, attrition_results),
+    "career": (career.results, career_results),
+}
+
+
+# -----------------------------
+# Checking against the in-memory path
+# -----------------------------
+def _differences(name, expected, actual):
+    if isinstance(expected, (pd.DataFrame, pd.Series)):
+        assert_equal = (pd.testing.assert_frame_equal if isinstance(expected, pd.DataFrame)
+                        else pd.testing.assert_series_equal)
+        try:
+            assert_equal(expected, actual, check_exact=True)
+        except AssertionError as error:
+            return [f"{name}: {str(error).splitlines()[0]}"]
+        return []
+    if isinstance(expected, dict):
+        return [difference for key in expected.keys() | actual.keys()
+                for difference in _differences(f"{name}.{key}", expected.get(key), actual.get(key))]
+    return [] if expected == actual else [f"{name}: {expected!r} != {actual!r}"]
+
+
+def differences(ds, agg, years=None):
+    """Every KPI and tab series where the aggregates disagree with the in-memory Datasets; [] when identical"""
+    found = []
+    for year in years or ds.years:
+        for name, (in_memory, streamed) in RESULTS.items():
+            expected, actual = in_memory(ds, year), streamed(agg, year)
+            for field in expected.__dataclass_fields__:
+                found += _differences(f"{name} {year} {field}", getattr(expected, field), getattr(actual, field))
+        found += _differences(f"survey {year} kpis", survey.kpis(ds, year), survey_kpis(agg, year))
+        for column in data_loader.SLICE_COLUMNS:
+            for value in agg.slice_values(column):
+                where = {column: value}
+                found += _differences(f"attrition {year} {where}", attrition.kpis(ds, year, where),
+                                      attrition_kpis(agg, year, where))
+                found += _differences(f"career {year} {where}", career.kpis(ds, year, where),
+                                      career_kpis(agg, year, where))
+    return found
@@ -0,0 +1,304 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cache import cached
+from schema import SCORE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Survey & engagement KPIs (from Emp Engagement and Participation)
+# -----------------------------
+
+
+def engagement_score(rows):
+    """Weighted engagement score (Outstanding=100, Average=50, Needs Improvement=0)"""
+    outstanding = rows["Outstanding"].mean() * 100
+    average = rows["Average"].mean() * 100
+    needs_improvement = rows["Needs Improvement"].mean() * 100
+    return (outstanding + (average * 0.5)) / (outstanding + average + needs_improvement) * 100
+
+
+def dimension_scores(rows):
+    """Per-dimension score on a 0-100 scale"""
+    return (rows["Outstanding"] * 100 + rows["Average"] * 50) / 150 * 100
+
+
+@cached
+def kpis(ds, year):
+    engagement = ds.engagement
+    participation = ds.participation
+    engagement_year = engagement[engagement["Year"] == int(year)]
+    participation_year = participation[participation["Year"] == int(year)]
+
+    participation_rate = participation_year["Participation Rate"].iloc[0] * 100 if not participation_year.empty else 0
+
+    if engagement_year.empty:
+        return {
+            "engagement_score": 0,
+            "top_dimension": "N/A",
+            "top_dimension_score": 0,
+            "needs_improvement_areas": 0,
+            "yoy_change": 0,
+            "participation_rate": participation_rate,
+        }
+
+    avg_engagement_score = engagement_score(engagement_year)
+
+    # Top rated dimension
+    scores = engagement_year.assign(Score=dimension_scores(engagement_year))
+    top_dimension = scores.nlargest(1, "Score").iloc[0]
+
+    # YoY Change (if previous year data exists)
+    engagement_previous = engagement[engagement["Year"] == int(year) - 1]
+    yoy_change = avg_engagement_score - engagement_score(engagement_previous) if not engagement_previous.empty else 0
+
+    return {
+        "engagement_score": avg_engagement_score,
+        "top_dimension": top_dimension["Dimensions"],
+        "top_dimension_score": top_dimension["Score"],
+        # Dimensions scoring below 60%
+        "needs_improvement_areas": int((scores["Score"] < 60).sum()),
+        "yoy_change": yoy_change,
+        "participation_rate": participation_rate,
+    }
+
+
+# -----------------------------
+# Driver analysis (RandomForest feature importance + correlations)
+# -----------------------------
+RESIGNATION_FEATURES = ["Tenure", "Position/Level", "Generation", "Gender", "Promotion & Transfer"]
+PROMOTION_FEATURES = ["Tenure", "Position/Level", "Generation", "Gender"]
+CATEGORICAL_FEATURES = ["Position/Level", "Generation", "Gender"]
+
+# Written by tune_models.py; without it every model uses DEFAULT_FOREST
+MODEL_CONFIG = "model_config.json"
+DEFAULT_FOREST = {"n_estimators": 100, "random_state": 42}
+
+
+def encode_features(frame, features, target):
+    """Label-encode the categorical features (validated at ingest, so never blank)"""
+    from sklearn.preprocessing import LabelEncoder
+
+    le = LabelEncoder()
+    encoded = frame[features + [target]].copy()
+    for col in CATEGORICAL_FEATURES:
+        if col in encoded.columns:
+            encoded[col] = le.fit_transform(encoded[col])
+    return encoded
+
+
+def fit_forest(encoded, features, target, params=None):
+    from sklearn.ensemble import RandomForestClassifier
+
+    rf = RandomForestClassifier(**(params or DEFAULT_FOREST))
+    rf.fit(encoded[features], encoded[target])
+    return rf
+
+
+def driver_importance(encoded, features, target, rf=None):
+    """Return (importance_df, correlations) for a binary target"""
+    if rf is None:
+        rf = fit_forest(encoded, features, target)
+
+    importance_df = pd.DataFrame({
+        "Driver": features,
+        "Importance": rf.feature_importances_
+    }).sort_values("Importance", ascending=False)
+    importance_df["Importance %"] = (importance_df["Importance"] * 100).round(1)
+
+    correlations = encoded[features + [target]].corr()[target].drop(target).sort_values(ascending=False)
+    return importance_df, correlations
+
+
+def resignation_features(ds):
+    """Encoded resignation features for every row of the Data sheet (same index as ds.raw)"""
+    df_analysis = ds.raw.assign(Resigned=ds.raw["ResignedFlag"])
+    return encode_features(df_analysis, RESIGNATION_FEATURES, "Resigned")
+
+
+def promotion_features(ds):
+    """Encoded promotion features for the active rows of the Data sheet"""
+    active = ds.raw[ds.raw["Resignee Checking"] == "ACTIVE"]
+    df_promo = active.assign(Promoted=active["Promotion & Transfer"].eq(1).astype(int))
+    return encode_features(df_promo, PROMOTION_FEATURES, "Promoted")
+
+
+# model -> (encoder, features, target)
+MODELS = {
+    "resignation": (resignation_features, RESIGNATION_FEATURES, "Resigned"),
+    "promotion": (promotion_features, PROMOTION_FEATURES, "Promoted"),
+}
+
+
+@cached
+def _tuned_params(ds, modified):
+    """{model: params} from MODEL_CONFIG, read once per data version and file modification time"""
+    try:
+        with open(MODEL_CONFIG) as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if config.get("data_version") != ds.version:
+        logger.warning("Ignoring %s: tuned on data version %s, not %s", MODEL_CONFIG, config.get("data_version"),
+                       ds.version)
+        return {}
+    return {model: entry.get("params", {}) for model, entry in config.get("models", {}).items()}
+
+
+def model_params(ds, model):
+    """RandomForest settings for a model: the ones tuned on this data in MODEL_CONFIG if present, else DEFAULT_FOREST"""
+    try:
+        modified = os.stat(MODEL_CONFIG).st_mtime_ns
+    except OSError:
+        return dict(DEFAULT_FOREST)
+    return {**DEFAULT_FOREST, **_tuned_params(ds, modified).get(model, {})}
+
+
+# The settings are part of the cache key, so a new MODEL_CONFIG refits
+# instead of serving models pickled under the old one
+@cached(persist=True)
+def fitted_model(ds, model, params):
+    """RandomForest for one of MODELS, fitted once per data version and settings"""
+    encoder, features, target = MODELS[model]
+    return fit_forest(encoder(ds), features, target, params)
+
+
+@cached(persist=True)
+def drivers(ds, model, params):
+    encoder, features, target = MODELS[model]
+    return driver_importance(encoder(ds), features, target, rf=fitted_model(ds, model, params))
+
+
+def resignation_model(ds):
+    """RandomForest predicting resignation"""
+    return fitted_model(ds, "resignation", model_params(ds, "resignation"))
+
+
+def resignation_drivers(ds):
+    return drivers(ds, "resignation", model_params(ds, "resignation"))
+
+
+def promotion_drivers(ds):
+    return drivers(ds, "promotion", model_params(ds, "promotion"))
+
+
+# -----------------------------
+# Year-over-year significance (bootstrap)
+# -----------------------------
+# The Data sheet holds every employee's 1-5 score on each SCORE_COLUMNS
+# dimension per year. Each year's employees are resampled whole (all their
+# scores together, so the dimensions stay correlated) with one
+# (REPLICATES x employees) index array per year, shared by every dimension and
+# by Overall, the mean of an employee's scores (their Survey Average). A
+# replicate's change is the difference of the two years' resampled means.
+# The engagement file only publishes rating shares, with no per-respondent
+# ratings, so its dimensions get no interval or p-value.
+REPLICATES = 2000
+BOOTSTRAP_SEED = 0
+# Two-sided significance level of the markers
+ALPHA = 0.05
+OVERALL = "Overall"
+
+
+def dimension_engagement(rows):
+    """engagement_score of each dimension on its own, indexed by Dimensions"""
+    shares = rows.set_index("Dimensions")
+    return (shares["Outstanding"] + shares["Average"] * 0.5) / shares[RATINGS].sum(axis=1) * 100
+
+
+def dimension_changes(ds, year):
+    """Each engagement file dimension's score, previous year's score and change; None without a previous year"""
+    engagement = ds.engagement
+    current = engagement[engagement["Year"] == int(year)]
+    previous = engagement[engagement["Year"] == int(year) - 1]
+    if current.empty or previous.empty:
+        return None
+    out = pd.DataFrame({"Score": dimension_engagement(current),
+                        "Previous Score": dimension_engagement(previous)}).dropna()
+    out["Change"] = out["Score"] - out["Previous Score"]
+    return out.rename_axis("Dimensions").reset_index()
+
+
+def employee_scores(ds, year):
+    """(employees x SCORE_COLUMNS + Overall) array of one year's Data sheet scores"""
+    scores = ds.raw.loc[ds.raw["Year"] == int(year), SCORE_COLUMNS].to_numpy(dtype=np.float64)
+    return np.column_stack([scores, scores.mean(axis=1)])
+
+
+def _replicate_means(scores, rng):
+    """(columns x REPLICATES) bootstrap means, drawing whole employees with one 2-D index array"""
+    index = rng.integers(0, len(scores), size=(REPLICATES, len(scores)))
+    return np.stack([column[index].mean(axis=1) for column in scores.T])
+
+
+@cached
+def yoy_significance(ds, year):
+    """YoY change of each Data sheet score and Overall with a 95% bootstrap interval and p-value; None without a previous year"""
+    scores, previous = employee_scores(ds, year), employee_scores(ds, int(year) - 1)
+    if not len(scores) or not len(previous):
+        return None
+
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    deltas = _replicate_means(scores, rng) - _replicate_means(previous, rng)
+    low, high = np.percentile(deltas, [100 * ALPHA / 2, 100 * (1 - ALPHA / 2)], axis=1)
+    # Share of replicates on the far side of zero, both tails, with the +1 correction
+    tail = np.minimum((deltas <= 0).sum(axis=1), (deltas >= 0).sum(axis=1))
+    out = pd.DataFrame({
+        "Dimensions": SCORE_COLUMNS + [OVERALL],
+        "Score": scores.mean(axis=0),
+        "Previous Score": previous.mean(axis=0),
+        "Change Low": low,
+        "Change High": high,
+        "p-value": np.minimum(1.0, 2 * (tail + 1) / (REPLICATES + 1)),
+        "Employees": len(scores),
+        "Previous Employees": len(previous),
+    })
+    out.insert(3, "Change", out["Score"] - out["Previous Score"])
+    out["Significant"] = out["p-value"] < ALPHA
+    return out
+
+
+# -----------------------------
+# Everything the Survey tab draws for one year
+# -----------------------------
+RATINGS = ["Outstanding", "Average", "Needs Improvement"]
+
+
+@dataclass(frozen=True)
+class SurveyResults:
+    year: int
+    kpis: dict
+    ratings_breakdown: pd.DataFrame   # Dimensions x rating, in percent
+    resignation_drivers: tuple        # (importance_df, correlations)
+    promotion_drivers: tuple
+    dimension_changes: pd.DataFrame   # per engagement file dimension; None without a previous year
+    yoy_significance: pd.DataFrame    # per Data sheet score + Overall; None without a previous year
+
+
+def ratings_breakdown(ds, year):
+    """Share of each rating per dimension, in percent"""
+    engagement = ds.engagement
+    rows = engagement[engagement["Year"] == int(year)]
+    long = rows.melt(id_vars=["Dimensions", "Year"], value_vars=RATINGS,
+                     var_name="Rating Type", value_name="Score")
+    long["Score %"] = long["Score"] * 100
+    return long.pivot(index="Dimensions", columns="Rating Type", values="Score %").fillna(0)
+
+
+@cached
+def results(ds, year):
+    return SurveyResults(
+        year=year,
+        kpis=kpis(ds, year),
+        ratings_breakdown=ratings_breakdown(ds, year),
+        resignation_drivers=resignation_drivers(ds),
+        promotion_drivers=promotion_drivers(ds),
+        dimension_changes=dimension_changes(ds, year),
+        yoy_significance=yoy_significance(ds, year),
+    )
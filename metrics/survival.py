@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from cache import cached
+
+# -----------------------------
+# Kaplan–Meier tenure survival (from the Data sheet)
+# -----------------------------
+# The Data sheet is a yearly panel, so it is first collapsed to one row per
+# employee (Full Name and Year Joined, so namesakes stay apart): months from
+# Year Joined to Resignation Date for leavers, and to the end of the last year
+# they appear in for everyone still active (right-censored). Every stratum is
+# then estimated in one sorted pass; there is no Python loop over groups.
+
+STRATA = {
+    "All": None,
+    "Join Cohort": "Cohort",
+    "Generation": "Generation",
+    "Position/Level": "Position/Level",
+}
+
+
+@cached
+def employees(ds):
+    """One row per employee: Cohort, Generation, Position/Level, Months, Resigned"""
+    raw = ds.raw
+    per_employee = raw.groupby(["Full Name", "Year Joined"], sort=False).agg(
+        joined=("Year Joined", "min"),
+        last_year=("Year", "max"),
+        resigned_on=("Resignation Date", "max"),
+        resigned=("ResignedFlag", "max"),
+        generation=("Generation", "first"),
+        level=("Position/Level", "first"),
+    )
+    joined_months = per_employee["joined"].dt.year * 12 + per_employee["joined"].dt.month - 1
+    resigned_months = per_employee["resigned_on"].dt.year * 12 + per_employee["resigned_on"].dt.month - 1
+    # Still active: observed through December of the last year on file
+    censored_months = per_employee["last_year"] * 12 + 11
+    resigned = per_employee["resigned"].eq(1) & per_employee["resigned_on"].notna()
+    months = np.where(resigned, resigned_months - joined_months, censored_months - joined_months)
+
+    return pd.DataFrame({
+        "Cohort": per_employee["joined"].dt.year.astype("Int64").to_numpy(),
+        "Generation": per_employee["generation"].to_numpy(),
+        "Position/Level": per_employee["level"].to_numpy(),
+        "Months": np.clip(months, 0, None).astype(int),
+        "Resigned": resigned.to_numpy().astype(int),
+    })
+
+
+def kaplan_meier(strata, durations, events):
+    """Product-limit estimate for every stratum at once.
+
+    Returns a frame with one row per (stratum, distinct duration): at-risk
+    count, events, censored and the survival probability just after it.
+    """
+    frame = pd.DataFrame({"Stratum": strata, "Months": durations, "Events": events})
+    frame = frame.dropna(subset=["Stratum"])
+    table = (
+        frame.groupby(["Stratum", "Months"], sort=True)["Events"]
+        .agg(["sum", "size"])
+        .rename(columns={"sum": "Events", "size": "Exits"})
+        .reset_index()
+    )
+    stratum = table["Stratum"].to_numpy()
+    exits = table["Exits"].to_numpy()
+    deaths = table["Events"].to_numpy()
+
+    # Offsets of each stratum's first row in the sorted table
+    starts = np.flatnonzero(np.r_[True, stratum[1:] != stratum[:-1]])
+    lengths = np.diff(np.r_[starts, len(table)])
+    start_of_row = np.repeat(starts, lengths)
+
+    def cumsum_within(values):
+        total = np.cumsum(values)
+        before_stratum = np.r_[0, total][start_of_row]
+        return total - before_stratum
+
+    # Everyone in the stratum who has not exited before this duration
+    stratum_sizes = np.repeat(np.add.reduceat(exits, starts), lengths)
+    at_risk = stratum_sizes - cumsum_within(exits) + exits
+
+    # S(t) = prod(1 - d/n) as exp(sum(log(...))); a factor of zero (everyone
+    # left) is tracked separately because log(0) would poison the sum
+    factor = 1 - deaths / at_risk
+    is_zero = factor <= 0
+    log_factor = np.log(np.where(is_zero, 1.0, factor))
+    survival = np.exp(cumsum_within(log_factor))
+    survival[cumsum_within(is_zero) > 0] = 0.0
+
+    table["At Risk"] = at_risk
+    table["Censored"] = exits - deaths
+    table["Survival"] = survival
+    table["Years"] = table["Months"] / 12
+    return table[["Stratum", "Months", "Years", "At Risk", "Events", "Censored", "Survival"]]
+
+
+@cached
+def curves(ds, by="All"):
+    """Kaplan–Meier curves for every value of one STRATA key"""
+    emp = employees(ds)
+    column = STRATA[by]
+    if column is None:
+        strata = np.full(len(emp), "All", dtype=object)
+    else:
+        strata = emp[column].astype(str).where(emp[column].notna()).to_numpy()
+    return kaplan_meier(strata, emp["Months"].to_numpy(), emp["Resigned"].to_numpy())
+
+
+@cached
+def medians(ds, by="All"):
+    """Employees, leavers and median years to resignation per stratum (NaN if never below 50%)"""
+    curve = curves(ds, by)
+    crossed = curve[curve["Survival"] <= 0.5].groupby("Stratum")["Years"].min()
+    summary = curve.groupby("Stratum").agg(Employees=("At Risk", "max"), Leavers=("Events", "sum"))
+    summary["Median Years"] = crossed.reindex(summary.index)
+    return summary.reset_index()
@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cache import cached
+from data_loader import SLICE_COLUMNS
+from metrics import attrition, pct
+
+# -----------------------------
+# Monthly prefix sums for arbitrary date ranges
+# -----------------------------
+# Every flow (joins, resignations, promotions) is counted per (segment,
+# month) once per data version and stored as a running total, so the count
+# over any [start, end] month range is prefix[end + 1] - prefix[start]: two
+# lookups and a subtraction per segment, however many rows the Data sheet has.
+#
+# The Data sheet dates joins (Year Joined) and promotions (one flag per
+# Calendar Year) to the year only, so both land in January of their year.
+# Resignations are dated to the day and land in their own month; the months
+# are extended to cover any resignation dated outside the Calendar Years.
+# Voluntary / Involuntary comes from the exits joined to the Data sheet
+# (metrics.attrition.exits); exits that could not be matched are counted in
+# unmatched_exits rather than placed in a month.
+
+FLOWS = ["Joins", "Voluntary", "Involuntary", "Resignations", "Promotions & Transfers"]
+
+
+@dataclass(frozen=True)
+class Timeline:
+    months: pd.DatetimeIndex   # first day of every month covered by the data
+    segments: pd.DataFrame     # one row per (Position/Level, Gender, Generation)
+    prefix: dict               # flow -> int array [segment, month + 1], prefix[:, 0] == 0
+    headcount: np.ndarray      # employees on the books per [segment, month]
+    headcount_months: np.ndarray  # running total of headcount, [segment, month + 1]
+    unmatched_exits: int = 0   # attrition file exits missing from the Voluntary / Involuntary flows
+
+    def month_index(self, month):
+        """Position of a month (any date inside it) in self.months"""
+        month, first = pd.Timestamp(month), self.months[0]
+        index = (month.year - first.year) * 12 + month.month - first.month
+        if not 0 <= index < len(self.months):
+            raise ValueError(f"{month:%Y-%m} is outside {first:%Y-%m} – {self.months[-1]:%Y-%m}")
+        return index
+
+    def rows(self, where=None):
+        """Segment rows matching a {column: value} slice"""
+        if not where:
+            return slice(None)
+        mask = np.ones(len(self.segments), dtype=bool)
+        for column, value in where.items():
+            mask &= self.segments[column].to_numpy() == value
+        return np.flatnonzero(mask)
+
+    def totals(self, start, end, where=None):
+        """Flows over the months start..end (inclusive), plus headcount and attrition rate"""
+        a, b = self.month_index(start), self.month_index(end)
+        if a > b:
+            raise ValueError("start must not be after end")
+        rows = self.rows(where)
+        out = {flow: int(self.prefix[flow][rows, b + 1].sum() - self.prefix[flow][rows, a].sum())
+               for flow in FLOWS}
+        months = b - a + 1
+        average = (self.headcount_months[rows, b + 1].sum() - self.headcount_months[rows, a].sum()) / months
+        out["Months"] = int(months)
+        out["Starting Headcount"] = int(self.headcount[rows, a].sum())
+        out["Ending Headcount"] = int(self.headcount[rows, b].sum())
+        out["Average Headcount"] = float(average)
+        out["Attrition Rate (%)"] = float(pct(out["Resignations"], average))
+        return out
+
+    def monthly(self, start, end, where=None):
+        """Per-month flows and headcount over start..end, one row per month"""
+        a, b = self.month_index(start), self.month_index(end)
+        rows = self.rows(where)
+        frame = pd.DataFrame({"Month": self.months[a:b + 1]})
+        for flow in FLOWS:
+            frame[flow] = np.diff(self.prefix[flow][rows][:, a:b + 2].sum(axis=0))
+        frame["Headcount"] = self.headcount[rows, a:b + 1].sum(axis=0)
+        return frame
+
+
+def _prefix(counts):
+    out = np.zeros((counts.shape[0], counts.shape[1] + 1), dtype=np.int64)
+    np.cumsum(counts, axis=1, out=out[:, 1:])
+    return out
+
+
+@cached
+def timeline(ds):
+    raw = ds.raw
+    groups = raw.groupby(SLICE_COLUMNS, sort=True)
+    codes = groups.ngroup().to_numpy()
+    segments = groups.size().index.to_frame(index=False)
+    n_segments = len(segments)
+
+    # The range is whatever the Data sheet covers: January of its first
+    # Calendar Year to December of its last, widened to every resignation date
+    resigned = raw["ResignedFlag"].eq(1).to_numpy()
+    dates = pd.concat([
+        raw["Calendar Year"],
+        pd.Series([pd.Timestamp(year=int(raw["Year"].max()), month=12, day=1)]),
+        raw["Resignation Date"][resigned],
+    ])
+    first, last = dates.min().to_period("M"), dates.max().to_period("M")
+    months = pd.period_range(first, last, freq="M")
+    n_months = len(months)
+
+    def month_of(dates):
+        periods = dates.dt.to_period("M")
+        return (periods.dt.year.to_numpy() - first.year) * 12 + periods.dt.month.to_numpy() - first.month
+
+    def count(mask, month):
+        flat = codes[mask] * n_months + month[mask]
+        return np.bincount(flat, minlength=n_segments * n_months).reshape(n_segments, n_months)
+
+    year_start = month_of(raw["Calendar Year"])
+    joined = (raw["Year Joined"].dt.year == raw["Year"]).to_numpy()
+    resigned_month = np.where(resigned, month_of(raw["Resignation Date"].fillna(raw["Calendar Year"])), -1)
+    promoted = (raw["Resignee Checking"].eq("ACTIVE") & raw["Promotion & Transfer"].eq(1)).to_numpy()
+    # Voluntary / Involuntary of the Data sheet rows the attrition file's exits were matched to
+    status = np.full(len(raw), None, dtype=object)
+    exits = attrition.exits(ds)
+    if exits is not None:
+        matched = exits[exits["Matched"]]
+        status[matched["Row"].to_numpy(dtype=int)] = matched["Status"].to_numpy()
+
+    counts = {
+        "Joins": count(joined, year_start),
+        "Voluntary": count(resigned & (status == "Voluntary"), resigned_month),
+        "Involuntary": count(resigned & (status == "Involuntary"), resigned_month),
+        "Resignations": count(resigned, resigned_month),
+        "Promotions & Transfers": count(promoted, year_start),
+    }
+
+    # Each row is on the books from January of its year through its
+    # resignation month (or December): +1 / -1 at those bounds, then a cumsum
+    # (a resignation dated before its Calendar Year keeps the row off the books)
+    stop = np.maximum(np.where(resigned, resigned_month + 1, year_start + 12), year_start)
+    width = n_months + 1
+    delta = (np.bincount(codes * width + year_start, minlength=n_segments * width)
+             - np.bincount(codes * width + stop, minlength=n_segments * width))
+    headcount = np.cumsum(delta.reshape(n_segments, width), axis=1)[:, :n_months]
+
+    return Timeline(
+        months=months.to_timestamp(),
+        segments=segments,
+        prefix={flow: _prefix(values) for flow, values in counts.items()},
+        headcount=headcount,
+        headcount_months=_prefix(headcount),
+        unmatched_exits=attrition.unmatched_exits(ds),
+    )
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cache import cached
+
+# -----------------------------
+# Career transitions (Markov chain over the employee-year panel)
+# -----------------------------
+# Each employee's row in Calendar Year Y is linked to their row in Y + 1 (same
+# Full Name and Year Joined, so namesakes stay apart), giving one transition
+# per employee-year between the states {Position/Level values..., Resigned}:
+# a leaver's row moves to Resigned, an active row to the level it has the
+# next year. Active rows without a next year (the last year of the data) are
+# censored and left out. All transitions
+# are counted with one bincount over the encoded (year, from, to) triples;
+# projections N years ahead are powers of the yearly transition matrix.
+
+RESIGNED = "Resigned"
+
+
+@dataclass(frozen=True)
+class Transitions:
+    states: list         # the Position/Level values, then RESIGNED
+    years: list          # Y of every Y -> Y + 1 step
+    counts: np.ndarray   # employees per [step, from state, to state]
+
+    def _steps(self, first=None, last=None):
+        years = np.asarray(self.years)
+        first = years[0] if first is None else int(first)
+        last = years[-1] if last is None else int(last)
+        return (years >= first) & (years <= last)
+
+    def moves(self, first=None, last=None):
+        """Employee-year transitions observed over the steps first..last"""
+        return int(self.counts[self._steps(first, last)].sum())
+
+    def probabilities(self, first=None, last=None, absorbing=(RESIGNED,)):
+        """Row-stochastic yearly transition matrix pooled over the steps first..last
+
+        States in `absorbing` (and states never observed as a starting
+        point) keep everyone they get.
+        """
+        counts = self.counts[self._steps(first, last)].sum(axis=0).astype(float)
+        totals = counts.sum(axis=1, keepdims=True)
+        matrix = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+        for i, state in enumerate(self.states):
+            if state in absorbing or totals[i, 0] == 0:
+                matrix[i] = 0
+                matrix[i, i] = 1
+        return matrix
+
+    def matrix(self, first=None, last=None):
+        """Yearly transition shares in percent, From state (rows) x To state (columns)"""
+        return pd.DataFrame(self.probabilities(first, last) * 100,
+                            index=pd.Index(self.states, name="From"), columns=pd.Index(self.states, name="To"))
+
+    def project(self, start, years_ahead, first=None, last=None):
+        """Share (%) of employees starting in `start` who are in each state 1..years_ahead years later"""
+        matrix = self.probabilities(first, last)
+        row = self.states.index(start)
+        shares = np.stack([np.linalg.matrix_power(matrix, n)[row] for n in range(1, years_ahead + 1)])
+        frame = pd.DataFrame(shares * 100, columns=self.states)
+        frame.insert(0, "Years Ahead", np.arange(1, years_ahead + 1))
+        return frame
+
+    def within(self, start, target, years_ahead, first=None, last=None):
+        """Share (%) of employees starting in `start` who reach `target` at least once within years_ahead years"""
+        # Making the target absorbing turns "in target at year N" into "reached it by year N"
+        matrix = self.probabilities(first, last, absorbing=(RESIGNED, target))
+        return float(np.linalg.matrix_power(matrix, years_ahead)[self.states.index(start), self.states.index(target)] * 100)
+
+
+@cached
+def transitions(ds):
+    raw = ds.raw
+    years = np.asarray(ds.years)
+    n_years = len(years)
+    levels = sorted(raw["Position/Level"].unique())
+    states = levels + [RESIGNED]
+    n_states = len(states)
+
+    # One integer key per (employee, year); the row of Y + 1 is found by a
+    # binary search for key + 1 in the sorted keys
+    person = pd.MultiIndex.from_frame(raw[["Full Name", "Year Joined"]]).factorize()[0]
+    year = np.searchsorted(years, raw["Year"].to_numpy(dtype=int))
+    key = person * n_years + year
+    order = np.argsort(key, kind="stable")
+    sorted_keys = key[order]
+    position = np.minimum(np.searchsorted(sorted_keys, key + 1), len(key) - 1)
+    # key + 1 of a last-year row is the next employee's first year: not a match
+    has_next = (sorted_keys[position] == key + 1) & (year < n_years - 1)
+    next_row = order[position]
+
+    level = pd.Categorical(raw["Position/Level"], categories=levels).codes
+    resigned = raw["ResignedFlag"].eq(1).to_numpy()
+    target = np.where(resigned, n_states - 1, level[next_row])
+    # The last year has no following year to observe, so it has no step
+    observed = (resigned | has_next) & (year < n_years - 1)
+
+    flat = (year[observed] * n_states + level[observed]) * n_states + target[observed]
+    counts = np.bincount(flat, minlength=n_years * n_states * n_states).reshape(n_years, n_states, n_states)
+    return Transitions(states=states, years=[int(y) for y in years[:-1]], counts=counts[:-1])
@@ -0,0 +1,125 @@
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from cache import cached
+from metrics import GENERATION_ORDER, sampling
+from metrics.binning import aggregate_scatter, prebin_histogram
+
+# -----------------------------
+# Workforce KPIs (from the HR_Analysis_Output sheets)
+# -----------------------------
+
+
+@cached
+def kpis(ds, year):
+    tenure = ds.output["Tenure Analysis"]
+    resign = ds.output["Resignation Trends"]
+    age = ds.output["Age Distribution"]
+
+    tenure_year = tenure[tenure["Year"] == year]
+    resign_year = resign[resign["Year"] == year]
+    age_year = age[age["Year"] == year]
+
+    active_count = int(tenure_year["Count"].sum()) if not tenure_year.empty else 0
+    leaver_count = int(resign_year["LeaverCount"].sum()) if not resign_year.empty else 0
+
+    return {
+        "total_headcount": active_count + leaver_count,
+        "active_employees": active_count,
+        "leavers": leaver_count,
+        "average_age": round(age_year["Age"].mean(), 1) if not age_year.empty else 0,
+        "median_age": float(age_year["Age"].median()) if not age_year.empty else 0,
+        "average_tenure": round(tenure_year["Tenure"].mean(), 1) if not tenure_year.empty else 0,
+        "median_tenure": float(tenure_year["Tenure"].median()) if not tenure_year.empty else 0,
+        "longest_tenure": float(tenure_year["Tenure"].max()) if not tenure_year.empty else 0,
+    }
+
+
+# -----------------------------
+# Everything the Workforce tab draws for one year
+# -----------------------------
+@dataclass(frozen=True)
+class WorkforceResults:
+    year: int
+    kpis: dict
+    headcount_by_level: pd.DataFrame       # Calendar Year, Position/Level, Headcount
+    headcount_by_generation: pd.DataFrame  # Calendar Year, Generation (ordered), Headcount
+    age_bins: pd.DataFrame                 # [Generation,] Age (bin center), Count, BinStart, BinEnd
+    gender_by_level: pd.DataFrame          # the year's Gender Diversity rows
+    gender_counts: pd.Series               # Count per Gender
+    tenure_points: pd.DataFrame            # Tenure Analysis plus Employees (marker size), grid-aggregated when large
+    # kpi -> (low, high) 95% interval; empty for exact results
+    intervals: dict = field(default_factory=dict)
+
+
+@cached
+def headcount(ds, by):
+    """Active employees per (Calendar Year, by)"""
+    raw = ds.raw
+    active = raw[raw["Resignee Checking"] == "ACTIVE"]
+    return headcount_table(active.groupby(["Calendar Year", by]).size(), by)
+
+
+def headcount_table(counts, by):
+    """headcount() from active employees counted per (Calendar Year, by)"""
+    counts = counts.reset_index(name="Headcount").sort_values("Calendar Year")
+    if by == "Generation":
+        counts["Generation"] = pd.Categorical(counts["Generation"], categories=GENERATION_ORDER, ordered=True)
+    return counts
+
+
+def sheet_series(ds, year):
+    """The series read from the (already aggregated) HR_Analysis_Output sheets"""
+    age = ds.output["Age Distribution"]
+    age_year = age[age["Year"] == year]
+    # Bin ages server-side so only the bin totals are sent to the browser
+    if "Generation" in age_year.columns:
+        generation = pd.Categorical(age_year["Generation"], categories=GENERATION_ORDER, ordered=True)
+        age_bins = prebin_histogram(age_year["Age"], weights=age_year["Count"],
+                                    by=pd.Series(generation, name="Generation"), nbins=25, x="Age", y="Count")
+    else:
+        age_bins = prebin_histogram(age_year["Age"], weights=age_year["Count"], nbins=25, x="Age", y="Count")
+
+    gender = ds.output["Gender Diversity"]
+    gender_year = gender[gender["Year"] == year]
+
+    return dict(
+        age_bins=age_bins,
+        gender_by_level=gender_year,
+        gender_counts=gender_year.groupby("Gender")["Count"].sum(),
+        # Grid-aggregated (and drawn with WebGL) once the sheet grows large
+        tenure_points=aggregate_scatter(ds.output["Tenure Analysis"], x="Tenure", y="Count",
+                                        by="YearJoined", size="Count", size_name="Employees"),
+    )
+
+
+@cached
+def results(ds, year):
+    return WorkforceResults(
+        year=year,
+        kpis=kpis(ds, year),
+        headcount_by_level=headcount(ds, "Position/Level"),
+        headcount_by_generation=headcount(ds, "Generation"),
+        **sheet_series(ds, year),
+    )
+
+
+@cached
+def approximate_results(ds, year):
+    """results() with the Data sheet headcounts estimated from the stratified sample
+
+    The KPIs and the other series come from the output sheets, which are
+    already aggregated and stay small, so they are exact.
+    """
+    sample = sampling.sample(ds)
+    by_generation = sampling.totals(sample, sample, "Active", by=("Calendar Year", "Generation"), name="Headcount")
+    by_generation["Generation"] = pd.Categorical(by_generation["Generation"], categories=GENERATION_ORDER, ordered=True)
+    return WorkforceResults(
+        year=year,
+        kpis=kpis(ds, year),
+        headcount_by_level=sampling.totals(sample, sample, "Active", by=("Calendar Year", "Position/Level"),
+                                           name="Headcount"),
+        headcount_by_generation=by_generation,
+        **sheet_series(ds, year),
+    )
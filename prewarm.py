@@ -0,0 +1,165 @@
+"""Warm the dashboard's caches before the first visitor and report readiness.
+
+Usage:
+    python prewarm.py                      # warm caches, then write .cache/ready.json
+    python prewarm.py --health-port 8502   # ...and keep serving GET /health (200 warm, 503 cold)
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import assets
+import data_loader
+import shared_store
+from metrics import attrition, career, drill, risk, search, survey, survival, timeline, transitions, workforce
+
+READY_FILE = os.path.join(".cache", "ready.json")
+PHOTOS = ["angelie.jpg", "catherine.jpg", "juliana.jpg"]
+
+
+# -----------------------------
+# Warming
+# -----------------------------
+def warm(ds, years=None):
+    """Compute every cached result for every tab and year; returns seconds per step"""
+    years = years or ds.years
+    timings = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        fn()
+        timings[name] = round(time.perf_counter() - start, 3)
+
+    def warm_assets():
+        assets.load_css("styles.css")
+        for photo in PHOTOS:
+            if os.path.exists(photo):
+                assets.thumbnail(photo, scale=2)
+
+    def warm_kpis():
+        for year in years:
+            workforce.kpis(ds, year)
+            attrition.kpis(ds, year)
+            career.kpis(ds, year)
+            survey.kpis(ds, year)
+        career.tenure_histograms(ds)
+        timeline.timeline(ds)
+        attrition.exits(ds)
+        search.name_index(ds)
+        drill.row_index(ds)
+        transitions.transitions(ds)
+        for by in survival.STRATA:
+            survival.medians(ds, by)
+
+    def warm_models():
+        survey.resignation_drivers(ds)
+        survey.promotion_drivers(ds)
+        risk.risk_scores(ds)
+
+    def warm_charts():
+        for year in years:
+            for domain in (workforce, attrition, career, survey):
+                domain.results(ds, year)
+
+    step("assets", warm_assets)
+    step("kpis", warm_kpis)
+    step("models", warm_models)
+    step("charts", warm_charts)
+    return timings
+
+
+# -----------------------------
+# Readiness
+# -----------------------------
+def write_ready(ds, timings):
+    status = {
+        "ready": True,
+        "data_version": ds.version,
+        "pid": os.getpid(),
+        "warmed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "timings": timings,
+    }
+    os.makedirs(os.path.dirname(READY_FILE), exist_ok=True)
+    tmp_path = f"{READY_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp_path, READY_FILE)
+    return status
+
+
+def clear_ready():
+    if os.path.exists(READY_FILE):
+        os.remove(READY_FILE)
+
+
+def read_status():
+    try:
+        with open(READY_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"ready": False}
+
+
+def is_ready(status=None):
+    """Warm for the data currently on disk (a changed workbook makes the instance cold again)"""
+    status = status or read_status()
+    return bool(status.get("ready")) and status.get("data_version") == data_loader.data_version()
+
+
+def warm_and_mark(ds, years=None):
+    return write_ready(ds, warm(ds, years))
+
+
+# -----------------------------
+# Health endpoint
+# -----------------------------
+class HealthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/health", "/ready"):
+            self.send_error(404)
+            return
+        status = read_status()
+        ready = is_ready(status)
+        body = json.dumps({**status, "ready": ready}).encode()
+        self.send_response(200 if ready else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_health(port, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), HealthHandler)
+    print(f"Health endpoint on http://{host}:{port}/health")
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm dashboard caches and report readiness.")
+    parser.add_argument("--years", type=int, nargs="+", help="years to warm (default: all years in the data)")
+    parser.add_argument("--health-port", type=int, help="keep serving /health on this port after warming")
+    args = parser.parse_args(argv)
+
+    if args.health_port:
+        # Answer 503 while warming instead of refusing connections
+        threading.Thread(target=serve_health, args=(args.health_port,), daemon=True).start()
+
+    clear_ready()
+    start = time.perf_counter()
+    ds = shared_store.open_datasets(parallel=True)
+    loaded = time.perf_counter() - start
+    status = warm_and_mark(ds, args.years)
+    print(f"Data version {ds.version} warm in {time.perf_counter() - start:.2f}s (load {loaded:.2f}s, {status['timings']})")
+
+    if args.health_port:
+        threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
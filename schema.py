@@ -0,0 +1,251 @@
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# -----------------------------
+# Declarative sheet schemas
+# -----------------------------
+# Every sheet the dashboard reads is checked and coerced once, at ingest, so
+# metrics and tab modules can rely on clean dtypes instead of re-parsing
+# values on every rerun. A validated frame carries attrs["validated"] = the
+# schema name.
+
+SCORE_COLUMNS = [
+    "Corporate Culture", "Job Satisfaction", "Pay/Benefits", "Job Content and Design",
+    "Management", "Respect", "Innovation", "Career", "Work/Life", "Leadership",
+    "Communication", "Appraisals",
+]
+
+
+@dataclass(frozen=True)
+class Column:
+    """One expected column.
+
+    kind is "str", "int", "float", "datetime", "flag" (1/YES/TRUE -> 1,
+    0/NO/FALSE -> 0) or "year" (a datetime or a number, stored as an int).
+    case ("upper", "title", "capitalize") is applied to stripped strings.
+    """
+    name: str
+    kind: str
+    required: bool = True
+    nullable: bool = False
+    case: str = None
+    values: tuple = None
+    min: float = None
+    max: float = None
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    columns: tuple
+    # Rows with a blank or unparseable value in any key column (footer notes,
+    # spacer rows) are dropped instead of being reported
+    key: tuple = ()
+
+
+@dataclass(frozen=True)
+class Problem:
+    sheet: str
+    column: str
+    issue: str
+    rows: int = 0
+    examples: tuple = field(default_factory=tuple)
+
+    def __str__(self):
+        text = f"{self.sheet} / {self.column}: {self.issue}"
+        if self.examples:
+            text += f" ({self.rows} rows, e.g. {', '.join(map(repr, self.examples))})"
+        elif self.rows:
+            text += f" ({self.rows} rows)"
+        return text
+
+
+class SchemaError(ValueError):
+    """One or more source sheets do not match their schema"""
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("Source data failed validation:\n" + "\n".join(f"  - {p}" for p in self.problems))
+
+
+# -----------------------------
+# Coercion
+# -----------------------------
+_FLAGS = {"1": 1, "YES": 1, "TRUE": 1, "0": 0, "NO": 0, "FALSE": 0}
+
+
+def _coerce(values, column):
+    kind = column.kind
+    if kind == "str":
+        text = values.where(values.isna(), values.astype(str)).str.strip()
+        if column.case:
+            text = getattr(text.str, column.case)()
+        return text.mask(text.eq(""))
+    if kind == "datetime":
+        return pd.to_datetime(values, errors="coerce")
+    if kind == "year":
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values.dt.year.astype("float")
+        return pd.to_numeric(values, errors="coerce")
+    if kind == "flag":
+        text = values.astype(str).str.strip().str.upper()
+        return text.map(_FLAGS).fillna(pd.to_numeric(text, errors="coerce"))
+    return pd.to_numeric(values, errors="coerce")
+
+
+def _examples(values, mask, limit=3):
+    return tuple(values[mask].drop_duplicates().head(limit).tolist())
+
+
+def check(frame, schema):
+    """Coerce a frame to its schema; returns (frame, [Problem, ...])"""
+    frame = frame.copy()
+    frame.columns = [name.strip() if isinstance(name, str) else name for name in frame.columns]
+    problems = []
+    coerced = {}
+
+    for column in schema.columns:
+        if column.name not in frame.columns:
+            if column.required:
+                problems.append(Problem(schema.name, column.name, "missing column"))
+            continue
+        coerced[column.name] = _coerce(frame[column.name], column)
+
+    # Drop footer / spacer rows before judging the remaining values
+    keep = pd.Series(True, index=frame.index)
+    for name in schema.key:
+        if name in coerced:
+            keep &= coerced[name].notna()
+
+    for column in schema.columns:
+        if column.name not in coerced:
+            continue
+        original = frame[column.name][keep]
+        values = coerced[column.name][keep]
+        blank = original.isna() | original.astype(str).str.strip().eq("")
+
+        unparsed = values.isna() & ~blank
+        if column.kind in ("int", "year"):
+            unparsed |= values.notna() & values.mod(1).ne(0)
+        if unparsed.any():
+            problems.append(Problem(schema.name, column.name, f"not a valid {column.kind}",
+                                    int(unparsed.sum()), _examples(original, unparsed)))
+        if not column.nullable and blank.any():
+            problems.append(Problem(schema.name, column.name, "blank values", int(blank.sum())))
+        if column.values is not None:
+            unknown = values.notna() & ~values.isin(column.values)
+            if unknown.any():
+                problems.append(Problem(schema.name, column.name, f"expected one of {list(column.values)}",
+                                        int(unknown.sum()), _examples(original, unknown)))
+        if column.min is not None or column.max is not None:
+            low = values < column.min if column.min is not None else False
+            high = values > column.max if column.max is not None else False
+            out_of_range = values.notna() & (low | high)
+            if out_of_range.any():
+                problems.append(Problem(schema.name, column.name, f"outside [{column.min}, {column.max}]",
+                                        int(out_of_range.sum()), _examples(original, out_of_range)))
+
+    frame = frame[keep]
+    if problems:
+        return frame, problems
+
+    for column in schema.columns:
+        if column.name not in coerced:
+            continue
+        values = coerced[column.name][keep]
+        if column.kind in ("int", "flag", "year") and not column.nullable:
+            values = values.astype("int64")
+        frame[column.name] = values
+    frame = frame.reset_index(drop=True)
+    frame.attrs["validated"] = schema.name
+    return frame, problems
+
+
+def validate(frame, schema):
+    """Coerce a frame to its schema, raising SchemaError with every problem found"""
+    frame, problems = check(frame, schema)
+    if problems:
+        raise SchemaError(problems)
+    return frame
+
+
+def is_validated(frame, schema=None):
+    name = frame.attrs.get("validated")
+    return name is not None and (schema is None or name == schema.name)
+
+
+# -----------------------------
+# Source sheets
+# -----------------------------
+RAW = Schema("HR Cleaned Data / Data", (
+    Column("Calendar Year", "datetime"),
+    Column("Full Name", "str"),
+    Column("Age", "int", min=0),
+    Column("Position/Level", "str"),
+    Column("Year Joined", "datetime"),
+    Column("Gender", "str", case="capitalize"),
+    Column("Resignee Checking", "str", case="upper", values=("ACTIVE", "LEAVER")),
+    Column("Resignation Date", "datetime", nullable=True),
+    Column("Generation", "str", case="title"),
+    Column("Tenure", "int", min=0),
+    Column("Promotion & Transfer", "flag", values=(0, 1)),
+    Column("Age Bucket", "str", required=False, nullable=True, case="capitalize"),
+) + tuple(Column(name, "int", min=1, max=5) for name in SCORE_COLUMNS), key=("Calendar Year",))
+
+SUMMARY = Schema("HR Cleaned Data / Summary", (
+    Column("Year", "year"),
+    Column("Starting Headcount", "int"),
+    Column("Joins", "int"),
+    Column("Resignations", "int"),
+    Column("Ending Headcount", "int"),
+    Column("Retention Rate (%)", "float"),
+    Column("Attrition Rate(%)", "float"),
+    Column("Net Change", "int"),
+), key=("Year",))
+
+ATTRITION = Schema("Attrition-Vol and Invol", (
+    Column("Calendar Year", "datetime"),
+    Column("Status", "str"),
+), key=("Calendar Year",))
+
+ENGAGEMENT = Schema("Emp Engagement", (
+    Column("Calendar Year", "datetime"),
+    Column("Dimensions", "str"),
+    Column("Outstanding", "float", min=0, max=1),
+    Column("Average", "float", min=0, max=1),
+    Column("Needs Improvement", "float", min=0, max=1),
+), key=("Calendar Year",))
+
+PARTICIPATION = Schema("Participation", (
+    Column("Calendar Year", "datetime"),
+    Column("Participation Rate", "float", min=0, max=1),
+), key=("Calendar Year",))
+
+# HR_Analysis_Output sheets read by the Workforce tab; the others are kept as-is
+OUTPUT = {
+    "Age Distribution": Schema("HR_Analysis_Output / Age Distribution", (
+        Column("Year", "year"),
+        Column("Age", "float"),
+        Column("Generation", "str", case="title"),
+        Column("Count", "float", min=0),
+    ), key=("Year",)),
+    "Gender Diversity": Schema("HR_Analysis_Output / Gender Diversity", (
+        Column("Year", "year"),
+        Column("Gender", "str", case="capitalize"),
+        Column("Position/Level", "str"),
+        Column("Count", "int", min=0),
+    ), key=("Year",)),
+    "Tenure Analysis": Schema("HR_Analysis_Output / Tenure Analysis", (
+        Column("Year", "year"),
+        Column("YearJoined", "int"),
+        Column("Tenure", "int", min=0),
+        Column("Count", "int", min=0),
+    ), key=("Year",)),
+    "Resignation Trends": Schema("HR_Analysis_Output / Resignation Trends", (
+        Column("Year", "year"),
+        Column("YearJoined", "int"),
+        Column("Tenure", "int", min=0),
+        Column("LeaverCount", "int", min=0),
+    ), key=("Year",)),
+}
@@ -0,0 +1,153 @@
+"""Memory-mapped store of the prepared datasets shared by every server process.
+
+The first process to load a data version writes every frame and aggregate
+cube to .cache/shared/<version>/ as uncompressed Arrow IPC files (or .npy
+columns when pyarrow is not installed). Every process then maps those files
+read-only, so the OS page cache holds one physical copy no matter how many
+`streamlit run` processes sit behind the load balancer.
+"""
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import cache
+import data_loader
+from metrics import career, sampling, survival
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: fall back to memory-mapped .npy columns
+    pa = None
+
+SHARED_DIR = os.path.join(".cache", "shared")
+MANIFEST = "manifest.json"
+# Bump when CUBES or the file layout change, so stores published by older code are rebuilt
+STORE_REVISION = 2
+
+# Aggregates published next to the frames: (cached function, args)
+CUBES = [
+    (career.promotion_facts, ()),
+    (career.tenure_histograms, ()),
+    (survival.employees, ()),
+    (sampling.sample, ()),
+] + [(survival.curves, (by,)) for by in survival.STRATA]
+
+
+def store_path(version):
+    return os.path.join(SHARED_DIR, f"{version}-r{STORE_REVISION}")
+
+
+# -----------------------------
+# Frame files
+# -----------------------------
+def _write_frame(frame, path):
+    if pa is not None:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with pa.OSFile(f"{path}.arrow", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        return
+    # NumPy fallback: fixed-width columns as .npy, everything else pickled
+    os.makedirs(path)
+    columns, objects = [], {}
+    for i, name in enumerate(frame.columns):
+        values = frame[name]
+        if values.dtype.kind in "biufcmM":
+            np.save(os.path.join(path, f"{i}.npy"), values.to_numpy())
+        else:
+            objects[i] = values
+        columns.append(name)
+    with open(os.path.join(path, "objects.pkl"), "wb") as f:
+        pickle.dump((columns, objects), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_frame(path):
+    if os.path.exists(f"{path}.arrow"):
+        # Numeric and date columns without nulls come back as views of the mapping
+        table = pa.ipc.open_file(pa.memory_map(f"{path}.arrow", "r")).read_all()
+        return table.to_pandas(split_blocks=True)
+    with open(os.path.join(path, "objects.pkl"), "rb") as f:
+        columns, objects = pickle.load(f)
+    data = {
+        name: objects[i] if i in objects else np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r")
+        for i, name in enumerate(columns)
+    }
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+# -----------------------------
+# Publish / open
+# -----------------------------
+def publish(ds):
+    """Write ds and its cubes under .cache/shared/<version>/ (no-op if another process already did)"""
+    final = store_path(ds.version)
+    if os.path.exists(os.path.join(final, MANIFEST)):
+        return final
+    tmp = f"{final}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    manifest = {"version": ds.version, "source_files": ds.source_files, "frames": {}, "cubes": []}
+    for i, (name, frame) in enumerate(ds.frames()):
+        _write_frame(frame, os.path.join(tmp, f"frame-{i}"))
+        manifest["frames"][name] = {"file": f"frame-{i}", "attrs": frame.attrs}
+    for i, (fn, args) in enumerate(CUBES):
+        _write_frame(fn(ds, *args), os.path.join(tmp, f"cube-{i}"))
+        manifest["cubes"].append({"name": fn.cache_name, "args": list(args), "file": f"cube-{i}"})
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        # Another process published the same version first; use theirs
+        shutil.rmtree(tmp, ignore_errors=True)
+    prune(keep=os.path.basename(final))
+    return final
+
+
+def prune(keep):
+    """Remove other versions; processes still mapping them keep their open files"""
+    if not os.path.isdir(SHARED_DIR):
+        return
+    for name in os.listdir(SHARED_DIR):
+        if name != keep and not name.endswith(".tmp"):
+            shutil.rmtree(os.path.join(SHARED_DIR, name), ignore_errors=True)
+
+
+def read(version):
+    """Map a published version read-only and prime the result cache with its cubes"""
+    path = store_path(version)
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    frames = {}
+    for name, entry in manifest["frames"].items():
+        frame = _read_frame(os.path.join(path, entry["file"]))
+        frame.attrs.update(entry["attrs"])
+        frames[name] = frame
+    ds = data_loader.assemble(frames, manifest["version"], manifest["source_files"])
+
+    functions = {fn.cache_name: fn for fn, _ in CUBES}
+    for entry in manifest["cubes"]:
+        cube = _read_frame(os.path.join(path, entry["file"]))
+        cube.attrs["data_version"] = ds.version
+        cache.prime(functions[entry["name"]], ds, cube, *entry["args"])
+    return ds
+
+
+def open_datasets(parallel=False):
+    """The current data version, mapped from the shared store (publishing it first if needed)
+
+    parallel is passed to data_loader.load_datasets; only command-line tools set it.
+    """
+    version = data_loader.data_version()
+    if not os.path.exists(os.path.join(store_path(version), MANIFEST)):
+        ds = data_loader.load_datasets(parallel=parallel)
+        publish(ds)
+        version = ds.version
+    return read(version)
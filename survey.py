@@ -1,11 +1,11 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
-from sklearn.preprocessing import LabelEncoder
-from sklearn.ensemble import RandomForestClassifier
-import numpy as np
+import chart_data
+from metrics import GENERATION_ORDER
+from metrics import risk as risk_metrics
+from metrics import survey as survey_metrics
 
-def render(df, df_raw, selected_year):
+def render(ds, selected_year):
     # -----------------------------
     # Executive Summary at the very top
     # -----------------------------
@@ -33,74 +33,17 @@ def render(df, df_raw, selected_year):
     # -----------------------------
     st.markdown("## 💬 Survey & Feedback Metrics")
 
-    # -----------------------------
-    # Load survey datasets
-    # -----------------------------
-    df_engagement = pd.read_excel("Emp Engagement.xlsx", sheet_name="Sheet1")
-    df_participation = pd.read_excel("Participation.xlsx", sheet_name="Sheet1")
-
-    # Clean up column names
-    df_engagement.columns = df_engagement.columns.str.strip()
-    df_participation.columns = df_participation.columns.str.strip()
-
-    # Normalize Calendar Year
-    df_engagement["Calendar Year"] = pd.to_datetime(df_engagement["Calendar Year"], errors="coerce")
-    df_engagement["Year"] = df_engagement["Calendar Year"].dt.year
-
-    df_participation["Calendar Year"] = pd.to_datetime(df_participation["Calendar Year"], errors="coerce")
-    df_participation["Year"] = df_participation["Calendar Year"].dt.year
-
-    # -----------------------------
-    # Filter by selected year
-    # -----------------------------
-    engagement_year = df_engagement[df_engagement["Year"] == int(selected_year)]
-    participation_year = df_participation[df_participation["Year"] == int(selected_year)]
-
     # -----------------------------
     # Calculate engagement metrics
     # -----------------------------
-    if not participation_year.empty:
-        participation_rate = participation_year["Participation Rate"].iloc[0] * 100
-    else:
-        participation_rate = 0
-
-    # Calculate average engagement score
-    if not engagement_year.empty:
-        avg_outstanding = engagement_year["Outstanding"].mean() * 100
-        avg_average = engagement_year["Average"].mean() * 100
-        avg_needs_improvement = engagement_year["Needs Improvement"].mean() * 100
-        
-        # Weighted engagement score (Outstanding=100, Average=50, Needs Improvement=0)
-        avg_engagement_score = (avg_outstanding + (avg_average * 0.5)) / (avg_outstanding + avg_average + avg_needs_improvement) * 100
-        
-        # Top rated dimension
-        engagement_year_copy = engagement_year.copy()
-        engagement_year_copy["Score"] = (engagement_year_copy["Outstanding"] * 100 + engagement_year_copy["Average"] * 50) / 150 * 100
-        top_dimension = engagement_year_copy.nlargest(1, "Score").iloc[0]
-        top_dimension_name = top_dimension["Dimensions"]
-        top_dimension_score = top_dimension["Score"]
-        
-        # Count dimensions needing improvement (< 60% score)
-        needs_improvement_count = len(engagement_year_copy[engagement_year_copy["Score"] < 60])
-        
-        # YoY Change (if previous year data exists)
-        previous_year = int(selected_year) - 1
-        engagement_previous = df_engagement[df_engagement["Year"] == previous_year]
-        
-        if not engagement_previous.empty:
-            prev_outstanding = engagement_previous["Outstanding"].mean() * 100
-            prev_average = engagement_previous["Average"].mean() * 100
-            prev_needs_improvement = engagement_previous["Needs Improvement"].mean() * 100
-            prev_engagement_score = (prev_outstanding + (prev_average * 0.5)) / (prev_outstanding + prev_average + prev_needs_improvement) * 100
-            yoy_change = avg_engagement_score - prev_engagement_score
-        else:
-            yoy_change = 0
-    else:
-        avg_engagement_score = 0
-        top_dimension_name = "N/A"
-        top_dimension_score = 0
-        needs_improvement_count = 0
-        yoy_change = 0
+    results = survey_metrics.results(ds, selected_year)
+    kpis = results.kpis
+    participation_rate = kpis["participation_rate"]
+    avg_engagement_score = kpis["engagement_score"]
+    top_dimension_name = kpis["top_dimension"]
+    top_dimension_score = kpis["top_dimension_score"]
+    needs_improvement_count = kpis["needs_improvement_areas"]
+    yoy_change = kpis["yoy_change"]
 
     # -----------------------------
     # Top metrics row (5 metrics)
@@ -129,25 +72,18 @@ def render(df, df_raw, selected_year):
             change_color = "#2E8B57" if yoy_change >= 0 else "#B22222"
             change_symbol = "+" if yoy_change >= 0 else ""
             st.markdown(f"<div class='metric-value' style='color: {change_color};'>{change_symbol}{yoy_change:.1f}%</div>", unsafe_allow_html=True)
+            if results.yoy_significance is not None:
+                overall = results.yoy_significance.set_index("Dimensions").loc[survey_metrics.OVERALL]
+                st.markdown(f"<div class='metric-label' style='font-size: 12px;'>Survey Average {overall['Change']:+.2f} / 5, "
+                            f"95% CI {overall['Change Low']:+.2f} to {overall['Change High']:+.2f}, "
+                            f"p = {overall['p-value']:.2f}</div>", unsafe_allow_html=True)
     
     with col5:
         with st.container(border=True):
             st.markdown("<div class='metric-label'>Survey Participation Rate</div>", unsafe_allow_html=True)
             st.markdown(f"<div class='metric-value'>{participation_rate:.1f}%</div>", unsafe_allow_html=True)
 
-    # -----------------------------
-    # Prepare data for stacked chart
-    # -----------------------------
-    df_long = df_engagement.melt(
-        id_vars=["Dimensions", "Year"],
-        value_vars=["Outstanding", "Average", "Needs Improvement"],
-        var_name="Rating Type",
-        value_name="Score"
-    )
-    df_long["Score %"] = df_long["Score"] * 100
-    df_long_year = df_long[df_long["Year"] == int(selected_year)]
-
-    pivot_df = df_long_year.pivot(index="Dimensions", columns="Rating Type", values="Score %").fillna(0)
+    pivot_df = results.ratings_breakdown
 
     # -----------------------------
     # Stacked Bar Chart
@@ -162,12 +98,9 @@ def render(df, df_raw, selected_year):
             "Needs Improvement": "#B22222" # Red
         }
 
-        # Define rating order
-        rating_order = ["Outstanding", "Average", "Needs Improvement"]
-
         fig_stacked = go.Figure()
 
-        for rating in rating_order:
+        for rating in survey_metrics.RATINGS:
             fig_stacked.add_trace(go.Bar(
                 y=pivot_df.index,
                 x=pivot_df[rating],
@@ -192,7 +125,58 @@ def render(df, df_raw, selected_year):
             legend=dict(font=dict(color="var(--text-color)"), traceorder="normal")
         )
 
-        st.plotly_chart(fig_stacked, use_container_width=True)
+        # YoY change per dimension; the engagement file has only shares, so there is no significance test here
+        changes = results.dimension_changes
+        if changes is not None:
+            for _, change in changes[changes["Dimensions"].isin(pivot_df.index)].iterrows():
+                fig_stacked.add_annotation(
+                    x=100, y=change["Dimensions"], xanchor="left", xshift=6, showarrow=False,
+                    text=f"{change['Change']:+.1f}", font=dict(color="#808080", size=12),
+                    hovertext=f"{change['Dimensions']}: {change['Previous Score']:.1f} → {change['Score']:.1f}"
+                )
+
+        chart_data.plotly_chart(fig_stacked, use_container_width=True, name="engagement_breakdown")
+        if changes is not None:
+            st.caption(f"Right: change in each dimension's engagement score since {int(selected_year) - 1} (points). "
+                       f"The engagement file publishes only rating shares, so these changes have no significance test.")
+
+    # -----------------------------
+    # Survey Score Changes (per-employee scores, bootstrap)
+    # -----------------------------
+    yoy = results.yoy_significance
+    if yoy is not None:
+        with st.container(border=True):
+            st.markdown(f"#### Survey Score Changes ({int(selected_year) - 1} → {selected_year})")
+            colors = ["#2E8B57" if change > 0 else "#B22222" for change in yoy["Change"]]
+            colors = [color if significant else "#808080" for color, significant in zip(colors, yoy["Significant"])]
+            fig_yoy = go.Figure(go.Scatter(
+                x=yoy["Change"],
+                y=yoy["Dimensions"],
+                mode="markers+text",
+                marker=dict(color=colors, size=10),
+                error_x=dict(type="data", symmetric=False, array=yoy["Change High"] - yoy["Change"],
+                             arrayminus=yoy["Change"] - yoy["Change Low"], color="#808080"),
+                text=["*" if significant else "" for significant in yoy["Significant"]],
+                textposition="top center",
+                customdata=yoy[["Previous Score", "Score", "Change Low", "Change High", "p-value"]],
+                hovertemplate="%{y}: %{customdata[0]:.2f} → %{customdata[1]:.2f}<br>"
+                              "95% CI %{customdata[2]:+.2f} to %{customdata[3]:+.2f}, p = %{customdata[4]:.3f}<extra></extra>",
+            ))
+            fig_yoy.add_vline(x=0, line_color="#808080", line_dash="dot")
+            fig_yoy.update_layout(
+                xaxis=dict(title="Change in mean score (1–5)", tickfont=dict(color="var(--text-color)"), titlefont=dict(color="var(--text-color)")),
+                yaxis=dict(autorange="reversed", automargin=True, tickfont=dict(color="var(--text-color)")),
+                height=max(300, 28 * len(yoy)),
+                margin=dict(l=20, r=20, t=20, b=60),
+                font=dict(color="var(--text-color)"),
+                showlegend=False
+            )
+            chart_data.plotly_chart(fig_yoy, use_container_width=True, name="survey_score_changes")
+            st.caption(f"Change in each Data sheet survey score and in the Survey Average ({survey_metrics.OVERALL}, "
+                       f"the mean of an employee's scores) across {yoy['Previous Employees'].iloc[0]:,} → "
+                       f"{yoy['Employees'].iloc[0]:,} employees, with 95% intervals. * = significant at the "
+                       f"{survey_metrics.ALPHA:.0%} level ({survey_metrics.REPLICATES:,}-replicate bootstrap drawing "
+                       f"whole employees, so their scores stay together).")
 
     # -----------------------------
     # Driver Analysis - Combined Row
@@ -209,42 +193,8 @@ def render(df, df_raw, selected_year):
         with analysis_col1:
             st.markdown("##### By Resignation")
             
-            # Prepare data
-            df_analysis = df_raw.copy()
-            
-            # Create binary resignation flag
-            df_analysis["Resigned"] = df_analysis["Resignee Checking"].apply(
-                lambda x: 0 if str(x).strip().upper() == "ACTIVE" else 1
-            )
-            
-            # Select features for analysis
-            features = ["Tenure", "Position/Level", "Generation", "Gender", "Promotion & Transfer"]
-            
-            # Encode categorical variables
-            le = LabelEncoder()
-            df_encoded = df_analysis[features + ["Resigned"]].copy()
-            
-            for col in ["Position/Level", "Generation", "Gender"]:
-                if col in df_encoded.columns:
-                    df_encoded[col] = le.fit_transform(df_encoded[col].astype(str))
-            
-            # Remove NaN values
-            df_encoded = df_encoded.dropna()
-            
-            X = df_encoded[features]
-            y = df_encoded["Resigned"]
-            
-            # Train Random Forest to get feature importance
-            rf = RandomForestClassifier(n_estimators=100, random_state=42)
-            rf.fit(X, y)
-            
-            # Get feature importance
-            importance_df = pd.DataFrame({
-                "Driver": features,
-                "Importance": rf.feature_importances_
-            }).sort_values("Importance", ascending=False)
-            
-            importance_df["Importance %"] = (importance_df["Importance"] * 100).round(1)
+            # RandomForest fit is cached per data version
+            importance_df, corr_matrix = results.resignation_drivers
             
             # Display metrics with year
             st.markdown(f"<div class='metric-label'>Top Driver ({selected_year}): {importance_df.iloc[0]['Driver']}</div>", unsafe_allow_html=True)
@@ -269,10 +219,9 @@ def render(df, df_raw, selected_year):
                 showlegend=False
             )
             
-            st.plotly_chart(fig, use_container_width=True)
+            chart_data.plotly_chart(fig, use_container_width=True, name="resignation_drivers")
             
             # Correlation Chart
-            corr_matrix = df_encoded[features + ["Resigned"]].corr()["Resigned"].drop("Resigned").sort_values(ascending=False)
             
             fig_corr = go.Figure(data=go.Bar(
                 x=corr_matrix.values,
@@ -291,7 +240,7 @@ def render(df, df_raw, selected_year):
                 font=dict(color="var(--text-color)")
             )
             
-            st.plotly_chart(fig_corr, use_container_width=True)
+            chart_data.plotly_chart(fig_corr, use_container_width=True, name="resignation_correlation")
 
         # -----------------------------
         # RIGHT COLUMN: Driver Analysis by Promotion
@@ -299,46 +248,8 @@ def render(df, df_raw, selected_year):
         with analysis_col2:
             st.markdown("##### By Promotion")
             
-            # Prepare data for promotion analysis
-            df_promo = df_raw[df_raw["Resignee Checking"].str.strip().str.upper() == "ACTIVE"].copy()
-            
-            # Create binary promotion flag
-            def to_promo_flag(x):
-                s = str(x).strip().upper()
-                if s in {"1", "YES", "TRUE"}:
-                    return 1
-                return 0
-            
-            df_promo["Promoted"] = df_promo["Promotion & Transfer"].apply(to_promo_flag)
-            
-            # Select features for promotion analysis
-            promo_features = ["Tenure", "Position/Level", "Generation", "Gender"]
-            
-            # Encode categorical variables
-            le_promo = LabelEncoder()
-            df_promo_encoded = df_promo[promo_features + ["Promoted"]].copy()
-            
-            for col in ["Position/Level", "Generation", "Gender"]:
-                if col in df_promo_encoded.columns:
-                    df_promo_encoded[col] = le_promo.fit_transform(df_promo_encoded[col].astype(str))
-            
-            # Remove NaN values
-            df_promo_encoded = df_promo_encoded.dropna()
-            
-            X_promo = df_promo_encoded[promo_features]
-            y_promo = df_promo_encoded["Promoted"]
-            
-            # Train Random Forest to get feature importance
-            rf_promo = RandomForestClassifier(n_estimators=100, random_state=42)
-            rf_promo.fit(X_promo, y_promo)
-            
-            # Get feature importance
-            importance_promo_df = pd.DataFrame({
-                "Driver": promo_features,
-                "Importance": rf_promo.feature_importances_
-            }).sort_values("Importance", ascending=False)
-            
-            importance_promo_df["Importance %"] = (importance_promo_df["Importance"] * 100).round(1)
+            # RandomForest fit is cached per data version
+            importance_promo_df, corr_promo_matrix = results.promotion_drivers
             
             # Display metrics with year
             st.markdown(f"<div class='metric-label'>Top Driver ({selected_year}): {importance_promo_df.iloc[0]['Driver']}</div>", unsafe_allow_html=True)
@@ -363,10 +274,9 @@ def render(df, df_raw, selected_year):
                 showlegend=False
             )
             
-            st.plotly_chart(fig_promo, use_container_width=True)
+            chart_data.plotly_chart(fig_promo, use_container_width=True, name="promotion_drivers")
             
             # Correlation Chart
-            corr_promo_matrix = df_promo_encoded[promo_features + ["Promoted"]].corr()["Promoted"].drop("Promoted").sort_values(ascending=False)
             
             fig_corr_promo = go.Figure(data=go.Bar(
                 x=corr_promo_matrix.values,
@@ -385,34 +295,38 @@ def render(df, df_raw, selected_year):
                 font=dict(color="var(--text-color)")
             )
             
-            st.plotly_chart(fig_corr_promo, use_container_width=True)
+            chart_data.plotly_chart(fig_corr_promo, use_container_width=True, name="promotion_correlation")
 
-@st.cache_data
-def train_resignation_model(df_raw):
-    df_analysis = df_raw.copy()
-    df_analysis["Resigned"] = df_analysis["Resignee Checking"].apply(
-        lambda x: 0 if str(x).strip().upper() == "ACTIVE" else 1
-    )
-    
-    features = ["Tenure", "Position/Level", "Generation", "Gender", "Promotion & Transfer"]
-    le = LabelEncoder()
-    df_encoded = df_analysis[features + ["Resigned"]].copy()
-    
-    for col in ["Position/Level", "Generation", "Gender"]:
-        if col in df_encoded.columns:
-            df_encoded[col] = le.fit_transform(df_encoded[col].astype(str))
-    
-    df_encoded = df_encoded.dropna()
-    X = df_encoded[features]
-    y = df_encoded["Resigned"]
-    
-    rf = RandomForestClassifier(n_estimators=100, random_state=42)
-    rf.fit(X, y)
-    
-    importance_df = pd.DataFrame({
-        "Driver": features,
-        "Importance": rf.feature_importances_
-    }).sort_values("Importance", ascending=False)
-    
-    importance_df["Importance %"] = (importance_df["Importance"] * 100).round(1)
-    return importance_df, df_encoded[features + ["Resigned"]]
+    # -----------------------------
+    # At-risk employees (resignation model scores)
+    # -----------------------------
+    with st.container(border=True):
+        st.markdown(f"#### At-risk Employees ({selected_year})")
+        st.caption("Active employees ranked by the resignation model's predicted probability of leaving.")
+
+        scores = risk_metrics.risk_scores(ds)
+        filter_col1, filter_col2, filter_col3 = st.columns(3)
+        with filter_col1:
+            level = st.selectbox("Position/Level", ["All"] + sorted(scores["Position/Level"].unique()), key="risk_level")
+        with filter_col2:
+            generation = st.selectbox("Generation", ["All"] + GENERATION_ORDER, key="risk_generation")
+        with filter_col3:
+            top_n = st.slider("Show top", min_value=5, max_value=100, value=20, step=5, key="risk_top_n")
+
+        where = {column: value for column, value in (("Position/Level", level), ("Generation", generation))
+                 if value != "All"}
+        at_risk_df = risk_metrics.at_risk(ds, selected_year, top_n, where).drop(columns="Year")
+        at_risk_df["Resignation Risk"] = at_risk_df["Resignation Risk"] * 100
+
+        if at_risk_df.empty:
+            st.info("No active employees match the selected filters.")
+        else:
+            st.dataframe(
+                at_risk_df, hide_index=True, use_container_width=True,
+                column_config={
+                    "Tenure": st.column_config.NumberColumn("Tenure (yrs)"),
+                    "Resignation Risk": st.column_config.ProgressColumn(
+                        "Resignation Risk", format="%.1f%%", min_value=0, max_value=100
+                    ),
+                },
+            )
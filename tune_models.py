@@ -0,0 +1,198 @@
+"""Offline hyperparameter sweep for the Survey tab's driver models.
+
+Cross-validates RandomForest settings for the resignation and promotion
+models (stratified k-fold, ROC AUC) in a process pool and writes the best
+settings per model, with their CV scores, to model_config.json, which
+metrics.survey reads when it fits the models. Every (model, settings, fold)
+score is cached under .cache/tuning/<data version>/, so an interrupted sweep
+resumes where it stopped.
+
+Usage:
+    python tune_models.py                        # full grid, both models, all cores
+    python tune_models.py --models resignation --search random --trials 12 --folds 3 --workers 2
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import data_loader
+from metrics import survey
+
+TUNING_DIR = os.path.join(".cache", "tuning")
+
+GRID = {
+    "n_estimators": [100, 300],
+    "max_depth": [None, 8, 16],
+    "min_samples_leaf": [1, 5, 20],
+    "max_features": ["sqrt", None],
+}
+# Fixed so the folds and the forests are reproducible
+SPLIT_SEED = 0
+
+# Set in each worker process by _init_worker: model -> (X, y, folds)
+_data = None
+
+
+def _init_worker(data):
+    global _data
+    _data = data
+
+
+def candidates(search="grid", trials=20, seed=SPLIT_SEED):
+    """Settings to try, the defaults first; a random search draws `trials` of the grid points"""
+    grid = [dict(zip(GRID, values)) for values in itertools.product(*GRID.values())]
+    if search == "random" and trials < len(grid):
+        picks = np.random.default_rng(seed).choice(len(grid), size=trials, replace=False)
+        grid = [grid[i] for i in sorted(picks)]
+    out = [dict(survey.DEFAULT_FOREST)]
+    for params in grid:
+        params = {**survey.DEFAULT_FOREST, **params}
+        if params not in out:
+            out.append(params)
+    return out
+
+
+def model_data(ds, models, n_folds):
+    """model -> (features, target, [(train rows, test rows), ...])"""
+    from sklearn.model_selection import StratifiedKFold
+
+    data = {}
+    for model in models:
+        encoder, features, target = survey.MODELS[model]
+        encoded = encoder(ds)
+        X, y = encoded[features].to_numpy(), encoded[target].to_numpy()
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=SPLIT_SEED)
+        data[model] = (X, y, list(splitter.split(X, y)))
+    return data
+
+
+def score_fold(model, params, fold):
+    """ROC AUC of one setting on one held-out fold"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import roc_auc_score
+
+    X, y, folds = _data[model]
+    train, test = folds[fold]
+    start = time.perf_counter()
+    rf = RandomForestClassifier(**params).fit(X[train], y[train])
+    positive = int(np.flatnonzero(rf.classes_ == 1)[0])
+    auc = roc_auc_score(y[test], rf.predict_proba(X[test])[:, positive])
+    return {"auc": float(auc), "seconds": round(time.perf_counter() - start, 3)}
+
+
+def fold_path(version, model, params, n_folds, fold):
+    key = json.dumps({"params": params, "folds": n_folds, "seed": SPLIT_SEED}, sort_keys=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return os.path.join(TUNING_DIR, version, f"{model}-{digest}-{fold}.json")
+
+
+def _save(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp_path, path)
+
+
+def sweep(ds, models, settings, n_folds=5, workers=None):
+    """{(model, settings index): [fold scores]}, reusing fold scores cached by earlier runs"""
+    data = model_data(ds, models, n_folds)
+    scores, todo = {}, []
+    for model in models:
+        for i, params in enumerate(settings):
+            for fold in range(n_folds):
+                path = fold_path(ds.version, model, params, n_folds, fold)
+                if os.path.exists(path):
+                    with open(path) as f:
+                        scores.setdefault((model, i), []).append(json.load(f))
+                else:
+                    todo.append((model, i, fold, path))
+
+    print(f"{len(todo)} folds to fit, {sum(map(len, scores.values()))} cached")
+    if workers == 1:
+        _init_worker(data)
+        for model, i, fold, path in todo:
+            result = score_fold(model, settings[i], fold)
+            _save(path, result)
+            scores.setdefault((model, i), []).append(result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+            futures = {pool.submit(score_fold, model, settings[i], fold): (model, i, path)
+                       for model, i, fold, path in todo}
+            for done, future in enumerate(as_completed(futures), 1):
+                model, i, path = futures[future]
+                result = future.result()
+                # Saved as each fold finishes, so an interrupted sweep keeps them
+                _save(path, result)
+                scores.setdefault((model, i), []).append(result)
+                if done % 20 == 0 or done == len(futures):
+                    print(f"  {done}/{len(futures)} folds")
+    return scores
+
+
+def summarize(models, settings, scores):
+    """model -> candidates sorted by mean CV AUC, best first"""
+    out = {}
+    for model in models:
+        rows = []
+        for i, params in enumerate(settings):
+            aucs = [fold["auc"] for fold in scores[(model, i)]]
+            rows.append({
+                "params": params,
+                "cv_auc": round(statistics.mean(aucs), 4),
+                "cv_auc_std": round(statistics.stdev(aucs), 4) if len(aucs) > 1 else 0.0,
+                "fit_seconds": round(statistics.mean(fold["seconds"] for fold in scores[(model, i)]), 3),
+            })
+        # Stable sort: on a tie the earlier candidate (the defaults come first) wins
+        out[model] = sorted(rows, key=lambda row: -row["cv_auc"])
+    return out
+
+
+def write_config(path, version, n_folds, summary):
+    models = {}
+    for model, rows in summary.items():
+        default = next(row for row in rows if row["params"] == survey.DEFAULT_FOREST)
+        models[model] = {
+            "params": rows[0]["params"],
+            "cv_auc": rows[0]["cv_auc"],
+            "cv_auc_std": rows[0]["cv_auc_std"],
+            "default_cv_auc": default["cv_auc"],
+            "candidates": rows,
+        }
+    _save(path, {"data_version": version, "scoring": "roc_auc", "folds": n_folds, "models": models})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate RandomForest settings for the driver models.")
+    parser.add_argument("--models", nargs="+", choices=list(survey.MODELS), default=list(survey.MODELS))
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--trials", type=int, default=20, help="settings drawn by --search random")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count, 1 = serial)")
+    parser.add_argument("--output", default=survey.MODEL_CONFIG)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    ds = data_loader.load_datasets(parallel=True)
+    settings = candidates(args.search, args.trials)
+    print(f"Data version {ds.version}: {len(settings)} settings x {args.folds} folds x {len(args.models)} models")
+    scores = sweep(ds, args.models, settings, args.folds, args.workers)
+    summary = summarize(args.models, settings, scores)
+    write_config(args.output, ds.version, args.folds, summary)
+
+    for model, rows in summary.items():
+        print(f"\n{model}: best of {len(rows)}")
+        for row in rows[:5]:
+            print(f"  AUC {row['cv_auc']:.4f} ± {row['cv_auc_std']:.4f}  {row['params']}")
+    print(f"\nwrote {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Reload the dashboard data in the background when a source workbook changes.
+
+The app reads the live Datasets from a DatasetStore once per rerun. When the
+watcher sees a new or modified workbook it loads, validates, publishes (see
+shared_store.py) and prewarms the new version on its own thread, then swaps
+it in with a single reference assignment, so a run in progress keeps the
+snapshot it started with and no one ever sees a half-loaded version.
+"""
+import logging
+import os
+import threading
+import time
+
+import data_loader
+import prewarm
+import shared_store
+
+logger = logging.getLogger(__name__)
+
+# How often the source files' mtimes and sizes are checked
+POLL_SECONDS = 5
+
+
+def signature(paths):
+    """(path, mtime_ns, size) for each file: a cheap check before hashing contents"""
+    entries = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            entries.append((path, None, None))
+            continue
+        entries.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(entries)
+
+
+class DatasetStore:
+    """Holds the live Datasets; current() is a snapshot that later swaps do not touch"""
+
+    def __init__(self, ds):
+        self._ds = ds
+        self._lock = threading.Lock()
+        self.loaded_at = time.time()
+        self.watcher = None
+
+    def current(self):
+        return self._ds
+
+    def swap(self, ds):
+        with self._lock:
+            previous, self._ds = self._ds, ds
+            self.loaded_at = time.time()
+        return previous
+
+
+class Watcher(threading.Thread):
+    """Polls the source files and rebuilds + swaps the store's Datasets when they change"""
+
+    def __init__(self, store, interval=POLL_SECONDS, warm=True):
+        super().__init__(name="data-watcher", daemon=True)
+        self.store = store
+        self.interval = interval
+        self.warm = warm
+        self.reloads = 0
+        self.last_error = None
+        self._signature = signature(store.current().source_files)
+        self._pending = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        if self.warm:
+            prewarm.warm_and_mark(self.store.current())
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as exc:
+                # Keep serving the current version; the next change retries
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("Reloading source data failed")
+
+    def poll(self):
+        """Reload if the sources changed and have stopped changing; returns True on a swap"""
+        paths = data_loader.source_files()
+        current = signature(paths)
+        if current == self._signature:
+            self._pending = None
+            return False
+        # A workbook being copied in changes between polls: wait until it settles
+        if current != self._pending:
+            self._pending = current
+            return False
+        self._signature, self._pending = current, None
+        if data_loader.data_version(paths) == self.store.current().version:
+            # Touched or re-saved without changing its contents
+            return False
+        self.reload()
+        return True
+
+    def reload(self):
+        start = time.perf_counter()
+        ds = shared_store.open_datasets()
+        if self.warm:
+            prewarm.warm_and_mark(ds)
+        previous = self.store.swap(ds)
+        self.reloads += 1
+        self.last_error = None
+        logger.info("Swapped data version %s -> %s in %.2fs", previous.version, ds.version,
+                    time.perf_counter() - start)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start(ds, interval=POLL_SECONDS, warm=True):
+    """Wrap ds in a DatasetStore and start watching its source files"""
+    store = DatasetStore(ds)
+    store.watcher = Watcher(store, interval, warm)
+    store.watcher.start()
+    return store
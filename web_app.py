@@ -1,14 +1,15 @@
 import warnings
 warnings.filterwarnings('ignore')
 import streamlit as st
-import pandas as pd
 
-# Import tab modules
-import workforce
-import attrition_retention as attrition
-import career
-import survey
-import aboutus
+import assets
+import cache
+import chart_data
+import shared_store
+import watcher
+
+# Tab modules (and the plotly / scikit-learn imports they pull in) are
+# imported lazily below, only when their tab is rendered
 
 # -----------------------------
 # Page configuration
@@ -20,26 +21,21 @@ st.set_page_config(
 )
 
 # -----------------------------
-# Load CSS file globally
-# -----------------------------
-with open("styles.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-
-# -----------------------------
-# Load Excel outputs
+# Load CSS file globally (minified and cached once per process)
 # -----------------------------
-df = pd.read_excel("HR_Analysis_Output.xlsx", sheet_name=None)
-df_raw = pd.read_excel("HR Cleaned Data 01.09.26.xlsx", sheet_name="Data")
-df_attrition = pd.read_excel("Attrition-Vol and Invol.xlsx")
+st.markdown(assets.css_tag("styles.css"), unsafe_allow_html=True)
 
 # -----------------------------
-# Ensure Year column exists
+# Map the shared data store once per process (the first server process to
+# start publishes it); a background watcher reloads, prewarms and swaps in a
+# new version whenever a source workbook changes
 # -----------------------------
-if "Year" not in df_raw.columns and "Calendar Year" in df_raw.columns:
-    df_raw["Year"] = pd.to_datetime(df_raw["Calendar Year"]).dt.year
+@st.cache_resource(show_spinner="Loading HR data...")
+def get_store():
+    return watcher.start(shared_store.open_datasets())
 
-if "Year" not in df_attrition.columns and "Calendar Year" in df_attrition.columns:
-    df_attrition["Year"] = pd.to_datetime(df_attrition["Calendar Year"]).dt.year
+# One snapshot per rerun, so a swap never mixes two versions in a page
+ds = get_store().current()
 
 # -----------------------------
 # App Title
@@ -52,50 +48,6 @@ st.title("ACJ Company Dashboard")
 if "active_tab" not in st.session_state:
     st.session_state.active_tab = 0
 
-# -----------------------------
-# Custom CSS for tab buttons
-# -----------------------------
-st.markdown("""
-<style>
-    /* Style for inactive tab buttons */
-    div[data-testid="column"] > div > div > button[kind="secondary"] {
-        width: 100%;
-        border-radius: 5px;
-        border: 2px solid #e0e0e0;
-        background-color: white;
-        color: #333;
-        font-weight: 500;
-        padding: 10px;
-        transition: all 0.3s;
-    }
-    
-    /* Hover state for inactive tabs */
-    div[data-testid="column"] > div > div > button[kind="secondary"]:hover {
-        border-color: #6495ED;
-        background-color: #f0f8ff;
-        color: #00008B;
-    }
-    
-    /* Style for active tab button */
-    div[data-testid="column"] > div > div > button[kind="primary"] {
-        width: 100%;
-        border-radius: 5px;
-        border: 2px solid #00008B;
-        background-color: #00008B;
-        color: white;
-        font-weight: 600;
-        padding: 10px;
-        transition: all 0.3s;
-    }
-    
-    /* Hover state for active tab */
-    div[data-testid="column"] > div > div > button[kind="primary"]:hover {
-        background-color: #000070;
-        border-color: #000070;
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # -----------------------------
 # Tab navigation with buttons
 # -----------------------------
@@ -104,6 +56,7 @@ tab_names = [
     "🔄 Attrition & Retention",
     "🎯 Career Progression",
     "💬 Survey & Feedback",
+    "🔎 Employee Lookup",
     "📚 About Us"
 ]
 
@@ -122,26 +75,80 @@ st.markdown("---")
 # Render content based on active tab
 # -----------------------------
 active_tab = st.session_state.active_tab
+# Years on offer come from the data, so a new year shows up without a code change
+years = ds.years
+# Metrics module of a tab with per-year results, and whether it shows estimates
+domain, approximate = None, False
+
+
+def approximate_toggle():
+    return st.toggle(
+        "Approximate mode", key="approximate_mode",
+        help="Show estimates from a stratified sample (with 95% intervals) while the exact figures "
+             "are computed in the background",
+    )
+
 
 if active_tab == 0:  # Workforce
-    years = [2020, 2021, 2022, 2023, 2024, 2025]
+    import workforce
+    from metrics import workforce as domain
     selected_year = st.radio("Select Year", years, horizontal=True, key="workforce_year")
-    workforce.render(df, df_raw, selected_year)
+    approximate = approximate_toggle()
+    workforce.render(ds, selected_year, approximate)
 
 elif active_tab == 1:  # Attrition & Retention
-    years = [2020, 2021, 2022, 2023, 2024, 2025]
+    import attrition_retention as attrition
+    from metrics import attrition as domain
     selected_year = st.radio("Select Year", years, horizontal=True, key="attrition_year")
-    attrition.render(df, df_raw, selected_year, df_attrition)
+    approximate = approximate_toggle()
+    attrition.render(ds, selected_year, approximate)
 
 elif active_tab == 2:  # Career Progression
-    years = [2020, 2021, 2022, 2023, 2024, 2025]
+    import career
+    from metrics import career as domain
     selected_year = st.radio("Select Year", years, horizontal=True, key="career_year")
-    career.render(df, df_raw, selected_year)
+    approximate = approximate_toggle()
+    career.render(ds, selected_year, approximate)
 
 elif active_tab == 3:  # Survey & Feedback
-    years = [2020, 2021, 2022, 2023, 2024, 2025]
+    import survey
+    from metrics import survey as domain
     selected_year = st.radio("Select Year", years, horizontal=True, key="survey_year")
-    survey.render(df, df_raw, selected_year)
+    survey.render(ds, selected_year)
+
+elif active_tab == 4:  # Employee Lookup
+    import employee_lookup
+    employee_lookup.render(ds)
+
+elif active_tab == 5:  # About Us
+    import aboutus
+    aboutus.render(ds, years[-1])
 
-elif active_tab == 4:  # About Us
-    aboutus.render(df, df_raw, 2024)
+# -----------------------------
+# Approximate mode: rerun the page once the exact results are ready
+# -----------------------------
+@st.fragment(run_every=1)
+def refresh_when_exact(domain, year):
+    if cache.is_cached(domain.results, ds, year):
+        st.rerun()
+
+
+if approximate and not cache.is_cached(domain.results, ds, selected_year):
+    st.caption("Showing estimates with 95% intervals; exact figures replace them when ready.")
+    refresh_when_exact(domain, selected_year)
+
+# -----------------------------
+# Prefetch the years either side of the selected one, so stepping through the
+# year radio is answered from the cache (not while exact figures are pending)
+# -----------------------------
+if domain is not None and cache.is_cached(domain.results, ds, selected_year):
+    at = years.index(selected_year)
+    for neighbor in years[max(at - 1, 0):at] + years[at + 1:at + 2]:
+        cache.prefetch(domain.results, ds, neighbor)
+
+# -----------------------------
+# Chart payload report (append ?debug=1 to the URL)
+# -----------------------------
+if chart_data.debug_enabled():
+    with st.expander("Chart payload sizes"):
+        st.dataframe(chart_data.payload_report(), use_container_width=True, hide_index=True)